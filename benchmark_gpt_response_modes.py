@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк форматов ответа GPT: полный (вердикт по каждому посту) против
+компактного (только подходящие посты с кодами позиций).
+
+Берет записанные посты из classification_samples (или JSONL-файла с полем
+full_text), собирает из них батчи и отправляет каждый батч в обоих режимах.
+Сравнивает задержку ответа, входные/выходные токены и согласие вердиктов.
+
+Использование:
+    python benchmark_gpt_response_modes.py --batches 10 --batch-size 20
+    python benchmark_gpt_response_modes.py --input posts.jsonl
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=fake python benchmark_gpt_response_modes.py
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+from openai import AsyncOpenAI
+from processors.gpt_prompt import RESPONSE_MODES, build_request_body, parse_verdicts
+from config.settings import settings
+
+
+def load_posts(input_path, limit):
+    """Посты из JSONL-файла или из сохраненных вердиктов GPT"""
+    if input_path:
+        with open(input_path, 'r', encoding='utf-8') as f:
+            posts = [json.loads(line) for line in f if line.strip()]
+        return posts[:limit]
+
+    from database.models import ClassificationSample
+    from database.connection import get_session, close_session
+
+    session = get_session()
+    try:
+        rows = session.query(ClassificationSample.text).order_by(
+            ClassificationSample.id.desc()
+        ).limit(limit).all()
+    finally:
+        close_session(session)
+
+    return [{'full_text': text} for (text,) in rows if text]
+
+
+async def run_request(client, batch, mode):
+    """Один запрос: (задержка, prompt_tokens, completion_tokens, вердикты)"""
+    started = time.perf_counter()
+    response = await client.chat.completions.create(**build_request_body(batch, settings.GPT_MODEL, mode))
+    latency = time.perf_counter() - started
+
+    choice = response.choices[0]
+    verdicts = parse_verdicts(choice.message.content, choice.finish_reason, len(batch), mode)
+    usage = response.usage
+    return latency, usage.prompt_tokens, usage.completion_tokens, verdicts
+
+
+def summarize(mode, results):
+    latencies = sorted(r[0] for r in results)
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(
+        f"{mode:<8} requests={len(results):<4} "
+        f"latency p50={statistics.median(latencies):.2f}s p95={p95:.2f}s "
+        f"prompt_tokens avg={statistics.mean(r[1] for r in results):.0f} "
+        f"completion_tokens avg={statistics.mean(r[2] for r in results):.0f}"
+    )
+
+
+async def benchmark(args):
+    posts = load_posts(args.input, args.batches * args.batch_size)
+    batches = [posts[i:i + args.batch_size] for i in range(0, len(posts), args.batch_size)]
+    if not batches:
+        print("No recorded posts found")
+        return
+
+    client = AsyncOpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+    results = {mode: [] for mode in RESPONSE_MODES}
+    agreed = 0
+    compared = 0
+
+    for batch_idx, batch in enumerate(batches):
+        # Чередуем порядок режимов, чтобы прогрев/кеш префикса не давал преимущества одному из них
+        modes = RESPONSE_MODES if batch_idx % 2 == 0 else tuple(reversed(RESPONSE_MODES))
+        verdicts = {}
+        for mode in modes:
+            try:
+                result = await run_request(client, batch, mode)
+            except Exception as e:
+                print(f"Batch {batch_idx} ({mode}) failed: {e}")
+                continue
+            results[mode].append(result)
+            verdicts[mode] = result[3]
+
+        if len(verdicts) == len(RESPONSE_MODES):
+            full, compact = verdicts['full'], verdicts['compact']
+            for idx in range(len(batch)):
+                compared += 1
+                agreed += (
+                    bool(full.get(idx, {}).get('is_relevant')) == compact[idx]['is_relevant']
+                    and full.get(idx, {}).get('position_type') == compact[idx]['position_type']
+                )
+
+    print(f"\n{len(batches)} batches, {len(posts)} posts, model {settings.GPT_MODEL}\n")
+    for mode in RESPONSE_MODES:
+        if results[mode]:
+            summarize(mode, results[mode])
+    if compared:
+        print(f"\nVerdict agreement: {agreed}/{compared} ({agreed / compared:.1%})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark full vs compact GPT response modes')
+    parser.add_argument('--input', help='JSONL file with recorded posts (full_text field)')
+    parser.add_argument('--batches', type=int, default=10)
+    parser.add_argument('--batch-size', type=int, default=20)
+    asyncio.run(benchmark(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк normalize_text / clean_text: текущие реализации против исходных
+regex-версий (эталон из tests/test_text_utils.py), в постах в секунду.
+
+Берет записанные посты из classification_samples (или JSONL-файла с полем
+full_text); без базы и файла — синтетический корпус постов из теста.
+Совпадение результатов проверяет дифференциальный тест, здесь только скорость.
+
+Использование:
+    python benchmark_text_utils.py
+    python benchmark_text_utils.py --input posts.jsonl --repeat 10
+    python benchmark_text_utils.py --synthetic --posts 5000
+"""
+
+import argparse
+import json
+import time
+from tests.test_text_utils import build_corpus, clean_text_reference, normalize_text_reference
+from utils.text_utils import clean_text, normalize_text
+
+
+def load_posts(input_path, limit, synthetic):
+    """Посты из JSONL-файла, из сохраненных вердиктов GPT или синтетические"""
+    if input_path:
+        with open(input_path, 'r', encoding='utf-8') as f:
+            posts = [json.loads(line).get('full_text', '') for line in f if line.strip()]
+        return posts[:limit]
+
+    if not synthetic:
+        try:
+            from database.models import ClassificationSample
+            from database.connection import get_session, close_session
+
+            session = get_session()
+            try:
+                rows = session.query(ClassificationSample.text).order_by(
+                    ClassificationSample.id.desc()
+                ).limit(limit).all()
+            finally:
+                close_session(session)
+
+            posts = [text for (text,) in rows if text]
+            if posts:
+                return posts
+            print("No recorded posts found, using synthetic corpus")
+        except Exception as e:
+            print(f"Recorded posts unavailable ({e}), using synthetic corpus")
+
+    return build_corpus(size=limit)
+
+
+def posts_per_second(func, posts, repeat):
+    """Лучший из repeat прогонов по всем постам, постов/сек"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for text in posts:
+            func(text)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return len(posts) / best if best else float('inf')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark normalize_text / clean_text against regex originals')
+    parser.add_argument('--input', help='JSONL file with full_text field')
+    parser.add_argument('--posts', type=int, default=2000, help='Posts to benchmark')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per function (best is reported)')
+    parser.add_argument('--synthetic', action='store_true', help='Use the synthetic corpus, skip the database')
+    args = parser.parse_args()
+
+    posts = load_posts(args.input, args.posts, args.synthetic)
+    avg_chars = sum(len(text) for text in posts) / len(posts)
+    print(f"\n{len(posts)} posts, {avg_chars:.0f} chars on average, best of {args.repeat} runs\n")
+
+    pairs = [
+        ('normalize_text', normalize_text, normalize_text_reference),
+        ('clean_text', clean_text, clean_text_reference),
+    ]
+    print(f"{'function':<16}{'old posts/s':>14}{'new posts/s':>14}{'speedup':>10}")
+    for name, fast, reference in pairs:
+        old = posts_per_second(reference, posts, args.repeat)
+        new = posts_per_second(fast, posts, args.repeat)
+        print(f"{name:<16}{old:>14,.0f}{new:>14,.0f}{new / old:>9.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -104,11 +104,11 @@ class ChannelReader:
         Читает сообщения из нескольких каналов с батчингом
 
         Args:
-            channels: List[Channel] - список объектов Channel из БД
+            channels: Dict[str, dict] - {username: {'id': ...}} из get_enabled_channels
             hours: Количество часов назад
 
         Returns:
-            Dict[str, List[Message]]: {channel_username: [messages]}
+            Dict[int, List[Message]]: {channel_id: [messages]}
         """
         if not self.client:
             await self.initialize()
@@ -119,27 +119,28 @@ class ChannelReader:
 
         logger.info(f"Reading messages from {len(channels)} channels (batch_size={batch_size})")
 
-        for i in range(0, len(channels), batch_size):
-            batch = channels[i:i+batch_size]
-            logger.info(f"Processing batch {i//batch_size + 1}/{(len(channels)-1)//batch_size + 1}")
+        channel_items = list(channels.items())
+        for i in range(0, len(channel_items), batch_size):
+            batch = channel_items[i:i+batch_size]
+            logger.info(f"Processing batch {i//batch_size + 1}/{(len(channel_items)-1)//batch_size + 1}")
 
             # Обрабатываем батч параллельно
             tasks = [
-                self.read_channel_messages(channel.username, hours=hours)
-                for channel in batch
+                self.read_channel_messages(username, hours=hours)
+                for username, _ in batch
             ]
             results = await asyncio.gather(*tasks, return_exceptions=True)
 
-            # Сохраняем результаты
-            for channel, messages in zip(batch, results):
+            # Сохраняем результаты по id канала
+            for (username, channel), messages in zip(batch, results):
                 if isinstance(messages, Exception):
-                    logger.error(f"Exception for channel {channel.username}: {messages}")
-                    all_messages[channel.username] = []
+                    logger.error(f"Exception for channel {username}: {messages}")
+                    all_messages[channel['id']] = []
                 else:
-                    all_messages[channel.username] = messages
+                    all_messages[channel['id']] = messages
 
             # Задержка между батчами (кроме последнего)
-            if i + batch_size < len(channels):
+            if i + batch_size < len(channel_items):
                 logger.info(f"Waiting {batch_delay}s before next batch...")
                 await asyncio.sleep(batch_delay)
 
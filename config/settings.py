@@ -43,6 +43,87 @@ class Settings:
     BATCH_SIZE = int(os.getenv('BATCH_SIZE', '10'))
     BATCH_DELAY = int(os.getenv('BATCH_DELAY', '30'))  # секунд
 
+    # Локальный пре-скрининг постов перед GPT
+    PRESCREEN_ENABLED = os.getenv('PRESCREEN_ENABLED', 'true').lower() == 'true'
+    PRESCREEN_MIN_TEXT_LENGTH = int(os.getenv('PRESCREEN_MIN_TEXT_LENGTH', '40'))  # символов
+    PRESCREEN_REQUIRE_VIDEO_CONTEXT = os.getenv('PRESCREEN_REQUIRE_VIDEO_CONTEXT', 'true').lower() == 'true'
+
+    # Негативный фильтр (курсы, реклама, фрилансеры) перед отправкой в GPT
+    NEGATIVE_FILTER_ENABLED = os.getenv('NEGATIVE_FILTER_ENABLED', 'true').lower() == 'true'
+    NEGATIVE_FILTER_THRESHOLD = float(os.getenv('NEGATIVE_FILTER_THRESHOLD', '0.8'))
+
+    # Кластеризация почти-дубликатов перед GPT (классифицируется один пост из кластера)
+    CLUSTERING_ENABLED = os.getenv('CLUSTERING_ENABLED', 'true').lower() == 'true'
+    CLUSTER_SIMILARITY_THRESHOLD = float(os.getenv('CLUSTER_SIMILARITY_THRESHOLD', '0.8'))  # Жаккар по шинглам
+
+    # Сжатие текста постов перед GPT (футеры каналов, эмодзи, хештеги, контакты)
+    POST_COMPACTION_ENABLED = os.getenv('POST_COMPACTION_ENABLED', 'true').lower() == 'true'
+    FOOTER_MIN_REPEATS = int(os.getenv('FOOTER_MIN_REPEATS', '3'))  # постов канала с одинаковой концовкой
+
+    # Поиск репостов среди сохраненных вакансий (MinHash LSH по тексту)
+    REPOST_DETECTION_ENABLED = os.getenv('REPOST_DETECTION_ENABLED', 'true').lower() == 'true'
+    # Метод поиска: 'minhash' (LSH-корзины в отдельной таблице) или 'simhash' (полосы в колонках Vacancy)
+    REPOST_DETECTION_METHOD = os.getenv('REPOST_DETECTION_METHOD', 'minhash')
+    REPOST_SIMILARITY_THRESHOLD = float(os.getenv('REPOST_SIMILARITY_THRESHOLD', '0.8'))  # Жаккар по шинглам
+    SIMHASH_MAX_DISTANCE = int(os.getenv('SIMHASH_MAX_DISTANCE', '3'))  # бит, не больше 3
+
+    # GPT: модель и бэкенд классификации ('interactive' или 'batch' — Batch API)
+    GPT_MODEL = os.getenv('GPT_MODEL', 'gpt-4o-mini')
+    GPT_BACKEND = os.getenv('GPT_BACKEND', 'interactive')
+    GPT_BATCH_DIR = os.getenv('GPT_BATCH_DIR', '/tmp/gpt_batches')
+    GPT_BATCH_POLL_INTERVAL = float(os.getenv('GPT_BATCH_POLL_INTERVAL', '30'))  # секунд
+    # Ежедневная рассылка не ждет дольше: по таймауту задание отменяется,
+    # а батчи доклассифицируются через interactive-бэкенд
+    GPT_BATCH_TIMEOUT = float(os.getenv('GPT_BATCH_TIMEOUT', '1800'))  # секунд (30 минут)
+
+    # Кеш вердиктов GPT (по хешу нормализованного текста поста)
+    GPT_CACHE_ENABLED = os.getenv('GPT_CACHE_ENABLED', 'true').lower() == 'true'
+
+    # Локальный классификатор перед GPT (обучается командой main.py --train-classifier).
+    # Выключен по умолчанию: файл модели не переживает редеплой на эфемерном диске Render
+    LOCAL_CLASSIFIER_ENABLED = os.getenv('LOCAL_CLASSIFIER_ENABLED', 'false').lower() == 'true'
+    LOCAL_CLASSIFIER_PATH = os.getenv('LOCAL_CLASSIFIER_PATH', 'data/local_classifier.json')
+    LOCAL_CLASSIFIER_THRESHOLD = float(os.getenv('LOCAL_CLASSIFIER_THRESHOLD', '0.95'))
+    # Принимать ли уверенные положительные решения без GPT (название берется из первой строки поста)
+    LOCAL_CLASSIFIER_ACCEPT_POSITIVE = os.getenv('LOCAL_CLASSIFIER_ACCEPT_POSITIVE', 'false').lower() == 'true'
+    # Сколько последних вердиктов GPT хранить как обучающие примеры (старые удаляются, 0 — без лимита)
+    LOCAL_CLASSIFIER_MAX_SAMPLES = int(os.getenv('LOCAL_CLASSIFIER_MAX_SAMPLES', '50000'))
+
+    # Параллельные запросы к GPT и rate limits OpenAI
+    GPT_MAX_CONCURRENCY = int(os.getenv('GPT_MAX_CONCURRENCY', '4'))
+    GPT_RPM_LIMIT = int(os.getenv('GPT_RPM_LIMIT', '500'))
+    GPT_TPM_LIMIT = int(os.getenv('GPT_TPM_LIMIT', '200000'))
+    GPT_MAX_RETRIES = int(os.getenv('GPT_MAX_RETRIES', '5'))
+    GPT_BACKOFF_BASE = float(os.getenv('GPT_BACKOFF_BASE', '1'))  # секунд
+    GPT_BACKOFF_MAX = float(os.getenv('GPT_BACKOFF_MAX', '60'))  # секунд
+
+    # Хвостовые задержки GPT: таймаут запроса, хеджирование после p95, запасной эндпоинт
+    GPT_REQUEST_TIMEOUT = float(os.getenv('GPT_REQUEST_TIMEOUT', '60'))  # секунд
+    GPT_HEDGE_ENABLED = os.getenv('GPT_HEDGE_ENABLED', 'true').lower() == 'true'
+    GPT_HEDGE_INITIAL_DELAY = float(os.getenv('GPT_HEDGE_INITIAL_DELAY', '20'))  # секунд, пока мало замеров
+    GPT_HEDGE_MIN_DELAY = float(os.getenv('GPT_HEDGE_MIN_DELAY', '2'))  # секунд
+    GPT_HEDGE_MIN_SAMPLES = int(os.getenv('GPT_HEDGE_MIN_SAMPLES', '10'))
+    GPT_HEDGE_WINDOW = int(os.getenv('GPT_HEDGE_WINDOW', '200'))  # последних запросов для расчета p95
+    # Запасной эндпоинт: другая модель или OpenAI-совместимый локальный сервер
+    GPT_FALLBACK_MODEL = os.getenv('GPT_FALLBACK_MODEL')
+    GPT_FALLBACK_BASE_URL = os.getenv('GPT_FALLBACK_BASE_URL')
+    GPT_FALLBACK_API_KEY = os.getenv('GPT_FALLBACK_API_KEY')
+
+    # Упаковка постов в батчи GPT по бюджету токенов
+    GPT_MAX_BATCH_SIZE = int(os.getenv('GPT_MAX_BATCH_SIZE', '30'))  # постов
+    GPT_POST_MAX_CHARS = int(os.getenv('GPT_POST_MAX_CHARS', '1500'))
+    GPT_BATCH_INPUT_TOKENS = int(os.getenv('GPT_BATCH_INPUT_TOKENS', '6000'))
+    GPT_BATCH_OUTPUT_TOKENS = int(os.getenv('GPT_BATCH_OUTPUT_TOKENS', '1400'))
+    GPT_OUTPUT_TOKENS_PER_POST = int(os.getenv('GPT_OUTPUT_TOKENS_PER_POST', '60'))
+    GPT_COMPACT_OUTPUT_TOKENS_PER_POST = int(os.getenv('GPT_COMPACT_OUTPUT_TOKENS_PER_POST', '25'))
+    GPT_MAX_OUTPUT_TOKENS = int(os.getenv('GPT_MAX_OUTPUT_TOKENS', '2000'))  # max_tokens запроса
+
+    # Попытки на батч (не меньше одной; после исчерпания невалидный батч делится пополам)
+    GPT_BATCH_RETRIES = int(os.getenv('GPT_BATCH_RETRIES', '2'))
+    GPT_STRUCTURED_OUTPUT = os.getenv('GPT_STRUCTURED_OUTPUT', 'true').lower() == 'true'
+    # Формат ответа: 'full' (вердикт по каждому посту) или 'compact' (только подходящие посты)
+    GPT_RESPONSE_MODE = os.getenv('GPT_RESPONSE_MODE', 'full')
+
     @classmethod
     def validate(cls):
         """Валидация обязательных переменных окружения"""
@@ -0,0 +1,66 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from config.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Строк в одном INSERT ... VALUES (лимит параметров SQLite и размер запроса)
+INSERT_CHUNK_SIZE = 500
+
+# Диалекты с INSERT ... ON CONFLICT DO NOTHING ... RETURNING
+_UPSERT_DIALECTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+
+
+def insert_ignore_conflicts(session, model, rows, conflict_columns, returning):
+    """
+    Вставляет строки пачкой, пропуская конфликтующие по уникальному ключу
+
+    PostgreSQL и SQLite: один INSERT ... ON CONFLICT DO NOTHING RETURNING
+    на чанк. Остальные диалекты: построчно в SAVEPOINT, чтобы одна
+    конфликтующая строка не откатывала всю пачку.
+
+    Args:
+        session: SQLAlchemy session (коммит остается на вызывающем)
+        model: ORM-модель
+        rows: List[dict] - значения колонок
+        conflict_columns: List[str] - колонки уникального ключа
+        returning: List[Column] - колонки, возвращаемые для вставленных строк
+
+    Returns:
+        List[Row]: Значения returning только для реально вставленных строк
+    """
+    if not rows:
+        return []
+
+    insert_factory = _UPSERT_DIALECTS.get(session.get_bind().dialect.name)
+    if insert_factory is None:
+        return _insert_one_by_one(session, model, rows, returning)
+
+    inserted = []
+    for i in range(0, len(rows), INSERT_CHUNK_SIZE):
+        stmt = (
+            insert_factory(model)
+            .values(rows[i:i + INSERT_CHUNK_SIZE])
+            .on_conflict_do_nothing(index_elements=conflict_columns)
+            .returning(*returning)
+        )
+        inserted.extend(session.execute(stmt).all())
+
+    return inserted
+
+
+def _insert_one_by_one(session, model, rows, returning):
+    """Запасной путь для диалектов без ON CONFLICT"""
+    inserted = []
+    for row in rows:
+        try:
+            with session.begin_nested():
+                result = session.execute(model.__table__.insert().values(**row).returning(*returning))
+                inserted.append(result.one())
+        except IntegrityError:
+            logger.debug(f"Skipping conflicting {model.__tablename__} row")
+
+    return inserted
@@ -1,4 +1,6 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker, scoped_session
 from sqlalchemy.pool import QueuePool
 from config.settings import settings
@@ -10,6 +12,18 @@ logger = get_logger(__name__)
 engine = None
 SessionLocal = None
 
+# Async engine для кода, работающего в event loop (джоб, бот)
+async_engine = None
+AsyncSessionLocal = None
+
+# Async-драйверы для синхронных схем DATABASE_URL
+ASYNC_DRIVERS = {
+    'postgresql': 'postgresql+asyncpg',
+    'postgres': 'postgresql+asyncpg',
+    'postgresql+psycopg2': 'postgresql+asyncpg',
+    'sqlite': 'sqlite+aiosqlite',
+}
+
 
 def init_database():
     """Инициализация подключения к базе данных"""
@@ -88,3 +102,92 @@ def close_database():
         logger.info("Closing database connections...")
         engine.dispose()
         logger.info("Database connections closed")
+
+
+def get_async_url(database_url):
+    """
+    URL для async engine: синхронный драйвер заменяется на async
+    (asyncpg для PostgreSQL, aiosqlite для SQLite)
+
+    Returns:
+        Tuple[URL, dict]: URL и connect_args для create_async_engine
+    """
+    url = make_url(database_url)
+    connect_args = {}
+
+    drivername = ASYNC_DRIVERS.get(url.drivername)
+    if drivername is None:
+        raise ValueError(f"No async driver configured for database scheme: {url.drivername}")
+    url = url.set(drivername=drivername)
+
+    # asyncpg не понимает sslmode из строки подключения psycopg2 (Render добавляет его)
+    sslmode = url.query.get('sslmode')
+    if drivername == 'postgresql+asyncpg' and sslmode is not None:
+        url = url.difference_update_query(['sslmode'])
+        if sslmode != 'disable':
+            connect_args['ssl'] = 'require' if sslmode in ('allow', 'prefer') else sslmode
+
+    return url, connect_args
+
+
+def init_async_database():
+    """Инициализация async-подключения к базе данных"""
+    global async_engine, AsyncSessionLocal
+
+    if not settings.DATABASE_URL:
+        raise ValueError("DATABASE_URL environment variable is not set")
+
+    logger.info("Initializing async database connection...")
+
+    url, connect_args = get_async_url(settings.DATABASE_URL)
+
+    # aiosqlite работает без пула соединений (NullPool), размеры пула — только для PostgreSQL
+    pool_options = {}
+    if url.get_backend_name() != 'sqlite':
+        pool_options = {'pool_size': 5, 'max_overflow': 10, 'pool_timeout': 30}
+
+    async_engine = create_async_engine(
+        url,
+        connect_args=connect_args,
+        pool_recycle=3600,
+        pool_pre_ping=True,
+        echo=False,
+        **pool_options
+    )
+
+    # expire_on_commit=False: после commit атрибуты читаются без ленивой
+    # загрузки, которая в async-сессии невозможна
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine,
+        autoflush=False,
+        expire_on_commit=False
+    )
+
+    logger.info("Async database connection initialized successfully")
+
+    return async_engine
+
+
+def get_async_session():
+    """Получить новую async-сессию БД"""
+    if AsyncSessionLocal is None:
+        init_async_database()
+
+    return AsyncSessionLocal()
+
+
+async def close_async_session(session):
+    """Закрыть async-сессию БД"""
+    if session:
+        await session.close()
+
+
+async def close_async_database():
+    """Закрытие всех async-подключений к БД"""
+    global async_engine, AsyncSessionLocal
+    if async_engine:
+        logger.info("Closing async database connections...")
+        await async_engine.dispose()
+        async_engine = None
+        AsyncSessionLocal = None
+        logger.info("Async database connections closed")
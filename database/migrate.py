@@ -0,0 +1,46 @@
+import os
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+from database.models import Base
+from config.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# database/migrations рядом с этим модулем
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+
+
+def get_alembic_config():
+    """
+    Конфигурация Alembic без alembic.ini: env.py берет DATABASE_URL из настроек,
+    а логирование приложения не перенастраивается (fileConfig не вызывается)
+    """
+    config = Config()
+    config.set_main_option('script_location', MIGRATIONS_DIR)
+    return config
+
+
+def upgrade_database(engine):
+    """
+    Приводит схему БД к последней ревизии Alembic
+
+    Пустая база создается по моделям (create_all) и помечается как head.
+    Существующая база обновляется миграциями (create_all не меняет уже
+    созданные таблицы), затем create_all досоздает недостающие таблицы.
+
+    Args:
+        engine: SQLAlchemy engine
+    """
+    config = get_alembic_config()
+
+    if not inspect(engine).has_table('vacancies'):
+        logger.info("Empty database: creating tables from models")
+        Base.metadata.create_all(bind=engine)
+        command.stamp(config, 'head')
+        return
+
+    logger.info("Applying database migrations (alembic upgrade head)...")
+    command.upgrade(config, 'head')
+    Base.metadata.create_all(bind=engine)
+    logger.info("Database schema is up to date")
@@ -0,0 +1,35 @@
+"""job_runs: GPT token usage per run
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 12:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = ('gpt_requests', 'gpt_prompt_tokens', 'gpt_cached_tokens', 'gpt_completion_tokens')
+
+
+def upgrade() -> None:
+    # Таблицы создаются через Base.metadata.create_all, поэтому на свежей
+    # базе колонки уже могут существовать
+    existing = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('job_runs')}
+
+    for name in COLUMNS:
+        if name not in existing:
+            op.add_column('job_runs', sa.Column(name, sa.Integer(), nullable=True, server_default='0'))
+
+
+def downgrade() -> None:
+    for name in reversed(COLUMNS):
+        op.drop_column('job_runs', name)
@@ -0,0 +1,49 @@
+"""vacancies: MinHash signature and LSH buckets for repost detection
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 13:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+
+    # Таблицы создаются через Base.metadata.create_all, поэтому на свежей
+    # базе колонка и таблица уже могут существовать
+    columns = {column['name'] for column in inspector.get_columns('vacancies')}
+    if 'minhash' not in columns:
+        op.add_column('vacancies', sa.Column('minhash', sa.LargeBinary(), nullable=True))
+
+    if not inspector.has_table('vacancy_lsh_buckets'):
+        op.create_table(
+            'vacancy_lsh_buckets',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('vacancy_id', sa.Integer(),
+                      sa.ForeignKey('vacancies.id', ondelete='CASCADE'), nullable=False),
+            sa.Column('band', sa.SmallInteger(), nullable=False),
+            sa.Column('bucket', sa.BigInteger(), nullable=False),
+        )
+        op.create_index('ix_vacancy_lsh_buckets_vacancy_id', 'vacancy_lsh_buckets', ['vacancy_id'])
+        op.create_index('idx_lsh_bucket_band', 'vacancy_lsh_buckets', ['bucket', 'band'])
+
+    # После миграции корзины заполняются командой: python main.py --rebuild-repost-index --recompute-signatures
+
+
+def downgrade() -> None:
+    op.drop_index('idx_lsh_bucket_band', table_name='vacancy_lsh_buckets')
+    op.drop_index('ix_vacancy_lsh_buckets_vacancy_id', table_name='vacancy_lsh_buckets')
+    op.drop_table('vacancy_lsh_buckets')
+    op.drop_column('vacancies', 'minhash')
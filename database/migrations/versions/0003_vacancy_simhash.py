@@ -0,0 +1,48 @@
+"""vacancies: SimHash fingerprint and band columns
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 14:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BAND_COLUMNS = ('simhash_b0', 'simhash_b1', 'simhash_b2', 'simhash_b3')
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+
+    # Таблицы создаются через Base.metadata.create_all, поэтому на свежей
+    # базе колонки и индексы уже могут существовать
+    columns = {column['name'] for column in inspector.get_columns('vacancies')}
+    indexes = {index['name'] for index in inspector.get_indexes('vacancies')}
+
+    if 'simhash' not in columns:
+        op.add_column('vacancies', sa.Column('simhash', sa.BigInteger(), nullable=True))
+
+    for name in BAND_COLUMNS:
+        if name not in columns:
+            op.add_column('vacancies', sa.Column(name, sa.Integer(), nullable=True))
+        index_name = f'idx_vacancy_{name}'
+        if index_name not in indexes:
+            op.create_index(index_name, 'vacancies', [name, 'found_at'])
+
+    # Существующие вакансии заполняются командой: python main.py --backfill-simhash
+
+
+def downgrade() -> None:
+    for name in reversed(BAND_COLUMNS):
+        op.drop_index(f'idx_vacancy_{name}', table_name='vacancies')
+        op.drop_column('vacancies', name)
+    op.drop_column('vacancies', 'simhash')
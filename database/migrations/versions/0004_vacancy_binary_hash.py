@@ -0,0 +1,118 @@
+"""vacancies: 16-byte BLAKE2b fingerprint instead of hex SHA-256 hash
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 15:00:00
+
+"""
+import hashlib
+import re
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CHUNK_SIZE = 1000
+
+# Копия логики utils.hash_generator / utils.text_utils на момент миграции:
+# миграция не должна меняться вместе с живым кодом
+FINGERPRINT_SIZE = 16
+
+
+def _normalize_text(text):
+    if not text:
+        return ''
+    text = text.lower().strip()
+    text = re.sub(r'[^\w\s\+\-\/#@]', '', text)
+    return re.sub(r'\s+', ' ', text)
+
+
+def _fingerprint(title, company, url):
+    hash_string = f"{_normalize_text(title)}|{_normalize_text(company)}|{url.strip() if url else ''}"
+    return hashlib.blake2b(hash_string.encode('utf-8'), digest_size=FINGERPRINT_SIZE).digest()
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    columns = {column['name']: column for column in inspector.get_columns('vacancies')}
+    indexes = {index['name'] for index in inspector.get_indexes('vacancies')}
+
+    # Свежая база (Base.metadata.create_all) или прерванный запуск после замены колонки
+    if 'hash_bin' not in columns and isinstance(columns['hash']['type'], sa.LargeBinary):
+        if 'ix_vacancies_hash' not in indexes:
+            op.create_index('ix_vacancies_hash', 'vacancies', ['hash'], unique=True)
+        return
+
+    # hash_bin может остаться от прерванного запуска — тогда просто пересчитываем
+    if 'hash_bin' not in columns:
+        op.add_column('vacancies', sa.Column('hash_bin', sa.LargeBinary(FINGERPRINT_SIZE), nullable=True))
+
+    # Старый SHA-256 в новый отпечаток не переводится — пересчитываем по полям вакансии
+    vacancies = sa.table(
+        'vacancies',
+        sa.column('id', sa.Integer),
+        sa.column('title', sa.Text),
+        sa.column('company', sa.String),
+        sa.column('url', sa.Text),
+        sa.column('hash_bin', sa.LargeBinary),
+    )
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(vacancies.c.id, vacancies.c.title, vacancies.c.company, vacancies.c.url)
+            .where(vacancies.c.id > last_id)
+            .order_by(vacancies.c.id)
+            .limit(CHUNK_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+
+        bind.execute(
+            vacancies.update().where(vacancies.c.id == sa.bindparam('row_id')),
+            [
+                {'row_id': row.id, 'hash_bin': _fingerprint(row.title, row.company, row.url)}
+                for row in rows
+            ]
+        )
+        last_id = rows[-1].id
+
+    # batch_alter_table пересоздает таблицу на SQLite, где нельзя менять колонки.
+    # Индекс по переименованной колонке создается отдельным блоком: в том же
+    # блоке batch ищет колонку 'hash' в старой схеме таблицы и падает
+    with op.batch_alter_table('vacancies') as batch_op:
+        if 'ix_vacancies_hash' in indexes:
+            batch_op.drop_index('ix_vacancies_hash')
+        batch_op.drop_column('hash')
+        batch_op.alter_column('hash_bin', new_column_name='hash', nullable=False)
+
+    with op.batch_alter_table('vacancies') as batch_op:
+        batch_op.create_index('ix_vacancies_hash', ['hash'], unique=True)
+
+
+def downgrade() -> None:
+    # Исходные SHA-256 восстановить нельзя: возвращаем hex нового отпечатка
+    with op.batch_alter_table('vacancies') as batch_op:
+        batch_op.drop_index('ix_vacancies_hash')
+        batch_op.add_column(sa.Column('hash_hex', sa.String(64), nullable=True))
+
+    bind = op.get_bind()
+    for row_id, value in bind.execute(sa.text('SELECT id, hash FROM vacancies')).fetchall():
+        bind.execute(
+            sa.text('UPDATE vacancies SET hash_hex = :value WHERE id = :row_id'),
+            {'value': bytes(value).hex(), 'row_id': row_id}
+        )
+
+    with op.batch_alter_table('vacancies') as batch_op:
+        batch_op.drop_column('hash')
+        batch_op.alter_column('hash_hex', new_column_name='hash', nullable=False)
+
+    with op.batch_alter_table('vacancies') as batch_op:
+        batch_op.create_index('ix_vacancies_hash', ['hash'], unique=True)
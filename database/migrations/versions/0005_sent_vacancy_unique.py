@@ -0,0 +1,45 @@
+"""sent_vacancies: unique (vacancy_id, sent_to)
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 16:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CONSTRAINT_NAME = 'uq_sent_vacancy_recipient'
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+
+    # На свежей базе (Base.metadata.create_all) ограничение уже есть
+    constraints = {c['name'] for c in inspector.get_unique_constraints('sent_vacancies')}
+    if CONSTRAINT_NAME in constraints:
+        return
+
+    # Старые повторные записи об отправке: оставляем самую раннюю
+    op.execute(
+        'DELETE FROM sent_vacancies WHERE id NOT IN ('
+        'SELECT keep_id FROM (SELECT MIN(id) AS keep_id FROM sent_vacancies '
+        'GROUP BY vacancy_id, sent_to) AS first_sent)'
+    )
+
+    # batch_alter_table пересоздает таблицу на SQLite, где нельзя добавить ограничение
+    with op.batch_alter_table('sent_vacancies') as batch_op:
+        batch_op.create_unique_constraint(CONSTRAINT_NAME, ['vacancy_id', 'sent_to'])
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('sent_vacancies') as batch_op:
+        batch_op.drop_constraint(CONSTRAINT_NAME, type_='unique')
@@ -0,0 +1,78 @@
+"""vacancies: indexed url_hash key instead of a B-tree over url text
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 17:00:00
+
+"""
+import hashlib
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CHUNK_SIZE = 1000
+
+
+# Копия utils.hash_generator.generate_url_key на момент миграции:
+# миграция не должна меняться вместе с живым кодом
+def _url_key(url):
+    normalized_url = url.strip() if url else ''
+    if not normalized_url:
+        return None
+
+    digest = hashlib.blake2b(normalized_url.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+
+    # На свежей базе (Base.metadata.create_all) колонка и индекс уже есть
+    columns = {column['name'] for column in inspector.get_columns('vacancies')}
+    indexes = {index['name'] for index in inspector.get_indexes('vacancies')}
+
+    if 'url_hash' not in columns:
+        op.add_column('vacancies', sa.Column('url_hash', sa.BigInteger(), nullable=True))
+
+    vacancies = sa.table(
+        'vacancies',
+        sa.column('id', sa.Integer),
+        sa.column('url', sa.Text),
+        sa.column('url_hash', sa.BigInteger),
+    )
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(vacancies.c.id, vacancies.c.url)
+            .where(vacancies.c.id > last_id, vacancies.c.url.isnot(None), vacancies.c.url_hash.is_(None))
+            .order_by(vacancies.c.id)
+            .limit(CHUNK_SIZE)
+        ).fetchall()
+        if not rows:
+            break
+
+        bind.execute(
+            vacancies.update().where(vacancies.c.id == sa.bindparam('row_id')),
+            [{'row_id': row.id, 'url_hash': _url_key(row.url)} for row in rows]
+        )
+        last_id = rows[-1].id
+
+    if 'idx_vacancy_url_hash' not in indexes:
+        op.create_index('idx_vacancy_url_hash', 'vacancies', ['url_hash', 'found_at'])
+    if 'idx_vacancy_url' in indexes:
+        op.drop_index('idx_vacancy_url', table_name='vacancies')
+
+
+def downgrade() -> None:
+    op.create_index('idx_vacancy_url', 'vacancies', ['url'])
+    op.drop_index('idx_vacancy_url_hash', table_name='vacancies')
+    op.drop_column('vacancies', 'url_hash')
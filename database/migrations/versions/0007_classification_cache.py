@@ -0,0 +1,43 @@
+"""classification_cache: GPT verdicts keyed by normalized post text
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 18:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # На свежей базе (Base.metadata.create_all) таблица уже есть
+    if sa.inspect(op.get_bind()).has_table('classification_cache'):
+        return
+
+    op.create_table(
+        'classification_cache',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('cache_key', sa.String(64), nullable=False),
+        sa.Column('model', sa.String(100), nullable=False),
+        sa.Column('prompt_version', sa.String(16), nullable=False),
+        sa.Column('is_relevant', sa.Boolean(), nullable=False),
+        sa.Column('position_type', sa.String(50)),
+        sa.Column('title', sa.Text()),
+        sa.Column('company', sa.String(255)),
+        sa.Column('created_at', sa.DateTime()),
+    )
+    op.create_index('ix_classification_cache_cache_key', 'classification_cache', ['cache_key'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_classification_cache_cache_key', table_name='classification_cache')
+    op.drop_table('classification_cache')
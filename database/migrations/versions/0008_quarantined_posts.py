@@ -0,0 +1,40 @@
+"""quarantined_posts: posts that repeatedly break GPT requests
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 18:10:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # На свежей базе (Base.metadata.create_all) таблица уже есть
+    if sa.inspect(op.get_bind()).has_table('quarantined_posts'):
+        return
+
+    op.create_table(
+        'quarantined_posts',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('channel_id', sa.Integer(), sa.ForeignKey('channels.id')),
+        sa.Column('message_id', sa.BigInteger()),
+        sa.Column('url', sa.Text()),
+        sa.Column('full_text', sa.Text()),
+        sa.Column('model', sa.String(100)),
+        sa.Column('error_message', sa.Text()),
+        sa.Column('created_at', sa.DateTime()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('quarantined_posts')
@@ -0,0 +1,39 @@
+"""classification_samples: GPT verdicts as local classifier training data
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19 18:20:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # На свежей базе (Base.metadata.create_all) таблица уже есть
+    if sa.inspect(op.get_bind()).has_table('classification_samples'):
+        return
+
+    op.create_table(
+        'classification_samples',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('text', sa.Text(), nullable=False),
+        sa.Column('is_relevant', sa.Boolean(), nullable=False),
+        sa.Column('position_type', sa.String(50)),
+        sa.Column('model', sa.String(100)),
+        sa.Column('prompt_version', sa.String(16)),
+        sa.Column('created_at', sa.DateTime()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('classification_samples')
@@ -1,7 +1,7 @@
 from datetime import datetime
 from sqlalchemy import (
-    Column, Integer, String, Text, Boolean,
-    BigInteger, DateTime, ForeignKey, Index
+    Column, Integer, SmallInteger, String, Text, Boolean,
+    BigInteger, DateTime, ForeignKey, Index, LargeBinary, UniqueConstraint
 )
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
@@ -38,20 +38,37 @@ class Vacancy(Base):
     title = Column(Text, nullable=False)
     company = Column(String(255))
     url = Column(Text)
+    # Ключ URL для индексного поиска (см. generate_url_key), сам url не индексируется
+    url_hash = Column(BigInteger)
     position_type = Column(String(50))  # 'сценарист', 'редактор', 'шеф-редактор'
     full_text = Column(Text)
-    hash = Column(String(64), unique=True, nullable=False, index=True)
+    # BLAKE2b-отпечаток нормализованных title|company|url (16 байт)
+    hash = Column(LargeBinary(16), unique=True, nullable=False, index=True)
     found_at = Column(DateTime, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # MinHash-сигнатура шинглов нормализованного full_text (64 x uint32)
+    minhash = Column(LargeBinary)
+    # 64-битный SimHash нормализованного full_text (со знаком, как BIGINT)
+    # и его 16-битные полосы для поиска «в пределах 3 бит» по индексам
+    simhash = Column(BigInteger)
+    simhash_b0 = Column(Integer)
+    simhash_b1 = Column(Integer)
+    simhash_b2 = Column(Integer)
+    simhash_b3 = Column(Integer)
 
     # Relationships
     channel = relationship('Channel', back_populates='vacancies')
     sent_records = relationship('SentVacancy', back_populates='vacancy')
+    lsh_buckets = relationship('VacancyLSHBucket', back_populates='vacancy', cascade='all, delete-orphan')
 
     # Indexes
     __table_args__ = (
         Index('idx_vacancy_found_at', 'found_at'),
-        Index('idx_vacancy_url', 'url'),
+        Index('idx_vacancy_url_hash', 'url_hash', 'found_at'),
+        Index('idx_vacancy_simhash_b0', 'simhash_b0', 'found_at'),
+        Index('idx_vacancy_simhash_b1', 'simhash_b1', 'found_at'),
+        Index('idx_vacancy_simhash_b2', 'simhash_b2', 'found_at'),
+        Index('idx_vacancy_simhash_b3', 'simhash_b3', 'found_at'),
     )
 
     def __repr__(self):
@@ -70,10 +87,36 @@ class SentVacancy(Base):
     # Relationships
     vacancy = relationship('Vacancy', back_populates='sent_records')
 
+    # Одна запись об отправке на пару (вакансия, получатель)
+    __table_args__ = (
+        UniqueConstraint('vacancy_id', 'sent_to', name='uq_sent_vacancy_recipient'),
+    )
+
     def __repr__(self):
         return f"<SentVacancy(id={self.id}, vacancy_id={self.vacancy_id}, sent_to='{self.sent_to}')>"
 
 
+class VacancyLSHBucket(Base):
+    """LSH-корзины MinHash-сигнатур вакансий (поиск репостов с переписанным заголовком)"""
+    __tablename__ = 'vacancy_lsh_buckets'
+
+    id = Column(Integer, primary_key=True)
+    vacancy_id = Column(Integer, ForeignKey('vacancies.id', ondelete='CASCADE'), nullable=False, index=True)
+    band = Column(SmallInteger, nullable=False)
+    bucket = Column(BigInteger, nullable=False)  # crc32 полосы сигнатуры
+
+    # Relationships
+    vacancy = relationship('Vacancy', back_populates='lsh_buckets')
+
+    # Indexes
+    __table_args__ = (
+        Index('idx_lsh_bucket_band', 'bucket', 'band'),
+    )
+
+    def __repr__(self):
+        return f"<VacancyLSHBucket(vacancy_id={self.vacancy_id}, band={self.band}, bucket={self.bucket})>"
+
+
 class JobRun(Base):
     """История запусков джобов сбора вакансий"""
     __tablename__ = 'job_runs'
@@ -85,6 +128,11 @@ class JobRun(Base):
     vacancies_found = Column(Integer, default=0)
     vacancies_sent = Column(Integer, default=0)
     error_message = Column(Text)
+    # Расход токенов GPT за запуск (cached — входные токены из кеша префикса провайдера)
+    gpt_requests = Column(Integer, default=0)
+    gpt_prompt_tokens = Column(Integer, default=0)
+    gpt_cached_tokens = Column(Integer, default=0)
+    gpt_completion_tokens = Column(Integer, default=0)
 
     def __repr__(self):
         return f"<JobRun(id={self.id}, status='{self.status}', found={self.vacancies_found}, sent={self.vacancies_sent})>"
@@ -102,3 +150,55 @@ class UserChatID(Base):
 
     def __repr__(self):
         return f"<UserChatID(username='{self.username}', chat_id={self.chat_id})>"
+
+
+class ClassificationCache(Base):
+    """Кеш результатов GPT-классификации постов (по хешу нормализованного текста)"""
+    __tablename__ = 'classification_cache'
+
+    id = Column(Integer, primary_key=True)
+    # SHA-256 от нормализованного текста + модели + версии SYSTEM_PROMPT
+    cache_key = Column(String(64), unique=True, nullable=False, index=True)
+    model = Column(String(100), nullable=False)
+    prompt_version = Column(String(16), nullable=False)
+    is_relevant = Column(Boolean, nullable=False)
+    position_type = Column(String(50))
+    title = Column(Text)
+    company = Column(String(255))
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<ClassificationCache(key='{self.cache_key[:16]}...', relevant={self.is_relevant})>"
+
+
+class QuarantinedPost(Base):
+    """Посты, которые стабильно ломают запрос к GPT (для ручного разбора)"""
+    __tablename__ = 'quarantined_posts'
+
+    id = Column(Integer, primary_key=True)
+    channel_id = Column(Integer, ForeignKey('channels.id'))
+    message_id = Column(BigInteger)
+    url = Column(Text)
+    full_text = Column(Text)
+    model = Column(String(100))
+    error_message = Column(Text)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<QuarantinedPost(id={self.id}, channel_id={self.channel_id}, message_id={self.message_id})>"
+
+
+class ClassificationSample(Base):
+    """Вердикты GPT вместе с входным текстом (обучающие данные локального классификатора)"""
+    __tablename__ = 'classification_samples'
+
+    id = Column(Integer, primary_key=True)
+    text = Column(Text, nullable=False)
+    is_relevant = Column(Boolean, nullable=False)
+    position_type = Column(String(50))
+    model = Column(String(100))
+    prompt_version = Column(String(16))
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<ClassificationSample(id={self.id}, relevant={self.is_relevant}, type='{self.position_type}')>"
@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Локальный фейковый OpenAI-совместимый сервер для проверки GPT-фильтра
+без реального API и без затрат.
+
+Поддерживает:
+- POST /v1/chat/completions   — классификация постов по ключевым словам
+- POST /v1/files              — загрузка JSONL для Batch API
+- POST /v1/batches            — создание batch-задания
+- GET  /v1/batches/{id}       — статус задания
+- POST /v1/batches/{id}/cancel
+- GET  /v1/files/{id}/content — результаты задания
+
+Использование:
+    python fake_openai_server.py --port 8765 [--token-latency 0.01]
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=fake python main.py --test
+
+    # Хвостовые задержки: 10% запросов зависают на 30 секунд, запасной сервер быстрый
+    python fake_openai_server.py --port 8765 --slow-rate 0.1 --slow-delay 30
+    python fake_openai_server.py --port 8766
+    GPT_FALLBACK_BASE_URL=http://127.0.0.1:8766/v1 GPT_REQUEST_TIMEOUT=20 \
+        OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=fake python main.py --test
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+POST_RE = re.compile(r'--- ПОСТ (\d+) ---\n(.*?)(?=\n--- ПОСТ \d+ ---|\Z)', re.DOTALL)
+
+ROLE_PATTERNS = [
+    ('шеф-редактор', re.compile(r'шеф-редактор|главный редактор', re.IGNORECASE)),
+    ('сценарист', re.compile(r'сценари', re.IGNORECASE)),
+    ('редактор', re.compile(r'монтаж|видеоредактор|video editor', re.IGNORECASE)),
+]
+
+FILES = {}
+BATCHES = {}
+SEEN_PREFIXES = set()
+LOCK = threading.Lock()
+
+
+def classify_posts(user_content, drop_every=0):
+    """
+    Классифицирует посты из текста запроса по ключевым словам
+
+    drop_every > 0 пропускает в ответе каждый N-й пост (неполный ответ)
+    """
+    vacancies = []
+    for match in POST_RE.finditer(user_content):
+        index, text = int(match.group(1)), match.group(2).strip()
+        if drop_every and index % drop_every == drop_every - 1:
+            continue
+        position_type = next(
+            (name for name, pattern in ROLE_PATTERNS if pattern.search(text)), None
+        )
+        first_line = text.split('\n', 1)[0][:80] or 'Без названия'
+        vacancies.append({
+            'index': index,
+            'is_relevant': position_type is not None,
+            'position_type': position_type,
+            'title': first_line if position_type else 'Не подходит',
+            'company': None,
+        })
+    return {'vacancies': vacancies}
+
+
+def compact_result(result):
+    """Переводит полный ответ в компактный формат (только подходящие посты)"""
+    codes = {'сценарист': 'S', 'редактор': 'E', 'шеф-редактор': 'C'}
+    return {'relevant': [
+        {'i': item['index'], 'p': codes[item['position_type']], 't': item['title'], 'c': item['company']}
+        for item in result['vacancies'] if item['is_relevant']
+    ]}
+
+
+def chat_completion(body, drop_every=0):
+    """Ответ в формате chat.completion"""
+    user_content = next(
+        (m['content'] for m in body.get('messages', []) if m['role'] == 'user'), ''
+    )
+    result = classify_posts(user_content, drop_every)
+    system_content = next(
+        (m['content'] for m in body.get('messages', []) if m['role'] == 'system'), ''
+    )
+    if '"relevant"' in system_content:
+        result = compact_result(result)
+    content = json.dumps(result, ensure_ascii=False)
+    prompt_tokens = sum(len(m['content']) for m in body.get('messages', [])) // 3
+
+    # Имитация кеша префикса: повторный системный промпт длиннее 1024 токенов
+    # считается закешированным блоками по 128 токенов
+    system_prompt = next(
+        (m['content'] for m in body.get('messages', []) if m['role'] == 'system'), ''
+    )
+    prefix_tokens = len(system_prompt) // 3
+    with LOCK:
+        cache_hit = system_prompt in SEEN_PREFIXES
+        SEEN_PREFIXES.add(system_prompt)
+    cached_tokens = prefix_tokens // 128 * 128 if cache_hit and prefix_tokens >= 1024 else 0
+
+    return {
+        'id': f"chatcmpl-{uuid.uuid4().hex[:12]}",
+        'object': 'chat.completion',
+        'created': int(time.time()),
+        'model': body.get('model', 'fake'),
+        'choices': [{
+            'index': 0,
+            'message': {'role': 'assistant', 'content': content},
+            'finish_reason': 'stop',
+        }],
+        'usage': {
+            'prompt_tokens': prompt_tokens,
+            'completion_tokens': len(content) // 3,
+            'total_tokens': prompt_tokens + len(content) // 3,
+            'prompt_tokens_details': {'cached_tokens': cached_tokens},
+        },
+    }
+
+
+def batch_object(batch):
+    return {
+        'id': batch['id'],
+        'object': 'batch',
+        'endpoint': batch['endpoint'],
+        'errors': None,
+        'input_file_id': batch['input_file_id'],
+        'completion_window': '24h',
+        'status': batch['status'],
+        'output_file_id': batch.get('output_file_id'),
+        'error_file_id': None,
+        'created_at': batch['created_at'],
+        'request_counts': batch.get('request_counts'),
+    }
+
+
+def file_object(file_id, filename, size, purpose):
+    return {
+        'id': file_id,
+        'object': 'file',
+        'bytes': size,
+        'created_at': int(time.time()),
+        'filename': filename,
+        'purpose': purpose,
+        'status': 'processed',
+    }
+
+
+def run_batch(batch_id, delay, drop_every=0):
+    """Выполняет batch-задание в фоне после задержки"""
+    time.sleep(delay)
+
+    with LOCK:
+        batch = BATCHES[batch_id]
+        if batch['status'] == 'cancelled':
+            return
+        input_content = FILES[batch['input_file_id']]['content'].decode('utf-8')
+
+    lines = []
+    for line in input_content.splitlines():
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        lines.append(json.dumps({
+            'id': f"batch_req_{uuid.uuid4().hex[:12]}",
+            'custom_id': request['custom_id'],
+            'response': {'status_code': 200, 'body': chat_completion(request['body'], drop_every)},
+            'error': None,
+        }, ensure_ascii=False))
+
+    output = ('\n'.join(lines) + '\n').encode('utf-8')
+    output_id = f"file-{uuid.uuid4().hex[:12]}"
+
+    with LOCK:
+        FILES[output_id] = {'content': output, 'filename': 'output.jsonl', 'purpose': 'batch_output'}
+        batch['output_file_id'] = output_id
+        batch['status'] = 'completed'
+        batch['request_counts'] = {'total': len(lines), 'completed': len(lines), 'failed': 0}
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    """Обработчик запросов фейкового API"""
+
+    batch_delay = 2.0
+    # Имитация генерации: секунд на каждый выходной токен
+    token_latency = 0.0
+    # Внедряемые задержки и ошибки для проверки таймаутов, хеджирования и failover
+    delay = 0.0
+    slow_rate = 0.0
+    slow_delay = 30.0
+    error_rate = 0.0
+    drop_every = 0
+
+    def _send_json(self, payload, status=200):
+        data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_body(self):
+        length = int(self.headers.get('Content-Length', 0))
+        return self.rfile.read(length)
+
+    def do_POST(self):
+        body = self._read_body()
+
+        if self.path == '/v1/chat/completions':
+            if random.random() < self.error_rate:
+                self._send_json({'error': {'message': 'injected server error', 'type': 'server_error'}}, status=500)
+                return
+
+            response = chat_completion(json.loads(body), self.drop_every)
+            delay = self.delay + self.token_latency * response['usage']['completion_tokens']
+            if random.random() < self.slow_rate:
+                delay += self.slow_delay
+            time.sleep(delay)
+            self._send_json(response)
+
+        elif self.path == '/v1/files':
+            # multipart/form-data: поля purpose и file
+            message = BytesParser(policy=HTTP).parsebytes(
+                f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + body
+            )
+            fields = {}
+            for part in message.iter_parts():
+                name = part.get_param('name', header='content-disposition')
+                fields[name] = (part.get_filename(), part.get_payload(decode=True))
+
+            filename, content = fields['file']
+            purpose = fields.get('purpose', (None, b'batch'))[1].decode()
+            file_id = f"file-{uuid.uuid4().hex[:12]}"
+            with LOCK:
+                FILES[file_id] = {'content': content, 'filename': filename, 'purpose': purpose}
+            self._send_json(file_object(file_id, filename, len(content), purpose))
+
+        elif self.path == '/v1/batches':
+            request = json.loads(body)
+            batch_id = f"batch_{uuid.uuid4().hex[:12]}"
+            batch = {
+                'id': batch_id,
+                'endpoint': request['endpoint'],
+                'input_file_id': request['input_file_id'],
+                'status': 'in_progress',
+                'created_at': int(time.time()),
+            }
+            with LOCK:
+                BATCHES[batch_id] = batch
+            threading.Thread(
+                target=run_batch, args=(batch_id, self.batch_delay, self.drop_every), daemon=True
+            ).start()
+            self._send_json(batch_object(batch))
+
+        elif self.path.startswith('/v1/batches/') and self.path.endswith('/cancel'):
+            batch_id = self.path.split('/')[3]
+            with LOCK:
+                batch = BATCHES.get(batch_id)
+                if batch and batch['status'] != 'completed':
+                    batch['status'] = 'cancelled'
+            if batch:
+                self._send_json(batch_object(batch))
+            else:
+                self._send_json({'error': {'message': 'batch not found'}}, status=404)
+
+        else:
+            self._send_json({'error': {'message': f'unknown path {self.path}'}}, status=404)
+
+    def do_GET(self):
+        if self.path.startswith('/v1/batches/'):
+            batch = BATCHES.get(self.path.split('/')[3])
+            if batch:
+                self._send_json(batch_object(batch))
+            else:
+                self._send_json({'error': {'message': 'batch not found'}}, status=404)
+
+        elif self.path.startswith('/v1/files/') and self.path.endswith('/content'):
+            stored = FILES.get(self.path.split('/')[3])
+            if not stored:
+                self._send_json({'error': {'message': 'file not found'}}, status=404)
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/octet-stream')
+            self.send_header('Content-Length', str(len(stored['content'])))
+            self.end_headers()
+            self.wfile.write(stored['content'])
+
+        else:
+            self._send_json({'error': {'message': f'unknown path {self.path}'}}, status=404)
+
+    def log_message(self, format, *args):
+        print(f"[fake-openai] {self.address_string()} {format % args}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fake OpenAI-compatible server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--batch-delay', type=float, default=2.0,
+                        help='Seconds before a batch job completes')
+    parser.add_argument('--token-latency', type=float, default=0.0,
+                        help='Seconds per completion token (simulated generation time)')
+    parser.add_argument('--delay', type=float, default=0.0,
+                        help='Fixed extra seconds for every chat completion')
+    parser.add_argument('--slow-rate', type=float, default=0.0,
+                        help='Share of chat completions that stall (0-1)')
+    parser.add_argument('--slow-delay', type=float, default=30.0,
+                        help='Extra seconds for a stalled chat completion')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='Share of chat completions answered with HTTP 500 (0-1)')
+    parser.add_argument('--drop-every', type=int, default=0,
+                        help='Omit every N-th post from verdicts (partial responses)')
+    args = parser.parse_args()
+
+    FakeOpenAIHandler.batch_delay = args.batch_delay
+    FakeOpenAIHandler.token_latency = args.token_latency
+    FakeOpenAIHandler.delay = args.delay
+    FakeOpenAIHandler.slow_rate = args.slow_rate
+    FakeOpenAIHandler.slow_delay = args.slow_delay
+    FakeOpenAIHandler.error_rate = args.error_rate
+    FakeOpenAIHandler.drop_every = args.drop_every
+    server = ThreadingHTTPServer((args.host, args.port), FakeOpenAIHandler)
+    print(f"Fake OpenAI server on http://{args.host}:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -12,8 +12,8 @@ from telegram.ext import Application, CommandHandler, ContextTypes
 
 from config.settings import settings
 from config.logging_config import setup_logging, get_logger
-from database.connection import init_database, close_database
-from database.models import Base
+from database.connection import init_database, close_database, init_async_database, close_async_database
+from database.migrate import upgrade_database
 from scheduler.job_scheduler import job_scheduler, run_vacancy_collection
 from notifiers.telegram_bot import telegram_notifier
 from utils.csv_loader import load_channels_from_csv
@@ -105,8 +105,11 @@ async def main(test_mode=False):
         logger.info("Step 2: Initializing database...")
         engine = init_database()
 
-        # Создание таблиц (если не существуют)
-        Base.metadata.create_all(bind=engine)
+        # Миграции Alembic (на пустой базе — создание таблиц по моделям)
+        upgrade_database(engine)
+
+        # Async engine для джоба и обработчиков команд бота
+        init_async_database()
         logger.info("Database initialized successfully")
 
         # 3. Загрузка каналов из CSV (если еще не загружены)
@@ -156,6 +159,7 @@ async def main(test_mode=False):
         # Очистка ресурсов
         logger.info("Shutting down...")
         job_scheduler.stop()
+        await close_async_database()
         close_database()
         logger.info("Shutdown complete")
 
@@ -168,8 +172,58 @@ if __name__ == '__main__':
         action='store_true',
         help='Run in test mode (execute collection immediately and exit)'
     )
+    parser.add_argument(
+        '--train-classifier',
+        action='store_true',
+        help='Train the local pre-GPT classifier from stored GPT verdicts and exit'
+    )
+    parser.add_argument(
+        '--rebuild-repost-index',
+        action='store_true',
+        help='Rebuild LSH buckets of the repost index for all stored vacancies and exit'
+    )
+    parser.add_argument(
+        '--backfill-simhash',
+        action='store_true',
+        help='Compute SimHash fingerprints for stored vacancies that have none and exit'
+    )
+    parser.add_argument(
+        '--recompute-signatures',
+        action='store_true',
+        help='With --rebuild-repost-index / --backfill-simhash: recompute from vacancy text for all rows'
+    )
     args = parser.parse_args()
 
+    if args.rebuild_repost_index:
+        from processors.repost_index import repost_index
+
+        engine = init_database()
+        upgrade_database(engine)
+        indexed = repost_index.rebuild(recompute=args.recompute_signatures)
+        logger.info(f"Repost index rebuilt for {indexed} vacancies")
+        close_database()
+        exit(0)
+
+    if args.backfill_simhash:
+        from processors.simhash_index import simhash_index
+
+        engine = init_database()
+        upgrade_database(engine)
+        updated = simhash_index.backfill(recompute=args.recompute_signatures)
+        logger.info(f"SimHash backfilled for {updated} vacancies")
+        close_database()
+        exit(0)
+
+    if args.train_classifier:
+        from processors.local_classifier import train_from_history
+
+        engine = init_database()
+        upgrade_database(engine)
+        result = train_from_history()
+        logger.info(f"Local classifier training finished: {result}")
+        close_database()
+        exit(0)
+
     # Запуск приложения
     try:
         asyncio.run(main(test_mode=args.test))
@@ -1,13 +1,18 @@
 import asyncio
 from telegram import Bot
 from telegram.error import TelegramError, Forbidden, BadRequest
+from sqlalchemy import select
 from database.models import UserChatID, SentVacancy, Vacancy
-from database.connection import get_session, close_session
+from database.connection import get_async_session, close_async_session
+from database.bulk import insert_ignore_conflicts
 from config.settings import settings
 from config.logging_config import get_logger
 
 logger = get_logger(__name__)
 
+# Максимальное количество значений в одном IN (...)
+LOOKUP_CHUNK_SIZE = 500
+
 
 class TelegramNotifier:
     """Отправляет уведомления о вакансиях через Telegram Bot"""
@@ -44,14 +49,14 @@ class TelegramNotifier:
         Returns:
             int or None: chat_id пользователя
         """
-        session = get_session()
+        session = get_async_session()
         try:
-            user_chat = session.query(UserChatID).filter_by(
-                username=username
-            ).first()
+            chat_id = await session.scalar(
+                select(UserChatID.chat_id).where(UserChatID.username == username)
+            )
 
-            if user_chat:
-                return user_chat.chat_id
+            if chat_id:
+                return chat_id
 
             logger.warning(
                 f"Chat ID not found for @{username}. "
@@ -60,7 +65,7 @@ class TelegramNotifier:
             return None
 
         finally:
-            close_session(session)
+            await close_async_session(session)
 
     async def save_chat_id(self, username, chat_id):
         """
@@ -70,9 +75,11 @@ class TelegramNotifier:
             username: Username пользователя
             chat_id: Chat ID пользователя
         """
-        session = get_session()
+        session = get_async_session()
         try:
-            user_chat = session.query(UserChatID).filter_by(username=username).first()
+            user_chat = await session.scalar(
+                select(UserChatID).where(UserChatID.username == username)
+            )
 
             if user_chat:
                 user_chat.chat_id = chat_id
@@ -82,14 +89,14 @@ class TelegramNotifier:
                 session.add(user_chat)
                 logger.info(f"Saved new chat_id for @{username}")
 
-            session.commit()
+            await session.commit()
 
         except Exception as e:
-            session.rollback()
+            await session.rollback()
             logger.error(f"Error saving chat_id: {e}")
             raise
         finally:
-            close_session(session)
+            await close_async_session(session)
 
     def format_vacancies_message(self, vacancies):
         """
@@ -179,7 +186,7 @@ class TelegramNotifier:
             await self.initialize()
 
         message = self.format_vacancies_message(vacancies)
-        success_count = 0
+        delivered_to = []
 
         # Отправляем каждому пользователю
         for username in self.target_usernames:
@@ -204,11 +211,7 @@ class TelegramNotifier:
                     )
 
                 logger.info(f"Vacancies sent to @{username} (chat_id: {chat_id})")
-
-                # Сохраняем информацию об отправке
-                await self._save_sent_vacancies(vacancies, username)
-
-                success_count += 1
+                delivered_to.append(username)
 
             except Forbidden:
                 logger.error(f"Bot is blocked by user @{username}")
@@ -226,8 +229,10 @@ class TelegramNotifier:
                 logger.error(f"Unexpected error sending message to @{username}: {e}")
                 continue
 
-        if success_count > 0:
-            logger.info(f"Vacancies sent to {success_count}/{len(self.target_usernames)} users")
+        if delivered_to:
+            # История отправок пишется одной пачкой на всех получателей
+            await self._save_sent_vacancies(vacancies, delivered_to)
+            logger.info(f"Vacancies sent to {len(delivered_to)}/{len(self.target_usernames)} users")
             return True
         else:
             logger.error("Failed to send vacancies to any user")
@@ -260,47 +265,95 @@ class TelegramNotifier:
             if i < len(parts) - 1:
                 await asyncio.sleep(0.5)  # Небольшая задержка между частями
 
-    async def _save_sent_vacancies(self, vacancies, username):
-        """Сохранить информацию об отправленных вакансиях"""
-        session = get_session()
-        saved_count = 0
+    async def _save_sent_vacancies(self, vacancies, usernames):
+        """
+        Сохранить информацию об отправленных вакансиях
+
+        id вакансий приходят из шага сохранения (без id ищутся по hash одним
+        запросом), уже записанные пары (вакансия, получатель) читаются одним
+        запросом, новые записи вставляются пачкой.
+
+        Args:
+            vacancies: List[dict] - отправленные вакансии
+            usernames: List[str] - получатели, которым отправка удалась
+        """
+        session = get_async_session()
         try:
-            for vacancy_data in vacancies:
-                # Находим вакансию в БД
-                vacancy_hash = vacancy_data.get('hash')
-                if not vacancy_hash:
-                    continue
+            inserted, already_recorded = await session.run_sync(self._record_sent, vacancies, usernames)
+            await session.commit()
+            logger.info(
+                f"Saved {inserted} sent vacancy records for "
+                f"{', '.join('@' + u for u in usernames)} ({already_recorded} already recorded)"
+            )
 
-                vacancy = session.query(Vacancy).filter_by(hash=vacancy_hash).first()
-                if not vacancy:
-                    continue
+        except Exception as e:
+            await session.rollback()
+            logger.error(f"Error saving sent vacancies: {e}")
+        finally:
+            await close_async_session(session)
 
-                # Проверяем, не была ли вакансия уже отправлена этому пользователю
-                existing_sent = session.query(SentVacancy).filter_by(
-                    vacancy_id=vacancy.id,
-                    sent_to=username
-                ).first()
+    def _record_sent(self, session, vacancies, usernames):
+        """
+        Пачечная запись истории отправок (синхронная часть, выполняется
+        через AsyncSession.run_sync)
 
-                if existing_sent:
-                    logger.debug(f"Vacancy {vacancy.id} already sent to @{username}, skipping")
-                    continue
+        Returns:
+            Tuple[int, int]: (вставлено записей, уже было записано)
+        """
+        vacancy_ids = self._resolve_vacancy_ids(session, vacancies)
+        if not vacancy_ids:
+            return 0, 0
+
+        already_sent = set()
+        for i in range(0, len(vacancy_ids), LOOKUP_CHUNK_SIZE):
+            chunk = vacancy_ids[i:i + LOOKUP_CHUNK_SIZE]
+            already_sent.update(
+                session.query(SentVacancy.vacancy_id, SentVacancy.sent_to).filter(
+                    SentVacancy.vacancy_id.in_(chunk),
+                    SentVacancy.sent_to.in_(usernames)
+                ).all()
+            )
 
-                # Создаем запись об отправке
-                sent = SentVacancy(
-                    vacancy_id=vacancy.id,
-                    sent_to=username
-                )
-                session.add(sent)
-                saved_count += 1
+        rows = [
+            {'vacancy_id': vacancy_id, 'sent_to': username}
+            for username in usernames
+            for vacancy_id in vacancy_ids
+            if (vacancy_id, username) not in already_sent
+        ]
+        # Уникальный ключ (vacancy_id, sent_to) делает повторную запись безопасной
+        inserted = insert_ignore_conflicts(
+            session, SentVacancy, rows, ['vacancy_id', 'sent_to'], [SentVacancy.id]
+        )
+        return len(inserted), len(already_sent)
+
+    def _resolve_vacancy_ids(self, session, vacancies):
+        """
+        id отправленных вакансий в БД
 
-            session.commit()
-            logger.info(f"Saved {saved_count} sent vacancy records for @{username}")
+        Returns:
+            List[int]: Уникальные id в порядке вакансий
+        """
+        vacancy_ids = [vacancy.get('id') for vacancy in vacancies]
+        missing_hashes = list({
+            vacancy['hash'] for vacancy, vacancy_id in zip(vacancies, vacancy_ids)
+            if not vacancy_id and vacancy.get('hash')
+        })
+
+        ids_by_hash = {}
+        for i in range(0, len(missing_hashes), LOOKUP_CHUNK_SIZE):
+            chunk = missing_hashes[i:i + LOOKUP_CHUNK_SIZE]
+            ids_by_hash.update(
+                (bytes(vacancy_hash), vacancy_id)
+                for vacancy_id, vacancy_hash in session.query(Vacancy.id, Vacancy.hash).filter(
+                    Vacancy.hash.in_(chunk)
+                ).all()
+            )
 
-        except Exception as e:
-            session.rollback()
-            logger.error(f"Error saving sent vacancies for @{username}: {e}")
-        finally:
-            close_session(session)
+        resolved = [
+            vacancy_id or ids_by_hash.get(vacancy.get('hash'))
+            for vacancy, vacancy_id in zip(vacancies, vacancy_ids)
+        ]
+        return list(dict.fromkeys(vacancy_id for vacancy_id in resolved if vacancy_id))
 
 
 # Глобальный экземпляр
@@ -0,0 +1,134 @@
+import hashlib
+from database.models import ClassificationCache
+from database.connection import get_session, close_session
+from utils.normalized_view import get_view
+from config.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class GPTClassificationCache:
+    """
+    Персистентный кеш вердиктов GPT, адресуемый содержимым поста.
+
+    Ключ — хеш нормализованного текста поста, модели и версии промпта,
+    поэтому репосты и пересечение окон сбора не тратят токены повторно.
+    """
+
+    # Максимальное количество ключей в одном IN (...)
+    LOOKUP_CHUNK_SIZE = 500
+
+    def make_key(self, vacancy_data, model, prompt_version):
+        """
+        Вычисляет ключ кеша для поста
+
+        Args:
+            vacancy_data: dict с полем full_text
+            model: Название модели
+            prompt_version: Версия SYSTEM_PROMPT
+
+        Returns:
+            str: SHA-256 хеш (64 символа)
+        """
+        normalized_text = get_view(vacancy_data).normalized_text
+        key_string = f"{model}|{prompt_version}|{normalized_text}"
+        return hashlib.sha256(key_string.encode('utf-8')).hexdigest()
+
+    def lookup(self, keys):
+        """
+        Загружает закешированные вердикты одним запросом на чанк ключей
+
+        Args:
+            keys: Iterable[str] - ключи кеша
+
+        Returns:
+            Dict[str, dict]: {cache_key: verdict}
+        """
+        unique_keys = list(set(keys))
+        if not unique_keys:
+            return {}
+
+        session = get_session()
+        cached = {}
+        try:
+            for i in range(0, len(unique_keys), self.LOOKUP_CHUNK_SIZE):
+                chunk = unique_keys[i:i + self.LOOKUP_CHUNK_SIZE]
+                rows = session.query(ClassificationCache).filter(
+                    ClassificationCache.cache_key.in_(chunk)
+                ).all()
+
+                for row in rows:
+                    cached[row.cache_key] = {
+                        'is_relevant': row.is_relevant,
+                        'position_type': row.position_type,
+                        'title': row.title,
+                        'company': row.company,
+                    }
+
+        except Exception as e:
+            # Кеш — оптимизация: при ошибке просто классифицируем все посты заново
+            logger.warning(f"Error reading classification cache: {e}")
+            return {}
+        finally:
+            close_session(session)
+
+        return cached
+
+    def store(self, entries, model, prompt_version):
+        """
+        Сохраняет новые вердикты в кеш
+
+        Args:
+            entries: Dict[str, dict] - {cache_key: verdict}
+            model: Название модели
+            prompt_version: Версия SYSTEM_PROMPT
+
+        Returns:
+            int: Количество сохраненных записей
+        """
+        if not entries:
+            return 0
+
+        session = get_session()
+        try:
+            # Ключи могли появиться в кеше параллельно (другой запуск)
+            existing = set()
+            keys = list(entries)
+            for i in range(0, len(keys), self.LOOKUP_CHUNK_SIZE):
+                chunk = keys[i:i + self.LOOKUP_CHUNK_SIZE]
+                existing.update(
+                    key for (key,) in session.query(ClassificationCache.cache_key).filter(
+                        ClassificationCache.cache_key.in_(chunk)
+                    )
+                )
+
+            saved_count = 0
+            for key, verdict in entries.items():
+                if key in existing:
+                    continue
+
+                session.add(ClassificationCache(
+                    cache_key=key,
+                    model=model,
+                    prompt_version=prompt_version,
+                    is_relevant=bool(verdict.get('is_relevant')),
+                    position_type=verdict.get('position_type'),
+                    title=verdict.get('title'),
+                    company=verdict.get('company'),
+                ))
+                saved_count += 1
+
+            session.commit()
+            logger.info(f"Saved {saved_count} GPT verdicts to classification cache")
+            return saved_count
+
+        except Exception as e:
+            session.rollback()
+            logger.warning(f"Error saving classification cache: {e}")
+            return 0
+        finally:
+            close_session(session)
+
+
+# Глобальный экземпляр
+classification_cache = GPTClassificationCache()
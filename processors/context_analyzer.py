@@ -47,12 +47,14 @@ class ContextAnalyzer:
         self.min_matches = min_matches
         self.fuzzy_threshold = fuzzy_threshold
 
-    def check_video_context(self, text):
+    def check_video_context(self, text, text_lower=None):
         """
         Проверяет, относится ли текст к видеопроизводству
 
         Args:
             text: Текст вакансии
+            text_lower: Уже приведенный к lowercase текст (опционально,
+                чтобы не копировать строку повторно)
 
         Returns:
             bool: True если контекст видеопроизводства определен
@@ -60,7 +62,8 @@ class ContextAnalyzer:
         if not text:
             return False
 
-        text_lower = text.lower()
+        if text_lower is None:
+            text_lower = text.lower()
         match_count = 0
 
         # Точные совпадения
@@ -88,12 +91,13 @@ class ContextAnalyzer:
 
         return is_video_context
 
-    def get_matched_keywords(self, text):
+    def get_matched_keywords(self, text, text_lower=None):
         """
         Возвращает список найденных keywords (для отладки)
 
         Args:
             text: Текст вакансии
+            text_lower: Уже приведенный к lowercase текст (опционально)
 
         Returns:
             List[str]: Список найденных keywords
@@ -101,7 +105,8 @@ class ContextAnalyzer:
         if not text:
             return []
 
-        text_lower = text.lower()
+        if text_lower is None:
+            text_lower = text.lower()
         matched = []
 
         for keyword in self.VIDEO_PRODUCTION_KEYWORDS:
@@ -1,15 +1,26 @@
 from datetime import datetime, timedelta
-from rapidfuzz import fuzz
+from collections import defaultdict
 from database.models import Vacancy
 from database.connection import get_session, close_session
-from utils.hash_generator import generate_vacancy_hash
+from processors.title_index import TitleIndex
+from processors.repost_index import repost_index
+from processors.simhash_index import simhash_index
+from utils.normalized_view import get_view
+from utils.hash_generator import generate_url_key
+from config.settings import settings
 from config.logging_config import get_logger
 
 logger = get_logger(__name__)
 
 
 class Deduplicator:
-    """Удаляет дубликаты вакансий на основе хеша и fuzzy matching"""
+    """Удаляет дубликаты вакансий на основе хеша, похожести текста (репосты) и fuzzy matching"""
+
+    # Максимальное количество значений в одном IN (...)
+    LOOKUP_CHUNK_SIZE = 500
+
+    # Fuzzy matching только для достаточно длинных заголовков
+    MIN_FUZZY_TITLE_LENGTH = 11
 
     def __init__(self, similarity_threshold=90, time_window_days=7):
         """
@@ -19,6 +30,123 @@ class Deduplicator:
         """
         self.similarity_threshold = similarity_threshold
         self.time_window_days = time_window_days
+        # Названия недавних вакансий в памяти, живут между запусками
+        self.title_index = TitleIndex(time_window_days=time_window_days)
+
+    def _cutoff_date(self):
+        return datetime.now() - timedelta(days=self.time_window_days)
+
+    def _load_existing(self, session, column, values, cutoff_date):
+        """
+        Находит уже сохраненные значения колонки одним запросом на чанк
+
+        Args:
+            session: SQLAlchemy session
+            column: Колонка Vacancy (hash)
+            values: Iterable - искомые значения
+            cutoff_date: Начало временного окна
+
+        Returns:
+            Set: Значения, которые уже есть в БД за временное окно
+        """
+        unique_values = list({value for value in values if value})
+        existing = set()
+
+        for i in range(0, len(unique_values), self.LOOKUP_CHUNK_SIZE):
+            chunk = unique_values[i:i + self.LOOKUP_CHUNK_SIZE]
+            rows = session.query(column).filter(
+                column.in_(chunk),
+                Vacancy.found_at >= cutoff_date
+            ).all()
+            existing.update(value for (value,) in rows)
+
+        return existing
+
+    def _load_existing_urls(self, session, urls, cutoff_date):
+        """
+        Находит уже сохраненные URL: поиск по индексу ключей url_hash,
+        точное сравнение самих URL
+
+        Returns:
+            Set[str]: URL, которые уже есть в БД за временное окно
+        """
+        wanted = {url for url in urls if url and url.strip()}
+        keys = list({generate_url_key(url) for url in wanted})
+        existing = set()
+
+        for i in range(0, len(keys), self.LOOKUP_CHUNK_SIZE):
+            chunk = keys[i:i + self.LOOKUP_CHUNK_SIZE]
+            rows = session.query(Vacancy.url).filter(
+                Vacancy.url_hash.in_(chunk),
+                Vacancy.found_at >= cutoff_date
+            ).all()
+            existing.update(url for (url,) in rows)
+
+        return existing & wanted
+
+    def _is_fuzzy_duplicate(self, vacancy_data, session):
+        """Fuzzy matching названия с вакансиями той же позиции за временное окно"""
+        view = get_view(vacancy_data)
+        if len(view.title) < self.MIN_FUZZY_TITLE_LENGTH:
+            return False
+
+        self.title_index.ensure_loaded(session)
+        match = self.title_index.find_similar(
+            vacancy_data.get('position_type'), view.title_lower, self.similarity_threshold
+        )
+        if match:
+            logger.debug(
+                f"Duplicate found by fuzzy matching "
+                f"(similarity={match[1]:.0f}): {view.title[:50]}"
+            )
+            return True
+
+        return False
+
+    def _find_fuzzy_duplicates(self, vacancies, session):
+        """
+        Fuzzy matching названий пачкой: одна матрица similarity на тип позиции
+
+        Returns:
+            Set[int]: Индексы вакансий-дубликатов
+        """
+        self.title_index.ensure_loaded(session)
+
+        by_position = defaultdict(list)
+        for i, vacancy in enumerate(vacancies):
+            if len(get_view(vacancy).title) >= self.MIN_FUZZY_TITLE_LENGTH:
+                by_position[vacancy.get('position_type')].append(i)
+
+        duplicates = set()
+        for position_type, indices in by_position.items():
+            scores = self.title_index.find_similar_many(
+                position_type,
+                [get_view(vacancies[i]).title_lower for i in indices],
+                self.similarity_threshold
+            )
+            for i, score in zip(indices, scores):
+                if score >= self.similarity_threshold:
+                    logger.debug(
+                        f"Duplicate found by fuzzy matching "
+                        f"(similarity={score:.0f}): {get_view(vacancies[i]).title[:50]}"
+                    )
+                    duplicates.add(i)
+
+        return duplicates
+
+    def remember(self, vacancies):
+        """
+        Добавляет сохраненные в БД вакансии в индекс названий
+
+        Args:
+            vacancies: List[dict] - сохраненные вакансии
+        """
+        for vacancy in vacancies:
+            self.title_index.add(
+                vacancy.get('position_type'),
+                vacancy.get('title'),
+                vacancy.get('date')
+            )
 
     def is_duplicate(self, vacancy_data, session=None):
         """
@@ -37,54 +165,23 @@ class Deduplicator:
             should_close_session = True
 
         try:
-            # Генерируем хеш
-            vacancy_hash = generate_vacancy_hash(
-                title=vacancy_data.get('title', ''),
-                company=vacancy_data.get('company', ''),
-                url=vacancy_data.get('url', '')
-            )
+            # Хеш берем из нормализованного представления
+            vacancy_hash = get_view(vacancy_data).fingerprint
+            url = vacancy_data.get('url')
+            cutoff_date = self._cutoff_date()
 
             # 1. Проверка по точному хешу
-            cutoff_date = datetime.now() - timedelta(days=self.time_window_days)
-            existing_by_hash = session.query(Vacancy).filter(
-                Vacancy.hash == vacancy_hash,
-                Vacancy.found_at >= cutoff_date
-            ).first()
-
-            if existing_by_hash:
+            if self._load_existing(session, Vacancy.hash, [vacancy_hash], cutoff_date):
                 logger.debug(f"Duplicate found by hash: {vacancy_data.get('title')[:50]}")
                 return True
 
             # 2. Проверка по URL (если есть)
-            url = vacancy_data.get('url')
-            if url:
-                existing_by_url = session.query(Vacancy).filter(
-                    Vacancy.url == url,
-                    Vacancy.found_at >= cutoff_date
-                ).first()
-
-                if existing_by_url:
-                    logger.debug(f"Duplicate found by URL: {url}")
-                    return True
+            if url and self._load_existing_urls(session, [url], cutoff_date):
+                logger.debug(f"Duplicate found by URL: {url}")
+                return True
 
             # 3. Fuzzy matching по названию
-            title = vacancy_data.get('title', '')
-            if len(title) > 10:  # Только для достаточно длинных заголовков
-                recent_vacancies = session.query(Vacancy).filter(
-                    Vacancy.found_at >= cutoff_date,
-                    Vacancy.position_type == vacancy_data.get('position_type')
-                ).all()
-
-                for existing in recent_vacancies:
-                    similarity = fuzz.ratio(title.lower(), existing.title.lower())
-                    if similarity >= self.similarity_threshold:
-                        logger.debug(
-                            f"Duplicate found by fuzzy matching "
-                            f"(similarity={similarity}): {title[:50]}"
-                        )
-                        return True
-
-            return False
+            return self._is_fuzzy_duplicate(vacancy_data, session)
 
         finally:
             if should_close_session:
@@ -94,6 +191,10 @@ class Deduplicator:
         """
         Фильтрует дубликаты из списка вакансий
 
+        Хеши и URL всех вакансий проверяются по БД одним IN-запросом на чанк,
+        дальше проверки идут по множествам в памяти. Дубликаты внутри
+        самого списка тоже отсеиваются (первая вакансия остается).
+
         Args:
             vacancies: List[dict] - список вакансий
 
@@ -106,18 +207,58 @@ class Deduplicator:
         error_count = 0
 
         try:
-            for vacancy in vacancies:
+            cutoff_date = self._cutoff_date()
+            hashes = [get_view(vacancy).fingerprint for vacancy in vacancies]
+            urls = [vacancy.get('url') for vacancy in vacancies]
+
+            # 1-2. Точные совпадения по хешу и URL: два запроса вместо двух на вакансию
+            seen_hashes = self._load_existing(session, Vacancy.hash, hashes, cutoff_date)
+            seen_urls = self._load_existing_urls(session, urls, cutoff_date)
+
+            candidates = []
+            for vacancy, vacancy_hash, url in zip(vacancies, hashes, urls):
+                if vacancy_hash in seen_hashes:
+                    logger.debug(f"Duplicate found by hash: {(vacancy.get('title') or '')[:50]}")
+                    duplicate_count += 1
+                    continue
+
+                if url and url in seen_urls:
+                    logger.debug(f"Duplicate found by URL: {url}")
+                    duplicate_count += 1
+                    continue
+
+                # Следующие вакансии списка сверяются и с этой
+                seen_hashes.add(vacancy_hash)
+                if url:
+                    seen_urls.add(url)
+                # Отпечаток едет с вакансией дальше: сохранение и отправка его не пересчитывают
+                vacancy['hash'] = vacancy_hash
+                candidates.append(vacancy)
+
+            # 3. Репосты с переписанным заголовком: похожесть текста (MinHash LSH или SimHash)
+            if settings.REPOST_DETECTION_ENABLED:
+                detector = simhash_index if settings.REPOST_DETECTION_METHOD == 'simhash' else repost_index
                 try:
-                    if not self.is_duplicate(vacancy, session=session):
-                        unique_vacancies.append(vacancy)
-                    else:
-                        duplicate_count += 1
+                    reposts = detector.find_reposts(candidates, session, cutoff_date)
+                    duplicate_count += len(reposts)
+                    candidates = [vacancy for i, vacancy in enumerate(candidates) if i not in reposts]
                 except Exception as e:
-                    # Если ошибка при проверке одной вакансии, не прерываем весь процесс
-                    logger.warning(f"Error checking duplicate for vacancy: {e}")
+                    logger.warning(f"Error during repost detection: {e}")
                     error_count += 1
-                    # Добавляем вакансию как уникальную, чтобы не потерять данные
-                    unique_vacancies.append(vacancy)
+
+            # 4. Fuzzy matching по названию с индексом недавних вакансий
+            try:
+                fuzzy_duplicates = self._find_fuzzy_duplicates(candidates, session)
+            except Exception as e:
+                # При ошибке вакансии считаются уникальными, чтобы не потерять данные
+                logger.warning(f"Error during fuzzy title matching: {e}")
+                fuzzy_duplicates = set()
+                error_count += 1
+
+            duplicate_count += len(fuzzy_duplicates)
+            unique_vacancies = [
+                vacancy for i, vacancy in enumerate(candidates) if i not in fuzzy_duplicates
+            ]
 
             logger.info(
                 f"Deduplication complete: {len(unique_vacancies)} unique, "
@@ -0,0 +1,553 @@
+import asyncio
+import json
+import os
+import tempfile
+import time
+from collections import deque
+from openai import (
+    DEFAULT_MAX_RETRIES, APIConnectionError, APITimeoutError, BadRequestError, InternalServerError,
+    RateLimitError
+)
+from processors.gpt_prompt import build_request_body, parse_verdicts, output_tokens_per_post
+from processors.gpt_rate_limiter import gpt_rate_governor
+from database.models import QuarantinedPost
+from database.connection import get_async_session, close_async_session
+from utils.token_estimator import estimate_messages_tokens
+from config.settings import settings
+from config.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class ClassifierBackend:
+    """
+    Общий интерфейс бэкенда классификации постов.
+
+    Бэкенд получает готовые батчи постов и возвращает вердикты по каждому
+    батчу в том же порядке: List[Dict[индекс поста в батче, вердикт]].
+    Посты без вердикта считаются неклассифицированными. В вердикте
+    поле 'model' — модель, которая на самом деле ответила (при хеджировании
+    и failover это может быть запасная модель).
+    """
+
+    name = 'base'
+
+    # Счетчики токенов из поля usage ответов
+    USAGE_STATS = ('prompt_tokens', 'cached_tokens', 'completion_tokens')
+
+    def __init__(self, client, model):
+        self.client = client
+        self.model = model
+        self.stats = {}
+
+    async def classify_batches(self, batches):
+        """
+        Args:
+            batches: List[List[dict]] - батчи постов
+
+        Returns:
+            List[Dict[int, dict]]: Вердикты по каждому батчу
+        """
+        raise NotImplementedError
+
+    def _reset_stats(self, **counters):
+        self.stats = {name: 0 for name in self.USAGE_STATS}
+        self.stats.update(counters)
+
+    def _record_usage(self, usage):
+        """
+        Учитывает usage ответа: сколько входных токенов провайдер взял
+        из кеша префикса (prompt_tokens_details.cached_tokens)
+
+        Args:
+            usage: CompletionUsage или dict из ответа Batch API
+        """
+        if usage is None:
+            return
+
+        if not isinstance(usage, dict):
+            usage = usage.model_dump()
+
+        prompt_tokens = usage.get('prompt_tokens') or 0
+        cached_tokens = (usage.get('prompt_tokens_details') or {}).get('cached_tokens') or 0
+        completion_tokens = usage.get('completion_tokens') or 0
+
+        self.stats['prompt_tokens'] += prompt_tokens
+        self.stats['cached_tokens'] += cached_tokens
+        self.stats['completion_tokens'] += completion_tokens
+
+        logger.debug(
+            f"GPT usage: {prompt_tokens} prompt tokens ({cached_tokens} cached), "
+            f"{completion_tokens} completion tokens"
+        )
+
+
+class InteractiveBackend(ClassifierBackend):
+    """
+    Классификация через обычный Chat Completions API: батчи отправляются
+    параллельно под семафором и rate-limit governor, неудачные батчи
+    повторяются и делятся пополам до изоляции «ядовитого» поста.
+
+    Против хвостовых задержек: у каждого запроса есть таймаут, а если батч
+    отвечает дольше p95 недавних запросов, отправляется дубль (на запасной
+    эндпоинт, если он задан) — засчитывается первый валидный ответ.
+    При ошибке основного эндпоинта запрос повторяется на запасном.
+    """
+
+    name = 'interactive'
+
+    def __init__(self, client, model, secondary=None):
+        """
+        Args:
+            client: AsyncOpenAI client основного эндпоинта
+            model: Название модели
+            secondary: (client, model) запасного эндпоинта или None
+        """
+        super().__init__(client, model)
+        self.secondary = secondary
+        # Задержки последних успешных запросов к основному эндпоинту
+        self.latencies = deque(maxlen=settings.GPT_HEDGE_WINDOW)
+
+    async def classify_batches(self, batches):
+        self._reset_stats(requests=0, quarantined=0, timeouts=0, hedges=0, hedge_wins=0, failovers=0)
+
+        # Батчи отправляются параллельно (не больше GPT_MAX_CONCURRENCY одновременно),
+        # gather сохраняет исходный порядок результатов
+        semaphore = asyncio.Semaphore(settings.GPT_MAX_CONCURRENCY)
+        results = await asyncio.gather(*[
+            self._run_batch(semaphore, batch, batch_idx, len(batches))
+            for batch_idx, batch in enumerate(batches)
+        ])
+
+        if self.stats['hedges'] or self.stats['failovers'] or self.stats['timeouts']:
+            logger.info(
+                f"GPT tail latency: {self.stats['hedges']} hedged requests "
+                f"({self.stats['hedge_wins']} won by the hedge), "
+                f"{self.stats['failovers']} failovers, {self.stats['timeouts']} timeouts"
+            )
+
+        return results
+
+    async def _run_batch(self, semaphore, batch, batch_idx, total_batches):
+        """Обрабатывает один батч под семафором конкурентности"""
+        async with semaphore:
+            logger.info(f"Processing GPT batch {batch_idx + 1}/{total_batches} ({len(batch)} items)")
+            try:
+                return await self._classify_batch(batch)
+            except Exception as e:
+                logger.error(f"Error processing batch {batch_idx + 1}: {e}")
+                return {}
+
+    async def _classify_batch(self, batch):
+        """
+        Классифицирует батч с повторами и бисекцией: если ответ на батч
+        стабильно невалиден (ошибка разбора или 400), батч делится пополам,
+        пока «ядовитый» пост не будет изолирован и отправлен в карантин.
+        Остальные посты не теряются.
+
+        После транспортных ошибок и ошибок авторизации батч не делится:
+        он остается неклассифицированным и повторится при следующем запуске.
+
+        Returns:
+            Dict[int, dict]: {индекс поста в батче: вердикт}
+        """
+        attempts = max(1, settings.GPT_BATCH_RETRIES)
+        last_error = None
+
+        for attempt in range(attempts):
+            try:
+                verdicts = await self._process_batch(batch)
+                break
+            except Exception as e:
+                last_error = e
+                logger.warning(
+                    f"GPT batch of {len(batch)} failed (attempt {attempt + 1}/{attempts}): {e}"
+                )
+                if attempt < attempts - 1:
+                    await asyncio.sleep(settings.GPT_BACKOFF_BASE * (2 ** attempt))
+        else:
+            if not self._is_content_error(last_error):
+                logger.error(f"Leaving GPT batch of {len(batch)} unclassified: {last_error}")
+                return {}
+
+            if len(batch) == 1:
+                await self._quarantine_post(batch[0], last_error)
+                return {}
+
+            # Делим батч пополам и классифицируем половины отдельно
+            middle = len(batch) // 2
+            logger.info(f"Bisecting failed GPT batch: {len(batch)} -> {middle} + {len(batch) - middle}")
+            left = await self._classify_batch(batch[:middle])
+            right = await self._classify_batch(batch[middle:])
+            verdicts = dict(left)
+            verdicts.update({idx + middle: verdict for idx, verdict in right.items()})
+            return verdicts
+
+        # Посты, пропущенные в ответе, дозапрашиваем отдельно
+        missing = [i for i in range(len(batch)) if i not in verdicts]
+        if missing:
+            logger.warning(f"GPT response is missing {len(missing)}/{len(batch)} posts, retrying them")
+            retried = await self._classify_batch([batch[i] for i in missing])
+            for idx, verdict in retried.items():
+                verdicts[missing[idx]] = verdict
+
+        return verdicts
+
+    @staticmethod
+    def _is_content_error(error):
+        """
+        Ошибка вызвана содержимым батча: невалидный или обрезанный ответ
+        (ValueError / json.JSONDecodeError из parse_verdicts) или отказ API
+        принять запрос (400). Только такие ошибки имеет смысл локализовать бисекцией.
+        """
+        return isinstance(error, (ValueError, BadRequestError))
+
+    async def _quarantine_post(self, vacancy, error):
+        """Сохраняет пост, который стабильно ломает запрос к GPT, для разбора"""
+        logger.error(
+            f"Quarantining post {vacancy.get('channel_id')}/{vacancy.get('message_id')} "
+            f"after repeated GPT failures: {error}"
+        )
+        self.stats['quarantined'] += 1
+
+        session = get_async_session()
+        try:
+            session.add(QuarantinedPost(
+                channel_id=vacancy.get('channel_id'),
+                message_id=vacancy.get('message_id'),
+                url=vacancy.get('url'),
+                full_text=vacancy.get('full_text'),
+                model=self.model,
+                error_message=str(error)
+            ))
+            await session.commit()
+        except Exception as e:
+            await session.rollback()
+            logger.error(f"Error saving quarantined post: {e}")
+        finally:
+            await close_async_session(session)
+
+    async def _create_completion(self, request_body, expected_output_tokens, client=None):
+        """
+        Запрос к Chat Completions API с учетом rate limits:
+        ждет разрешения у governor, обновляет его по заголовкам ответа
+        и повторяет запрос с backoff после 429. Встроенные повторы SDK
+        отключены, поэтому ошибки соединения и 5xx тоже повторяются здесь;
+        таймауты не повторяются — их закрывают хеджирование и failover.
+
+        Governor и замеры задержки относятся только к основному эндпоинту.
+        """
+        client = client or self.client
+        governed = client is self.client
+        estimated_tokens = estimate_messages_tokens(request_body['messages']) + expected_output_tokens
+
+        for attempt in range(settings.GPT_MAX_RETRIES + 1):
+            if governed:
+                await gpt_rate_governor.acquire(estimated_tokens)
+
+            try:
+                self.stats['requests'] += 1
+                started = time.monotonic()
+                raw_response = await client.chat.completions.with_raw_response.create(
+                    **request_body, timeout=settings.GPT_REQUEST_TIMEOUT
+                )
+            except RateLimitError as e:
+                if attempt >= settings.GPT_MAX_RETRIES or not governed:
+                    raise
+
+                headers = e.response.headers if e.response is not None else {}
+                delay = gpt_rate_governor.backoff(attempt, headers.get('retry-after'))
+                logger.warning(f"GPT rate limit hit (429), retrying in {delay:.1f}s")
+                continue
+            except APITimeoutError:
+                raise
+            except (APIConnectionError, InternalServerError) as e:
+                if attempt >= settings.GPT_MAX_RETRIES:
+                    raise
+
+                delay = min(settings.GPT_BACKOFF_BASE * (2 ** attempt), settings.GPT_BACKOFF_MAX)
+                logger.warning(f"GPT request failed ({e}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                continue
+
+            if governed:
+                self.latencies.append(time.monotonic() - started)
+                gpt_rate_governor.update_from_headers(raw_response.headers)
+            return raw_response.parse()
+
+    def _hedge_delay(self):
+        """Через сколько секунд отправлять дубль: p95 недавних запросов"""
+        if len(self.latencies) < settings.GPT_HEDGE_MIN_SAMPLES:
+            return settings.GPT_HEDGE_INITIAL_DELAY
+
+        ordered = sorted(self.latencies)
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        return max(settings.GPT_HEDGE_MIN_DELAY, p95)
+
+    async def _request(self, batch, client, model):
+        """
+        Один запрос к эндпоинту
+
+        Returns:
+            Dict[int, dict]: {индекс поста в батче: вердикт}
+
+        Raises:
+            Exception: ошибка API, таймаут, обрезанный или невалидный ответ
+        """
+        try:
+            response = await self._create_completion(
+                build_request_body(batch, model),
+                expected_output_tokens=len(batch) * output_tokens_per_post(),
+                client=client
+            )
+        except APITimeoutError:
+            self.stats['timeouts'] += 1
+            raise
+
+        self._record_usage(response.usage)
+
+        choice = response.choices[0]
+        verdicts = parse_verdicts(choice.message.content, choice.finish_reason, len(batch))
+        for verdict in verdicts.values():
+            verdict['model'] = model
+        return verdicts
+
+    async def _failover(self, batch, error):
+        """Повторяет запрос на запасном эндпоинте после ошибки основного"""
+        if not self.secondary:
+            raise error
+
+        client, model = self.secondary
+        self.stats['failovers'] += 1
+        logger.warning(f"GPT request to {self.model} failed ({error}), failing over to {model}")
+        return await self._request(batch, client, model)
+
+    async def _process_batch(self, batch):
+        """
+        Обрабатывает батч вакансий через GPT с хеджированием и failover
+
+        Returns:
+            Dict[int, dict]: {индекс поста в батче: вердикт}
+
+        Raises:
+            Exception: ошибка API, обрезанный или невалидный ответ
+        """
+        started = time.monotonic()
+        primary = asyncio.ensure_future(self._request(batch, self.client, self.model))
+
+        delay = self._hedge_delay() if settings.GPT_HEDGE_ENABLED else None
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+
+        if done:
+            try:
+                return primary.result()
+            except Exception as e:
+                return await self._failover(batch, e)
+
+        # Основной запрос дольше p95 — отправляем дубль, побеждает первый валидный ответ
+        client, model = self.secondary or (self.client, self.model)
+        self.stats['hedges'] += 1
+        logger.info(f"GPT batch of {len(batch)} is slower than {delay:.1f}s, sending hedged request to {model}")
+        hedge = asyncio.ensure_future(self._request(batch, client, model))
+
+        pending = {primary, hedge}
+        last_error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.stats['hedge_wins'] += 1
+                        return task.result()
+                    last_error = task.exception()
+            raise last_error
+        finally:
+            # Отмененный основной запрос шел как минимум столько: без этой нижней
+            # оценки p95 считался бы только по выжившим быстрым ответам
+            if not primary.done():
+                self.latencies.append(time.monotonic() - started)
+            for task in pending:
+                task.cancel()
+
+
+class BatchJobBackend(ClassifierBackend):
+    """
+    Офлайн-классификация через Batch API провайдера: все запросы пишутся
+    в JSONL-файл, отправляются одним асинхронным batch-заданием, результаты
+    сопоставляются по custom_id. Дешевле интерактивного API, но ответ
+    приходит с задержкой (до completion_window).
+
+    Батчи без результата (ошибка строки или всего задания) и посты,
+    пропущенные в ответе, доклассифицируются через fallback-бэкенд, если он задан.
+    """
+
+    name = 'batch'
+
+    TERMINAL_STATUSES = ('completed', 'failed', 'expired', 'cancelled')
+
+    def __init__(self, client, model, fallback=None):
+        super().__init__(client, model)
+        self.fallback = fallback
+
+    async def classify_batches(self, batches):
+        self._reset_stats(requests=0, batch_jobs=0, failed_requests=0, missing_posts=0)
+        results = [{} for _ in batches]
+
+        if not batches:
+            return results
+
+        try:
+            outputs = await self._run_job(batches)
+        except Exception as e:
+            logger.error(f"GPT batch job failed: {e}")
+            outputs = {}
+
+        # (индекс батча, индексы постов без вердикта)
+        failed = []
+        for batch_idx, batch in enumerate(batches):
+            output = outputs.get(self._custom_id(batch_idx))
+            try:
+                if output is None:
+                    raise ValueError("no result for request")
+                results[batch_idx] = self._parse_output(output, len(batch))
+            except Exception as e:
+                logger.warning(f"Batch job request {batch_idx} failed: {e}")
+                self.stats['failed_requests'] += 1
+                failed.append((batch_idx, list(range(len(batch)))))
+                continue
+
+            missing = [i for i in range(len(batch)) if i not in results[batch_idx]]
+            if missing:
+                logger.warning(f"Batch job request {batch_idx} is missing {len(missing)}/{len(batch)} posts")
+                self.stats['missing_posts'] += len(missing)
+                failed.append((batch_idx, missing))
+
+        if failed and self.fallback:
+            logger.info(
+                f"Classifying {len(failed)} failed or incomplete batch job requests "
+                f"via {self.fallback.name} backend"
+            )
+            retried = await self.fallback.classify_batches([
+                [batches[batch_idx][i] for i in indices] for batch_idx, indices in failed
+            ])
+            for (batch_idx, indices), verdicts in zip(failed, retried):
+                for idx, verdict in verdicts.items():
+                    results[batch_idx][indices[idx]] = verdict
+            self.stats['fallback_requests'] = self.fallback.stats.get('requests', 0)
+            for name in self.USAGE_STATS:
+                self.stats[name] += self.fallback.stats.get(name, 0)
+
+        return results
+
+    def _custom_id(self, batch_idx):
+        return f"batch-{batch_idx}"
+
+    def _write_input_file(self, batches):
+        """Пишет запросы всех батчей в JSONL-файл для Batch API"""
+        os.makedirs(settings.GPT_BATCH_DIR, exist_ok=True)
+        fd, path = tempfile.mkstemp(prefix='gpt_batch_', suffix='.jsonl', dir=settings.GPT_BATCH_DIR)
+
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            for batch_idx, batch in enumerate(batches):
+                f.write(json.dumps({
+                    "custom_id": self._custom_id(batch_idx),
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": build_request_body(batch, self.model),
+                }, ensure_ascii=False) + "\n")
+
+        return path
+
+    async def _run_job(self, batches):
+        """
+        Отправляет batch-задание, дожидается завершения и скачивает результаты
+
+        Returns:
+            Dict[str, dict]: {custom_id: строка результата}
+        """
+        path = self._write_input_file(batches)
+        try:
+            with open(path, 'rb') as f:
+                input_file = await self.client.files.create(file=f, purpose='batch')
+        finally:
+            os.remove(path)
+
+        job = await self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint='/v1/chat/completions',
+            completion_window='24h'
+        )
+        self.stats['batch_jobs'] += 1
+        self.stats['requests'] += len(batches)
+        logger.info(f"Submitted GPT batch job {job.id} ({len(batches)} requests)")
+
+        started = time.monotonic()
+        while job.status not in self.TERMINAL_STATUSES:
+            if time.monotonic() - started > settings.GPT_BATCH_TIMEOUT:
+                logger.warning(f"GPT batch job {job.id} timed out, cancelling")
+                await self.client.batches.cancel(job.id)
+                break
+
+            await asyncio.sleep(settings.GPT_BATCH_POLL_INTERVAL)
+            job = await self.client.batches.retrieve(job.id)
+            logger.debug(f"GPT batch job {job.id}: {job.status}")
+
+        logger.info(f"GPT batch job {job.id} finished with status '{job.status}'")
+
+        outputs = {}
+        for file_id in (job.output_file_id, job.error_file_id):
+            if not file_id:
+                continue
+
+            content = await self.client.files.content(file_id)
+            for line in content.text.splitlines():
+                if line.strip():
+                    row = json.loads(line)
+                    outputs[row['custom_id']] = row
+
+        return outputs
+
+    def _parse_output(self, output, batch_size):
+        """Разбирает строку результата Batch API в вердикты"""
+        if output.get('error'):
+            raise ValueError(output['error'])
+
+        response = output.get('response') or {}
+        if response.get('status_code') != 200:
+            raise ValueError(f"status code {response.get('status_code')}")
+
+        self._record_usage(response['body'].get('usage'))
+
+        choice = response['body']['choices'][0]
+        verdicts = parse_verdicts(choice['message']['content'], choice.get('finish_reason'), batch_size)
+        for verdict in verdicts.values():
+            verdict['model'] = self.model
+        return verdicts
+
+
+def create_backend(name, client, model, secondary=None):
+    """
+    Создает бэкенд классификации по имени из конфигурации
+
+    Args:
+        name: 'interactive' или 'batch'
+        client: AsyncOpenAI client
+        model: Название модели
+        secondary: (client, model) запасного эндпоинта для хеджирования и failover
+
+    Returns:
+        ClassifierBackend
+    """
+    interactive = InteractiveBackend(client, model, secondary=secondary)
+
+    if name == 'interactive':
+        return interactive
+    if name == 'batch':
+        # Запросы к files/batches не проходят через governor — им возвращаем
+        # встроенные повторы SDK
+        return BatchJobBackend(
+            client.with_options(max_retries=DEFAULT_MAX_RETRIES), model, fallback=interactive
+        )
+
+    raise ValueError(f"Unknown GPT backend: {name}")
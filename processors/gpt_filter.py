@@ -1,46 +1,22 @@
-import json
 import asyncio
+import os
 from openai import AsyncOpenAI
+from processors.negative_filter import negative_filter
+from processors.post_clusterer import post_clusterer
+from processors.post_compactor import post_compactor
+from processors.classification_cache import classification_cache
+from processors.gpt_backends import create_backend
+from processors.gpt_prompt import (
+    PROMPT_VERSION, PROMPT_CACHE_MIN_TOKENS, post_text, static_prefix_tokens, output_tokens_per_post
+)
+from processors.local_classifier import LocalClassifier, NONE_CLASS, sample_label, save_samples
+from utils.normalized_view import VIEW_KEY
+from utils.token_estimator import estimate_tokens
+from config.settings import settings
 from config.logging_config import get_logger
-import os
 
 logger = get_logger(__name__)
 
-SYSTEM_PROMPT = """Ты — фильтр вакансий для видеопродакшена.
-
-Анализируй каждый пост и определи:
-1. Это реальная вакансия? (не спам, не реклама канала, не курсы, не поиск заказов фрилансером)
-2. Позиция одна из: сценарист / редактор (видео/монтажёр) / шеф-редактор?
-3. Сфера: видеопродакшн (реклама, кино, документалки, продакшены, видеоконтент)?
-
-ПОДХОДЯТ:
-- Сценарист для рекламы, кино, видеороликов, YouTube
-- Видеоредактор, монтажёр, редактор видео
-- Шеф-редактор видеопродакшена, главный редактор продакшена
-
-НЕ подходят:
-- SMM-менеджеры, контент-менеджеры, копирайтеры
-- Текстовые/литературные редакторы
-- Журналистика, новостные редакции, блоги
-- Редакторы сайтов, контент-редакторы
-- Курсы, реклама каналов, спам
-- Поиск заказов фрилансерами (не вакансии)
-
-Для каждого поста верни JSON:
-{
-  "vacancies": [
-    {
-      "index": 0,
-      "is_relevant": true/false,
-      "position_type": "сценарист" | "редактор" | "шеф-редактор" | null,
-      "title": "Чистое название позиции",
-      "company": "Компания/проект или null"
-    }
-  ]
-}
-
-Если вакансия НЕ подходит, всё равно укажи is_relevant: false и причину в title."""
-
 
 class GPTVacancyFilter:
     """Фильтрует и обрабатывает вакансии с помощью GPT"""
@@ -49,97 +25,301 @@ class GPTVacancyFilter:
         api_key = os.getenv('OPENAI_API_KEY')
         if not api_key:
             raise ValueError("OPENAI_API_KEY not found in environment")
-        self.client = AsyncOpenAI(api_key=api_key)
-        self.model = "gpt-4o-mini"
-        logger.info(f"GPTVacancyFilter initialized (model: {self.model})")
+        # Повторы после 429 делает gpt_rate_governor, ошибок соединения и 5xx —
+        # InteractiveBackend._create_completion; встроенные отключаем
+        self.client = AsyncOpenAI(api_key=api_key, max_retries=0)
+        self.model = settings.GPT_MODEL
+        self.backend = create_backend(
+            settings.GPT_BACKEND, self.client, self.model,
+            secondary=self._create_secondary(api_key)
+        )
+        self.local_classifier = None
+        self.stats = {}
+        logger.info(f"GPTVacancyFilter initialized (model: {self.model}, backend: {self.backend.name})")
 
-    async def filter_vacancies(self, vacancies, batch_size=15):
+        prefix_tokens = static_prefix_tokens()
+        if prefix_tokens < PROMPT_CACHE_MIN_TOKENS:
+            logger.warning(
+                f"Static prompt prefix is ~{prefix_tokens} tokens, below the "
+                f"{PROMPT_CACHE_MIN_TOKENS}-token minimum for provider prompt caching"
+            )
+
+    def _create_secondary(self, api_key):
+        """
+        Запасной эндпоинт для хеджирования и failover: другая модель
+        и/или OpenAI-совместимый сервер
+
+        Returns:
+            Tuple[AsyncOpenAI, str] or None
+        """
+        if not settings.GPT_FALLBACK_MODEL and not settings.GPT_FALLBACK_BASE_URL:
+            return None
+
+        client = AsyncOpenAI(
+            api_key=settings.GPT_FALLBACK_API_KEY or api_key,
+            base_url=settings.GPT_FALLBACK_BASE_URL or None,
+            max_retries=0
+        )
+        model = settings.GPT_FALLBACK_MODEL or self.model
+        logger.info(f"GPT fallback endpoint: {settings.GPT_FALLBACK_BASE_URL or 'default'} (model: {model})")
+        return client, model
+
+    async def filter_vacancies(self, vacancies, batch_size=None):
         """
         Фильтрует вакансии с помощью GPT
 
         Args:
             vacancies: List[dict] - список вакансий с полями full_text, url, message_id, channel_id
-            batch_size: int - размер батча для одного запроса к GPT
+            batch_size: int - максимальный размер батча для одного запроса к GPT
+                (фактический размер подбирается по бюджету токенов)
 
         Returns:
             List[dict]: Отфильтрованные и обработанные вакансии
         """
+        self.stats = {'candidates': 0, 'cache_hits': 0, 'cache_misses': 0}
+
         if not vacancies:
             return []
 
+        # Заведомые не-вакансии отсекаем локально, не тратя токены
+        if settings.NEGATIVE_FILTER_ENABLED:
+            vacancies = negative_filter.filter_vacancies(vacancies)
+            if not vacancies:
+                return []
+
         logger.info(f"GPT filtering {len(vacancies)} vacancies...")
+        self.stats['candidates'] = len(vacancies)
 
-        filtered = []
-        batches = [vacancies[i:i + batch_size] for i in range(0, len(vacancies), batch_size)]
+        # Репосты одной вакансии классифицируем один раз: дальше работаем
+        # только с представителями кластеров
+        all_vacancies = vacancies
+        if settings.CLUSTERING_ENABLED:
+            clusters = post_clusterer.cluster(all_vacancies)
+            self.stats.update(post_clusterer.stats)
+        else:
+            clusters = [[i] for i in range(len(all_vacancies))]
+        vacancies = [all_vacancies[cluster[0]] for cluster in clusters]
 
-        for batch_idx, batch in enumerate(batches):
-            logger.info(f"Processing GPT batch {batch_idx + 1}/{len(batches)} ({len(batch)} items)")
+        # 1. Вердикты из кеша (одним запросом до батчинга)
+        verdicts = [None] * len(vacancies)
+        cache_keys = []
+        if settings.GPT_CACHE_ENABLED:
+            cache_keys = [
+                classification_cache.make_key(vacancy, self.model, PROMPT_VERSION)
+                for vacancy in vacancies
+            ]
+            # Синхронные запросы к БД — в отдельном потоке, чтобы не блокировать event loop
+            cached = await asyncio.to_thread(classification_cache.lookup, cache_keys)
+            for i, key in enumerate(cache_keys):
+                verdicts[i] = cached.get(key)
 
-            try:
-                results = await self._process_batch(batch)
-                filtered.extend(results)
-            except Exception as e:
-                logger.error(f"Error processing batch {batch_idx + 1}: {e}")
-                continue
+        miss_indices = [i for i, verdict in enumerate(verdicts) if verdict is None]
+        self.stats['cache_hits'] = len(vacancies) - len(miss_indices)
+        self.stats['cache_misses'] = len(miss_indices)
 
-            # Небольшая пауза между батчами
-            if batch_idx < len(batches) - 1:
-                await asyncio.sleep(1)
+        # 2. Уверенные решения локальной модели не требуют запроса к GPT
+        local_predictions = {}
+        if settings.LOCAL_CLASSIFIER_ENABLED:
+            local_predictions = self._apply_local_classifier(vacancies, verdicts, miss_indices)
+            miss_indices = [i for i in miss_indices if verdicts[i] is None]
 
-        logger.info(f"GPT filtering complete: {len(filtered)} relevant vacancies")
+        # 3. В GPT отправляем только оставшиеся посты, без футеров и мусора
+        if settings.POST_COMPACTION_ENABLED:
+            post_compactor.learn_footers(all_vacancies)
+            self.stats.update(post_compactor.compact_vacancies([vacancies[i] for i in miss_indices]))
+
+        batches = self._pack_batches(
+            [vacancies[i] for i in miss_indices],
+            max_batch_size=batch_size or settings.GPT_MAX_BATCH_SIZE
+        )
+        batches = [[miss_indices[i] for i in batch] for batch in batches]
+
+        results = await self.backend.classify_batches(
+            [[vacancies[i] for i in batch_indices] for batch_indices in batches]
+        )
+        self.stats.update(self.backend.stats)
+        self._report_usage()
+
+        # Вердикты группируем по ответившей модели: хедж и failover могут
+        # ответить запасной моделью, ее вердикты не должны попасть под self.model
+        answered = {}
+        for batch_indices, batch_verdicts in zip(batches, results):
+            for idx, verdict in batch_verdicts.items():
+                original_idx = batch_indices[idx]
+                verdicts[original_idx] = verdict
+                answered.setdefault(verdict.get('model', self.model), []).append(original_idx)
+
+        for model, indices in answered.items():
+            if cache_keys:
+                new_entries = {
+                    cache_keys[i] if model == self.model
+                    else classification_cache.make_key(vacancies[i], model, PROMPT_VERSION): verdicts[i]
+                    for i in indices
+                }
+                await asyncio.to_thread(classification_cache.store, new_entries, model, PROMPT_VERSION)
+
+            # Каждый вердикт GPT сохраняем как обучающий пример для локальной модели
+            gpt_verdicts = [(vacancies[i], verdicts[i]) for i in indices]
+            await asyncio.to_thread(save_samples, gpt_verdicts, model, PROMPT_VERSION)
+        self._report_local_agreement(vacancies, verdicts, miss_indices, local_predictions)
+
+        # 4. Вердикт представителя распространяем на весь кластер
+        member_verdicts = [None] * len(all_vacancies)
+        for cluster, verdict in zip(clusters, verdicts):
+            for i in cluster:
+                member_verdicts[i] = verdict
+
+        # 5. Собираем релевантные вакансии в исходном порядке
+        filtered = [
+            self._build_vacancy(original, verdict)
+            for original, verdict in zip(all_vacancies, member_verdicts)
+            if verdict and verdict.get('is_relevant')
+        ]
+
+        hit_rate = self.stats['cache_hits'] / len(vacancies) * 100
+        logger.info(
+            f"GPT filtering complete: {len(filtered)} relevant vacancies "
+            f"(cache hits: {self.stats['cache_hits']}/{len(vacancies)}, {hit_rate:.0f}%)"
+        )
         return filtered
 
-    async def _process_batch(self, batch):
-        """Обрабатывает батч вакансий через GPT"""
-
-        # Формируем текст для GPT
-        posts_text = ""
-        for i, vacancy in enumerate(batch):
-            text = vacancy.get('full_text', '')[:1500]  # Ограничиваем длину
-            posts_text += f"\n--- ПОСТ {i} ---\n{text}\n"
-
-        try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": SYSTEM_PROMPT},
-                    {"role": "user", "content": f"Проанализируй эти посты:\n{posts_text}"}
-                ],
-                response_format={"type": "json_object"},
-                temperature=0.1,
-                max_tokens=2000
+    def _report_usage(self):
+        """Логирует долю входных токенов, взятых провайдером из кеша префикса"""
+        prompt_tokens = self.stats.get('prompt_tokens', 0)
+        if not prompt_tokens:
+            return
+
+        cached_tokens = self.stats.get('cached_tokens', 0)
+        logger.info(
+            f"GPT usage: {prompt_tokens} prompt tokens, {cached_tokens} cached "
+            f"({cached_tokens / prompt_tokens:.0%}), "
+            f"{self.stats.get('completion_tokens', 0)} completion tokens"
+        )
+
+    def _apply_local_classifier(self, vacancies, verdicts, indices):
+        """
+        Каскад перед GPT: посты, в которых локальная модель уверена,
+        получают вердикт без запроса к API
+
+        Returns:
+            Dict[int, str]: Предсказанный класс для неуверенных постов
+                (для подсчета согласия с GPT)
+        """
+        if self.local_classifier is None:
+            self.local_classifier = LocalClassifier.load()
+            if self.local_classifier is None:
+                logger.info("Local classifier is not trained yet, skipping cascade")
+                return {}
+
+        threshold = settings.LOCAL_CLASSIFIER_THRESHOLD
+        uncertain = {}
+        decided = 0
+
+        for i in indices:
+            vacancy = vacancies[i]
+            label, confidence = self.local_classifier.predict(vacancy)
+
+            if confidence >= threshold and label == NONE_CLASS:
+                verdicts[i] = {'is_relevant': False, 'position_type': None,
+                               'title': 'Отклонено локальной моделью', 'company': None}
+                decided += 1
+            elif confidence >= threshold and settings.LOCAL_CLASSIFIER_ACCEPT_POSITIVE:
+                verdicts[i] = {'is_relevant': True, 'position_type': label,
+                               'title': vacancy.get('title'), 'company': vacancy.get('company')}
+                decided += 1
+            else:
+                uncertain[i] = label
+
+        self.stats['local_decisions'] = decided
+        logger.info(
+            f"Local classifier: {decided}/{len(indices)} posts decided locally "
+            f"(threshold={threshold}), {len(uncertain)} sent to GPT"
+        )
+        return uncertain
+
+    def _report_local_agreement(self, vacancies, verdicts, indices, local_predictions):
+        """Доля совпадений локальной модели с GPT на неуверенных постах"""
+        compared = [
+            (local_predictions[i], verdicts[i]) for i in indices
+            if i in local_predictions and verdicts[i] is not None
+        ]
+        if not compared:
+            return
+
+        agreed = sum(
+            1 for label, verdict in compared
+            if label == sample_label(verdict.get('is_relevant'), verdict.get('position_type'))
+        )
+        self.stats['local_agreement'] = round(agreed / len(compared), 3)
+        logger.info(
+            f"Local classifier agreement with GPT: {agreed}/{len(compared)} "
+            f"({self.stats['local_agreement']:.0%}), GPT calls saved on "
+            f"{self.stats.get('local_decisions', 0)} posts"
+        )
+
+    def _pack_batches(self, vacancies, max_batch_size):
+        """
+        Упаковывает посты в батчи по бюджету токенов: входных (текст постов)
+        и ожидаемых выходных (ответ на каждый пост). Короткие посты
+        собираются в крупные батчи, длинные — в мелкие, так что ответ
+        не упирается в max_tokens и не обрезается.
+
+        Args:
+            vacancies: List[dict] - посты
+            max_batch_size: Максимум постов в батче
+
+        Returns:
+            List[List[int]]: Индексы постов по батчам (порядок сохраняется)
+        """
+        input_budget = settings.GPT_BATCH_INPUT_TOKENS
+        output_budget = settings.GPT_BATCH_OUTPUT_TOKENS
+        output_per_post = output_tokens_per_post()
+
+        batches = []
+        current = []
+        current_tokens = 0
+
+        for i, vacancy in enumerate(vacancies):
+            # +10 токенов на разделитель "--- ПОСТ N ---"
+            post_tokens = estimate_tokens(post_text(vacancy)) + 10
+
+            if current and (
+                len(current) >= max_batch_size
+                or current_tokens + post_tokens > input_budget
+                or (len(current) + 1) * output_per_post > output_budget
+            ):
+                batches.append(current)
+                current = []
+                current_tokens = 0
+
+            current.append(i)
+            current_tokens += post_tokens
+
+        if current:
+            batches.append(current)
+
+        if batches:
+            logger.info(
+                f"Packed {len(vacancies)} posts into {len(batches)} GPT batches "
+                f"(avg {len(vacancies) / len(batches):.1f} posts per batch)"
             )
 
-            result_text = response.choices[0].message.content
-            result = json.loads(result_text)
-
-            filtered = []
-            for item in result.get('vacancies', []):
-                idx = item.get('index', 0)
-                if idx >= len(batch):
-                    continue
-
-                if item.get('is_relevant'):
-                    original = batch[idx]
-                    filtered.append({
-                        'title': item.get('title', 'Без названия'),
-                        'company': item.get('company'),
-                        'position_type': item.get('position_type'),
-                        'url': original.get('url'),
-                        'full_text': original.get('full_text'),
-                        'message_id': original.get('message_id'),
-                        'channel_id': original.get('channel_id'),
-                        'date': original.get('date')
-                    })
-
-            return filtered
-
-        except json.JSONDecodeError as e:
-            logger.error(f"JSON parse error: {e}")
-            return []
-        except Exception as e:
-            logger.error(f"GPT API error: {e}")
-            return []
+        return batches
+
+    def _build_vacancy(self, original, verdict):
+        """Собирает итоговую вакансию из исходного поста и вердикта GPT"""
+        return {
+            'title': verdict.get('title') or 'Без названия',
+            'company': verdict.get('company'),
+            'position_type': verdict.get('position_type'),
+            'url': original.get('url'),
+            'full_text': original.get('full_text'),
+            'message_id': original.get('message_id'),
+            'channel_id': original.get('channel_id'),
+            'date': original.get('date'),
+            # Переиспользуем нормализацию текста исходного поста
+            VIEW_KEY: original.get(VIEW_KEY)
+        }
 
 
 # Глобальный экземпляр
@@ -0,0 +1,354 @@
+import json
+import hashlib
+from processors.post_compactor import COMPACT_TEXT_KEY
+from utils.token_estimator import estimate_messages_tokens
+from config.settings import settings
+
+PROMPT_RULES = """Ты — фильтр вакансий для видеопродакшена.
+
+Анализируй каждый пост и определи:
+1. Это реальная вакансия? (не спам, не реклама канала, не курсы, не поиск заказов фрилансером)
+2. Позиция одна из: сценарист / редактор (видео/монтажёр) / шеф-редактор?
+3. Сфера: видеопродакшн (реклама, кино, документалки, продакшены, видеоконтент)?
+
+ПОДХОДЯТ:
+- Сценарист для рекламы, кино, видеороликов, YouTube
+- Видеоредактор, монтажёр, редактор видео
+- Шеф-редактор видеопродакшена, главный редактор продакшена
+
+НЕ подходят:
+- SMM-менеджеры, контент-менеджеры, копирайтеры
+- Текстовые/литературные редакторы
+- Журналистика, новостные редакции, блоги
+- Редакторы сайтов, контент-редакторы
+- Курсы, реклама каналов, спам
+- Поиск заказов фрилансерами (не вакансии)
+
+КАК РАЗБИРАТЬ СПОРНЫЕ СЛУЧАИ:
+- «Редактор» без упоминания видео, монтажа, роликов или продакшена — скорее всего текстовый редактор, не подходит.
+- «Редактор» в продакшене, на YouTube-канале, в студии, на съемках, в постпродакшене — подходит как «редактор».
+- Монтажёр, режиссёр монтажа, видеомонтажёр, motion/видеоредактор — это «редактор».
+- Автор сценариев, сценарист роликов, креативщик, который пишет сценарии для видео, — «сценарист».
+- Шеф-редактор, главный редактор, руководитель редакции видеопродакшена или YouTube-шоу — «шеф-редактор».
+- Пост, где человек предлагает свои услуги («ищу заказы», «возьму проекты», «моё портфолио») — не вакансия.
+- Подборки вакансий из других каналов оценивай по первой подходящей вакансии в посте.
+- Стажировки и проектная работа — тоже вакансии, если позиция и сфера подходят.
+- Если сфера не указана явно, но упоминаются ролики, съемки, YouTube, реклама или кино — считай сферу видеопродакшеном.
+- Title — короткое название позиции без эмодзи, хештегов и зарплаты. Company — название компании, студии или проекта, если оно есть в тексте.
+
+ПРИМЕРЫ:
+
+Пост: «В продакшн Red Frame ищем монтажёра на рекламные ролики, опыт от 2 лет, Premiere/DaVinci, удаленно»
+Вердикт: подходит, редактор, title «Монтажёр рекламных роликов», company «Red Frame».
+
+Пост: «Ищем сценариста для YouTube-шоу про путешествия, 4 выпуска в месяц, оплата за выпуск»
+Вердикт: подходит, сценарист, title «Сценарист YouTube-шоу», company null.
+
+Пост: «Студия документального кино ищет шеф-редактора: руководство командой редакторов, выпуск фильмов»
+Вердикт: подходит, шеф-редактор, title «Шеф-редактор документального кино», company null.
+
+Пост: «Требуется редактор в новостное издание, вычитка и правка текстов, график 5/2»
+Вердикт: не подходит, title «Текстовый редактор в СМИ».
+
+Пост: «Ищем SMM-менеджера, который будет вести наш Instagram и снимать Reels»
+Вердикт: не подходит, title «SMM-менеджер».
+
+Пост: «Курс "Монтаж с нуля до PRO" — старт потока в понедельник, успейте записаться со скидкой»
+Вердикт: не подходит, title «Реклама курса».
+
+Пост: «Я видеомонтажёр, 5 лет опыта, беру проекты на монтаж, портфолио в профиле»
+Вердикт: не подходит, title «Фрилансер ищет заказы».
+
+Пост: «Копирайтер для лендингов и рассылок, оплата за знак»
+Вердикт: не подходит, title «Копирайтер».
+
+Пост: «Онлайн-школа ищет видеоредактора для монтажа уроков и коротких роликов в соцсети»
+Вердикт: подходит, редактор, title «Видеоредактор образовательных роликов», company null.
+
+Пост: «Подписывайтесь на наш канал с вакансиями в медиа! Каждый день новые предложения»
+Вердикт: не подходит, title «Реклама канала».
+
+Пост: «Агентство Brandfilm: нужен автор сценариев рекламных роликов для федеральных брендов, тестовое задание обязательно»
+Вердикт: подходит, сценарист, title «Сценарист рекламных роликов», company «Brandfilm».
+
+Пост: «В сериальный проект на ТНТ нужен главный редактор постпродакшена, опыт работы с монтажными группами»
+Вердикт: подходит, шеф-редактор, title «Главный редактор постпродакшена», company «ТНТ».
+
+Пост: «Ищем редактора сайта: наполнение каталога, SEO-тексты, работа в WordPress»
+Вердикт: не подходит, title «Редактор сайта».
+
+Пост: «Нужен контент-менеджер для Telegram-канала бренда одежды, публикации и сторис»
+Вердикт: не подходит, title «Контент-менеджер».
+
+Пост: «Reels-мейкер и монтажёр коротких вертикальных видео для блогера-миллионника, полная занятость»
+Вердикт: подходит, редактор, title «Монтажёр вертикальных видео», company null.
+
+Пост: «Пишу сценарии для рекламы и YouTube, открыт к сотрудничеству, кейсы по запросу»
+Вердикт: не подходит, title «Фрилансер ищет заказы».
+
+Пост: «Литературный редактор в издательство детской книги, правка рукописей»
+Вердикт: не подходит, title «Литературный редактор».
+
+Пост: «Вакансии недели: 1) Сценарист в продакшн Big Picture 2) Дизайнер 3) SMM»
+Вердикт: подходит, сценарист, title «Сценарист», company «Big Picture».
+
+ФОРМАТ ОТВЕТА.
+
+"""
+
+# Полный формат: вердикт по каждому посту, включая неподходящие
+FULL_FORMAT = """Для каждого поста верни JSON:
+{
+  "vacancies": [
+    {
+      "index": 0,
+      "is_relevant": true/false,
+      "position_type": "сценарист" | "редактор" | "шеф-редактор" | null,
+      "title": "Чистое название позиции",
+      "company": "Компания/проект или null"
+    }
+  ]
+}
+
+Если вакансия НЕ подходит, всё равно укажи is_relevant: false и причину в title."""
+
+# Компактный формат: только подходящие посты с короткими кодами позиций,
+# остальные считаются неподходящими. Выходных токенов в разы меньше.
+COMPACT_FORMAT = """Верни JSON только с ПОДХОДЯЩИМИ постами:
+{
+  "relevant": [
+    {"i": 0, "p": "S" | "E" | "C", "t": "Чистое название позиции", "c": "Компания/проект или null"}
+  ]
+}
+
+Коды позиций: S — сценарист, E — редактор (видео/монтажёр), C — шеф-редактор.
+Неподходящие посты НЕ включай. Если подходящих нет, верни {"relevant": []}."""
+
+SYSTEM_PROMPT = PROMPT_RULES + FULL_FORMAT
+COMPACT_SYSTEM_PROMPT = PROMPT_RULES + COMPACT_FORMAT
+
+RESPONSE_MODES = ('full', 'compact')
+POSITION_CODES = {'S': 'сценарист', 'E': 'редактор', 'C': 'шеф-редактор'}
+
+# JSON Schema ответа для structured outputs (strict-режим требует
+# перечислить все поля в required и запретить дополнительные)
+RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "vacancies": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "index": {"type": "integer"},
+                    "is_relevant": {"type": "boolean"},
+                    "position_type": {
+                        "type": ["string", "null"],
+                        "enum": ["сценарист", "редактор", "шеф-редактор", None]
+                    },
+                    "title": {"type": "string"},
+                    "company": {"type": ["string", "null"]}
+                },
+                "required": ["index", "is_relevant", "position_type", "title", "company"],
+                "additionalProperties": False
+            }
+        }
+    },
+    "required": ["vacancies"],
+    "additionalProperties": False
+}
+
+COMPACT_RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "relevant": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "i": {"type": "integer"},
+                    "p": {"type": "string", "enum": list(POSITION_CODES)},
+                    "t": {"type": "string"},
+                    "c": {"type": ["string", "null"]}
+                },
+                "required": ["i", "p", "t", "c"],
+                "additionalProperties": False
+            }
+        }
+    },
+    "required": ["relevant"],
+    "additionalProperties": False
+}
+
+
+def response_mode(mode=None):
+    """Режим ответа GPT: явно заданный или из настроек"""
+    mode = mode or settings.GPT_RESPONSE_MODE
+    if mode not in RESPONSE_MODES:
+        raise ValueError(f"Unknown GPT response mode: {mode}")
+    return mode
+
+
+def system_prompt(mode=None):
+    """Системный промпт для режима ответа"""
+    return COMPACT_SYSTEM_PROMPT if response_mode(mode) == 'compact' else SYSTEM_PROMPT
+
+
+# Версия промпта для ключей кеша: при изменении промпта старые вердикты не используются
+PROMPT_VERSION = hashlib.sha256(system_prompt().encode('utf-8')).hexdigest()[:16]
+
+# Провайдер кеширует префикс запроса, только если он не короче 1024 токенов.
+# Статический префикс — системное сообщение и начало пользовательского —
+# должен быть побайтно одинаковым во всех запросах, поэтому переменная
+# часть (посты) всегда идет в самом конце.
+PROMPT_CACHE_MIN_TOKENS = 1024
+USER_PREFIX = "Проанализируй эти посты:\n"
+
+
+def post_text(vacancy):
+    """Текст поста, отправляемый в GPT (сжатый, если есть, с ограничением длины)"""
+    text = vacancy.get(COMPACT_TEXT_KEY) or vacancy.get('full_text', '')
+    return text[:settings.GPT_POST_MAX_CHARS]
+
+
+def build_messages(batch, mode=None):
+    """
+    Формирует сообщения Chat API для батча постов
+
+    Args:
+        batch: List[dict] - посты
+        mode: Режим ответа ('full' или 'compact'), по умолчанию из настроек
+
+    Returns:
+        List[dict]: messages для chat.completions
+    """
+    posts_text = ""
+    for i, vacancy in enumerate(batch):
+        posts_text += f"\n--- ПОСТ {i} ---\n{post_text(vacancy)}\n"
+
+    return [
+        {"role": "system", "content": system_prompt(mode)},
+        {"role": "user", "content": USER_PREFIX + posts_text}
+    ]
+
+
+def static_prefix_tokens(mode=None):
+    """Оценка длины статического префикса запроса в токенах"""
+    return estimate_messages_tokens([
+        {"role": "system", "content": system_prompt(mode)},
+        {"role": "user", "content": USER_PREFIX},
+    ])
+
+
+def output_tokens_per_post(mode=None):
+    """Ожидаемое число выходных токенов на пост (для упаковки батчей)"""
+    if response_mode(mode) == 'compact':
+        return settings.GPT_COMPACT_OUTPUT_TOKENS_PER_POST
+    return settings.GPT_OUTPUT_TOKENS_PER_POST
+
+
+def response_format(mode=None):
+    """Формат ответа: strict JSON Schema или обычный JSON-объект"""
+    if settings.GPT_STRUCTURED_OUTPUT:
+        compact = response_mode(mode) == 'compact'
+        return {
+            "type": "json_schema",
+            "json_schema": {
+                "name": "vacancy_filter_compact" if compact else "vacancy_filter",
+                "strict": True,
+                "schema": COMPACT_RESPONSE_SCHEMA if compact else RESPONSE_SCHEMA
+            }
+        }
+    return {"type": "json_object"}
+
+
+def build_request_body(batch, model, mode=None):
+    """Тело запроса к /v1/chat/completions для батча постов"""
+    return {
+        "model": model,
+        "messages": build_messages(batch, mode),
+        "response_format": response_format(mode),
+        "temperature": 0.1,
+        "max_tokens": settings.GPT_MAX_OUTPUT_TOKENS,
+    }
+
+
+def parse_verdicts(content, finish_reason, batch_size, mode=None):
+    """
+    Разбирает ответ GPT в вердикты по постам
+
+    Args:
+        content: Текст ответа модели
+        finish_reason: finish_reason из ответа
+        batch_size: Количество постов в батче
+        mode: Режим ответа ('full' или 'compact'), по умолчанию из настроек
+
+    Returns:
+        Dict[int, dict]: {индекс поста в батче: вердикт}
+
+    Raises:
+        ValueError: ответ обрезан, не содержит вердиктов или не соответствует схеме
+        json.JSONDecodeError: ответ не является JSON
+    """
+    if finish_reason == 'length':
+        raise ValueError(f"GPT response truncated by max_tokens ({batch_size} posts in batch)")
+
+    result = json.loads(content)
+
+    if response_mode(mode) == 'compact':
+        return _parse_compact(result, batch_size)
+
+    verdicts = {}
+    for item in result.get('vacancies', []):
+        idx = item.get('index', 0)
+        if not isinstance(idx, int) or not 0 <= idx < batch_size:
+            continue
+
+        is_relevant = bool(item.get('is_relevant'))
+        verdicts[idx] = {
+            'is_relevant': is_relevant,
+            'position_type': item.get('position_type') if is_relevant else None,
+            'title': item.get('title', 'Без названия'),
+            'company': item.get('company'),
+        }
+
+    if not verdicts:
+        raise ValueError("GPT response contains no verdicts")
+
+    return verdicts
+
+
+def _parse_compact(result, batch_size):
+    """
+    Разбирает компактный ответ: перечислены только подходящие посты,
+    остальные считаются неподходящими
+
+    Raises:
+        ValueError: ответ не соответствует компактной схеме
+    """
+    if not isinstance(result, dict) or not isinstance(result.get('relevant'), list):
+        raise ValueError("Compact GPT response has no 'relevant' list")
+
+    verdicts = {
+        idx: {'is_relevant': False, 'position_type': None, 'title': 'Не подходит', 'company': None}
+        for idx in range(batch_size)
+    }
+
+    for item in result['relevant']:
+        if not isinstance(item, dict):
+            raise ValueError(f"Invalid item in compact GPT response: {item!r}")
+
+        idx = item.get('i')
+        position_type = POSITION_CODES.get(item.get('p'))
+        if not isinstance(idx, int) or not 0 <= idx < batch_size or position_type is None:
+            raise ValueError(f"Invalid item in compact GPT response: {item!r}")
+
+        company = item.get('c')
+        verdicts[idx] = {
+            'is_relevant': True,
+            'position_type': position_type,
+            'title': item.get('t') or 'Без названия',
+            'company': company if isinstance(company, str) and company.lower() != 'null' else None,
+        }
+
+    return verdicts
@@ -0,0 +1,149 @@
+import asyncio
+import re
+import time
+from collections import deque
+from config.settings import settings
+from config.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+def parse_reset_duration(value):
+    """
+    Парсит длительность из заголовков OpenAI x-ratelimit-reset-*
+    ("20ms", "1s", "6m0s", "1h2m3.5s")
+
+    Returns:
+        float or None: Секунды
+    """
+    if not value:
+        return None
+
+    try:
+        return float(value)
+    except ValueError:
+        pass
+
+    parts = re.findall(r'([\d.]+)(ms|h|m|s)', value)
+    if not parts:
+        return None
+
+    multipliers = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600}
+    return sum(float(amount) * multipliers[unit] for amount, unit in parts)
+
+
+class GPTRateGovernor:
+    """
+    Ограничитель запросов к OpenAI API:
+    - скользящее окно requests/tokens per minute
+    - учет заголовков x-ratelimit-* из ответов
+    - общая пауза для всех запросов после 429 (exponential backoff)
+    """
+
+    WINDOW_SECONDS = 60
+
+    def __init__(self, rpm_limit=None, tpm_limit=None):
+        """
+        Args:
+            rpm_limit: Максимум запросов в минуту
+            tpm_limit: Максимум токенов в минуту
+        """
+        self.rpm_limit = rpm_limit or settings.GPT_RPM_LIMIT
+        self.tpm_limit = tpm_limit or settings.GPT_TPM_LIMIT
+        self.requests = deque()  # [(timestamp, tokens)]
+        self.window_tokens = 0
+        self.paused_until = 0
+        self.lock = asyncio.Lock()
+
+        logger.info(
+            f"GPTRateGovernor initialized: rpm={self.rpm_limit}, tpm={self.tpm_limit}"
+        )
+
+    def _prune(self, now):
+        """Удаляет из окна запросы старше минуты"""
+        while self.requests and now - self.requests[0][0] >= self.WINDOW_SECONDS:
+            _, tokens = self.requests.popleft()
+            self.window_tokens -= tokens
+
+    async def acquire(self, estimated_tokens):
+        """
+        Ждет, пока запрос с указанным числом токенов можно отправить
+
+        Args:
+            estimated_tokens: Оценка токенов запроса (вход + максимум выхода)
+        """
+        # Запрос больше лимита целиком все равно должен пройти
+        estimated_tokens = min(estimated_tokens, self.tpm_limit)
+
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self._prune(now)
+
+                wait_time = self.paused_until - now
+                if wait_time <= 0:
+                    if len(self.requests) >= self.rpm_limit:
+                        wait_time = self.requests[0][0] + self.WINDOW_SECONDS - now
+                    elif self.window_tokens + estimated_tokens > self.tpm_limit:
+                        wait_time = self.requests[0][0] + self.WINDOW_SECONDS - now
+
+                if wait_time <= 0:
+                    self.requests.append((now, estimated_tokens))
+                    self.window_tokens += estimated_tokens
+                    return
+
+                logger.debug(f"GPT rate limit: waiting {wait_time:.2f}s")
+                await asyncio.sleep(wait_time)
+
+    def pause(self, seconds):
+        """Приостанавливает все запросы на указанное время"""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def update_from_headers(self, headers):
+        """
+        Учитывает заголовки x-ratelimit-* из ответа API: если лимит исчерпан,
+        ставит паузу до его сброса
+
+        Args:
+            headers: Заголовки HTTP-ответа
+        """
+        if not headers:
+            return
+
+        for kind in ('requests', 'tokens'):
+            remaining = headers.get(f'x-ratelimit-remaining-{kind}')
+            if remaining is None:
+                continue
+
+            try:
+                remaining = int(remaining)
+            except ValueError:
+                continue
+
+            if remaining <= 0:
+                reset = parse_reset_duration(headers.get(f'x-ratelimit-reset-{kind}'))
+                if reset:
+                    logger.info(f"GPT {kind} limit exhausted, pausing for {reset:.2f}s")
+                    self.pause(reset)
+
+    def backoff(self, attempt, retry_after=None):
+        """
+        Пауза после ответа 429
+
+        Args:
+            attempt: Номер попытки (с 0)
+            retry_after: Значение заголовка retry-after (секунды), если есть
+
+        Returns:
+            float: Длительность паузы
+        """
+        delay = parse_reset_duration(retry_after) if retry_after else None
+        if not delay:
+            delay = min(settings.GPT_BACKOFF_BASE * (2 ** attempt), settings.GPT_BACKOFF_MAX)
+
+        self.pause(delay)
+        return delay
+
+
+# Глобальный экземпляр
+gpt_rate_governor = GPTRateGovernor()
@@ -0,0 +1,296 @@
+import json
+import math
+import os
+import random
+import zlib
+from database.models import ClassificationSample
+from database.connection import get_session, close_session
+from utils.normalized_view import get_view
+from config.settings import settings
+from config.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Класс для нерелевантных постов; остальные классы — типы позиций
+NONE_CLASS = 'none'
+CLASSES = [NONE_CLASS, 'сценарист', 'редактор', 'шеф-редактор']
+
+
+def get_model_path():
+    """Путь к файлу модели (относительные пути — от корня проекта)"""
+    path = settings.LOCAL_CLASSIFIER_PATH
+    if not os.path.isabs(path):
+        base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        path = os.path.join(base_dir, path)
+    return path
+
+
+class LocalClassifier:
+    """
+    Локальная CPU-модель, дистиллированная из сохраненных вердиктов GPT:
+    хешированные признаки (слова и биграммы нормализованного текста)
+    и мультиклассовая логистическая регрессия на чистом Python.
+
+    Классы: 'none' (не подходит) и три типа позиций.
+    """
+
+    # Сколько первых токенов поста учитывать
+    MAX_TOKENS = 400
+
+    def __init__(self, n_features=2 ** 18):
+        self.n_features = n_features
+        self.weights = {cls: {} for cls in CLASSES}  # разреженные веса {feature: w}
+        self.bias = {cls: 0.0 for cls in CLASSES}
+        self.is_trained = False
+
+    def _features_from_tokens(self, tokens):
+        """Хеширует слова и биграммы в индексы признаков (crc32 стабилен между запусками)"""
+        tokens = tokens[:self.MAX_TOKENS]
+        grams = [f"w:{token}" for token in tokens]
+        grams += [f"b:{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        return {zlib.crc32(gram.encode('utf-8')) % self.n_features for gram in grams}
+
+    def features(self, vacancy_data):
+        """Признаки поста"""
+        return self._features_from_tokens(get_view(vacancy_data).tokens)
+
+    def _probabilities(self, features):
+        """Softmax по классам для набора признаков"""
+        scale = 1 / math.sqrt(len(features)) if features else 0.0
+        scores = {
+            cls: self.bias[cls] + scale * sum(self.weights[cls].get(f, 0.0) for f in features)
+            for cls in CLASSES
+        }
+        max_score = max(scores.values())
+        exps = {cls: math.exp(score - max_score) for cls, score in scores.items()}
+        total = sum(exps.values())
+        return {cls: value / total for cls, value in exps.items()}
+
+    def predict_proba(self, vacancy_data):
+        """
+        Args:
+            vacancy_data: dict с полем full_text
+
+        Returns:
+            Dict[str, float]: Вероятность каждого класса
+        """
+        return self._probabilities(self.features(vacancy_data))
+
+    def predict(self, vacancy_data):
+        """
+        Returns:
+            Tuple[str, float]: Класс с максимальной вероятностью и сама вероятность
+        """
+        probabilities = self.predict_proba(vacancy_data)
+        label = max(probabilities, key=probabilities.get)
+        return label, probabilities[label]
+
+    def train(self, samples, epochs=8, learning_rate=0.5, l2=1e-6, seed=42):
+        """
+        Обучение SGD по размеченным примерам
+
+        Args:
+            samples: List[Tuple[str, str]] - (текст поста, класс)
+            epochs: Количество проходов по данным
+            learning_rate: Начальный шаг SGD
+            l2: Коэффициент L2-регуляризации
+        """
+        rng = random.Random(seed)
+        data = [
+            (self.features({'full_text': text}), label)
+            for text, label in samples
+            if label in CLASSES
+        ]
+
+        for epoch in range(epochs):
+            rng.shuffle(data)
+            rate = learning_rate / (1 + epoch)
+
+            for features, label in data:
+                if not features:
+                    continue
+
+                probabilities = self._probabilities(features)
+                scale = 1 / math.sqrt(len(features))
+
+                for cls in CLASSES:
+                    gradient = probabilities[cls] - (1.0 if cls == label else 0.0)
+                    if abs(gradient) < 1e-6:
+                        continue
+
+                    class_weights = self.weights[cls]
+                    for f in features:
+                        w = class_weights.get(f, 0.0)
+                        class_weights[f] = w - rate * (gradient * scale + l2 * w)
+                    self.bias[cls] -= rate * gradient
+
+        self.is_trained = True
+
+    def evaluate(self, samples):
+        """
+        Returns:
+            float: Доля верных предсказаний на примерах (текст, класс)
+        """
+        if not samples:
+            return 0.0
+
+        correct = sum(
+            1 for text, label in samples
+            if self.predict({'full_text': text})[0] == label
+        )
+        return correct / len(samples)
+
+    def save(self, path=None):
+        """Сохраняет модель в JSON"""
+        path = path or get_model_path()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'n_features': self.n_features,
+                'bias': self.bias,
+                'weights': {
+                    cls: {str(k): round(v, 6) for k, v in weights.items() if abs(v) > 1e-6}
+                    for cls, weights in self.weights.items()
+                },
+            }, f, ensure_ascii=False)
+
+        logger.info(f"Local classifier saved to {path}")
+
+    @classmethod
+    def load(cls, path=None):
+        """
+        Загружает модель из JSON
+
+        Returns:
+            LocalClassifier or None: None, если модель еще не обучена
+        """
+        path = path or get_model_path()
+        if not os.path.exists(path):
+            return None
+
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+
+        model = cls(n_features=data['n_features'])
+        model.bias = {name: data['bias'].get(name, 0.0) for name in CLASSES}
+        model.weights = {
+            name: {int(k): v for k, v in data['weights'].get(name, {}).items()}
+            for name in CLASSES
+        }
+        model.is_trained = True
+        return model
+
+
+def sample_label(is_relevant, position_type):
+    """Класс для обучения по вердикту GPT"""
+    if is_relevant and position_type in CLASSES:
+        return position_type
+    return NONE_CLASS
+
+
+def save_samples(samples, model, prompt_version):
+    """
+    Сохраняет вердикты GPT вместе с входным текстом (обучающие данные).
+    Хранятся только последние LOCAL_CLASSIFIER_MAX_SAMPLES примеров.
+
+    Args:
+        samples: List[Tuple[dict, dict]] - (пост, вердикт)
+        model: Название модели GPT
+        prompt_version: Версия SYSTEM_PROMPT
+    """
+    if not samples:
+        return 0
+
+    session = get_session()
+    try:
+        for vacancy, verdict in samples:
+            session.add(ClassificationSample(
+                text=vacancy.get('full_text', ''),
+                is_relevant=bool(verdict.get('is_relevant')),
+                position_type=verdict.get('position_type'),
+                model=model,
+                prompt_version=prompt_version,
+            ))
+        session.flush()
+        pruned = _prune_samples(session, settings.LOCAL_CLASSIFIER_MAX_SAMPLES)
+        session.commit()
+        logger.info(
+            f"Saved {len(samples)} GPT verdicts as classifier training samples"
+            + (f", pruned {pruned} oldest" if pruned else "")
+        )
+        return len(samples)
+
+    except Exception as e:
+        session.rollback()
+        logger.warning(f"Error saving classifier samples: {e}")
+        return 0
+    finally:
+        close_session(session)
+
+
+def _prune_samples(session, max_samples):
+    """
+    Удаляет самые старые обучающие примеры сверх max_samples
+
+    Returns:
+        int: Количество удаленных примеров
+    """
+    if max_samples <= 0:
+        return 0
+
+    # id последнего примера, который еще помещается в лимит (поиск по первичному ключу)
+    boundary = session.query(ClassificationSample.id).order_by(
+        ClassificationSample.id.desc()
+    ).offset(max_samples - 1).limit(1).scalar()
+    if boundary is None:
+        return 0
+
+    return session.query(ClassificationSample).filter(
+        ClassificationSample.id < boundary
+    ).delete(synchronize_session=False)
+
+
+def train_from_history(min_samples=200, holdout=0.2):
+    """
+    Обучает локальную модель на всех сохраненных вердиктах GPT и сохраняет ее
+
+    Args:
+        min_samples: Минимальное количество примеров для обучения
+        holdout: Доля примеров для оценки точности
+
+    Returns:
+        dict: Статистика обучения
+    """
+    session = get_session()
+    try:
+        rows = session.query(
+            ClassificationSample.text,
+            ClassificationSample.is_relevant,
+            ClassificationSample.position_type
+        ).all()
+    finally:
+        close_session(session)
+
+    samples = [(text, sample_label(is_relevant, position_type)) for text, is_relevant, position_type in rows if text]
+    logger.info(f"Loaded {len(samples)} classifier training samples")
+
+    if len(samples) < min_samples:
+        logger.warning(f"Not enough samples to train local classifier ({len(samples)} < {min_samples})")
+        return {'samples': len(samples), 'trained': False}
+
+    random.Random(42).shuffle(samples)
+    split = int(len(samples) * (1 - holdout))
+    train_samples, test_samples = samples[:split], samples[split:]
+
+    model = LocalClassifier()
+    model.train(train_samples)
+    accuracy = model.evaluate(test_samples)
+    logger.info(f"Local classifier holdout accuracy: {accuracy:.3f} on {len(test_samples)} samples")
+
+    # Финальная модель обучается на всех данных
+    model = LocalClassifier()
+    model.train(samples)
+    model.save()
+
+    return {'samples': len(samples), 'trained': True, 'holdout_accuracy': accuracy}
@@ -0,0 +1,115 @@
+import re
+from utils.normalized_view import get_view
+from config.settings import settings
+from config.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class NegativeFilter:
+    """
+    Дешевый локальный классификатор заведомых «не-вакансий»:
+    курсы, реклама каналов, промокоды, фрилансеры в поиске заказов.
+
+    Каждое правило добавляет вес к уверенности, что пост не вакансия,
+    признаки настоящей вакансии этот вес уменьшают. Пост отсеивается,
+    только если итоговая уверенность не ниже порога.
+    """
+
+    # (название правила, паттерн, вес)
+    NEGATIVE_RULES = [
+        ('promo_code', r'промокод|promo\s?code|по коду|скидк[аиу]\s+\d+\s?%', 0.5),
+        ('course', r'\bкурс(?:ы|а|ов|е|ах)?\b|обучени[ея] с нуля|научим|научитесь|интенсив|мастер-класс', 0.5),
+        ('webinar', r'вебинар|марафон|бесплатн(?:ый|ого) урок', 0.4),
+        ('freelancer', r'ищу (?:заказ|работу|проект|клиент)|возьму (?:заказ|проект)|беру (?:заказ|проект)'
+                       r'|принимаю заказ|открыт(?:а)? для (?:предложений|сотрудничества)', 0.7),
+        ('self_portfolio', r'мо[её] портфолио|мои работы|портфолио (?:в|по ссылке в) профиле', 0.5),
+        ('subscribe_call', r'подписывайтесь|подпишись|подпишитесь|подписаться на канал', 0.3),
+        ('channel_ad', r'#реклама|на правах рекламы|\berid\b|реклама\.\s*$|переходи(?:те)? по ссылке', 0.6),
+    ]
+
+    # Признаки настоящей вакансии (каждый снижает уверенность)
+    VACANCY_MARKERS = re.compile(
+        r'ваканси|требуется|ищем|в команду|зарплат|з/п|оплата|обязанност|требовани|условия'
+    )
+    VACANCY_MARKER_WEIGHT = 0.3
+
+    def __init__(self, threshold=None):
+        """
+        Args:
+            threshold: Порог уверенности (0-1), начиная с которого пост отсеивается
+        """
+        self.threshold = settings.NEGATIVE_FILTER_THRESHOLD if threshold is None else threshold
+        self.rules = [
+            (name, re.compile(pattern, re.MULTILINE), weight)
+            for name, pattern, weight in self.NEGATIVE_RULES
+        ]
+        self.weights = {name: weight for name, _, weight in self.NEGATIVE_RULES}
+        self.stats = {}
+
+    def score(self, vacancy_data):
+        """
+        Оценивает уверенность, что пост НЕ является вакансией
+
+        Args:
+            vacancy_data: dict с полями title, full_text
+
+        Returns:
+            Tuple[float, List[str]]: Уверенность (0-1) и сработавшие правила
+        """
+        text = get_view(vacancy_data).text_lower
+
+        hits = [name for name, pattern, weight in self.rules if pattern.search(text)]
+        if not hits:
+            return 0.0, hits
+
+        confidence = sum(self.weights[name] for name in hits)
+        confidence -= self.VACANCY_MARKER_WEIGHT * len(set(self.VACANCY_MARKERS.findall(text)))
+
+        return max(0.0, min(1.0, confidence)), hits
+
+    def filter_vacancies(self, vacancies):
+        """
+        Отсеивает посты, которые с уверенностью не являются вакансиями
+
+        Args:
+            vacancies: List[dict] - посты-кандидаты
+
+        Returns:
+            List[dict]: Посты, которые нужно отправить в GPT
+        """
+        self.stats = {
+            'total': len(vacancies),
+            'rejected': 0,
+            'rule_hits': {name: 0 for name, _, _ in self.NEGATIVE_RULES},
+        }
+        passed = []
+
+        for vacancy in vacancies:
+            confidence, hits = self.score(vacancy)
+            for name in hits:
+                self.stats['rule_hits'][name] += 1
+
+            if confidence >= self.threshold:
+                self.stats['rejected'] += 1
+                logger.debug(
+                    f"Negative filter rejected (confidence={confidence:.2f}, rules={hits}): "
+                    f"{vacancy.get('title', '')[:50]}"
+                )
+                continue
+
+            passed.append(vacancy)
+
+        hits_summary = ', '.join(
+            f"{name}={count}" for name, count in self.stats['rule_hits'].items() if count
+        )
+        logger.info(
+            f"Negative filter: {self.stats['rejected']}/{len(vacancies)} rejected "
+            f"(threshold={self.threshold}; hits: {hits_summary or 'none'})"
+        )
+
+        return passed
+
+
+# Глобальный экземпляр
+negative_filter = NegativeFilter()
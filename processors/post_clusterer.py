@@ -0,0 +1,102 @@
+from collections import defaultdict
+from utils.normalized_view import get_view
+from utils.similarity import MinHasher, shingles, jaccard, lsh_band_keys
+from config.settings import settings
+from config.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class PostClusterer:
+    """
+    Группирует одинаковые и слегка отредактированные посты (кросспостинг
+    одной вакансии в разные каналы), чтобы классифицировать в GPT только
+    одного представителя каждой группы.
+
+    Кандидаты находятся через MinHash LSH по шинглам нормализованного
+    текста, затем подтверждаются точным коэффициентом Жаккара.
+    """
+
+    def __init__(self, threshold=None, num_perm=64, bands=16, shingle_size=3):
+        """
+        Args:
+            threshold: Минимальный коэффициент Жаккара для объединения постов
+            num_perm: Длина MinHash-сигнатуры
+            bands: Количество LSH-полос
+            shingle_size: Длина шингла в словах
+        """
+        self.threshold = settings.CLUSTER_SIMILARITY_THRESHOLD if threshold is None else threshold
+        self.hasher = MinHasher(num_perm=num_perm)
+        self.bands = bands
+        self.shingle_size = shingle_size
+        self.stats = {}
+
+    def cluster(self, vacancies):
+        """
+        Разбивает посты на кластеры почти-дубликатов
+
+        Args:
+            vacancies: List[dict] - посты
+
+        Returns:
+            List[List[int]]: Индексы постов по кластерам; первый индекс —
+                представитель (самый длинный текст), кластеры упорядочены
+                по первому вхождению
+        """
+        shingle_sets = [
+            shingles(get_view(vacancy).tokens, self.shingle_size) for vacancy in vacancies
+        ]
+
+        # Union-find по парам, совпавшим хотя бы в одной LSH-полосе
+        parent = list(range(len(vacancies)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        buckets = defaultdict(list)
+        for i, shingle_set in enumerate(shingle_sets):
+            if not shingle_set:
+                continue
+            signature = self.hasher.signature(shingle_set)
+            for band, key in enumerate(lsh_band_keys(signature, self.bands)):
+                buckets[(band, key)].append(i)
+
+        checked = set()
+        for members in buckets.values():
+            for pos, a in enumerate(members):
+                for b in members[pos + 1:]:
+                    if (a, b) in checked or find(a) == find(b):
+                        continue
+                    checked.add((a, b))
+
+                    if jaccard(shingle_sets[a], shingle_sets[b]) >= self.threshold:
+                        parent[find(b)] = find(a)
+
+        groups = defaultdict(list)
+        for i in range(len(vacancies)):
+            groups[find(i)].append(i)
+
+        clusters = []
+        for members in sorted(groups.values(), key=lambda m: m[0]):
+            representative = max(members, key=lambda i: len(vacancies[i].get('full_text') or ''))
+            clusters.append([representative] + [i for i in members if i != representative])
+
+        clustered_posts = sum(len(c) for c in clusters if len(c) > 1)
+        self.stats = {
+            'posts': len(vacancies),
+            'clusters': len(clusters),
+            'clustered_posts': clustered_posts,
+        }
+        logger.info(
+            f"Clustering: {len(vacancies)} posts -> {len(clusters)} clusters "
+            f"({clustered_posts} posts in multi-post clusters)"
+        )
+
+        return clusters
+
+
+# Глобальный экземпляр
+post_clusterer = PostClusterer()
@@ -0,0 +1,183 @@
+import re
+from collections import defaultdict
+from processors.prescreen import PreScreen
+from utils.text_utils import normalize_text
+from utils.token_estimator import estimate_tokens
+from config.settings import settings
+from config.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Ключ в словаре вакансии, под которым хранится сжатый текст для GPT
+COMPACT_TEXT_KEY = '_gpt_text'
+
+# Эмодзи, пиктограммы и связанные с ними модификаторы
+_EMOJI_RE = re.compile(
+    '[\U0001F000-\U0001FAFF\u2600-\u27BF\u2B00-\u2BFF\u2190-\u21FF'
+    '\u25A0-\u25FF\uFE0F\u200D\u20E3]+'
+)
+_HASHTAG_LINE_RE = re.compile(r'^(?:#[\w\-]+[\s,.;]*)+$')
+# Строка только с контактами: необязательная подпись и @username, ссылки, почта, телефоны
+_CONTACT_LINE_RE = re.compile(
+    r'^(?:(?:контакты|контакт|связь|пишите|писать|резюме|отклики?|откликнуться|'
+    r'тг|telegram|телеграм|e-?mail|почта)\b[^:@\w]*:?\s*)?'
+    r'(?:(?:@\w+|https?://\S+|t\.me/\S+|[\w.+-]+@[\w-]+\.[\w.]+|\+?\d[\d\s()\-]{8,}\d)[\s,;]*)+$',
+    re.IGNORECASE
+)
+_SPACES_RE = re.compile(r'[ \t\u00A0]+')
+
+
+class PostCompactor:
+    """
+    Сжимает текст поста перед отправкой в GPT:
+    - убирает повторяющиеся футеры канала (выучиваются по повторам в конце постов)
+    - убирает эмодзи, строки из одних хештегов и строки из одних контактов
+    - ставит строки с названием роли и компании в начало
+
+    Классификация от этого не страдает, а входных токенов становится меньше.
+    """
+
+    # Сколько последних строк поста рассматривать как возможный футер
+    FOOTER_MAX_LINES = 5
+
+    ROLE_STEMS = PreScreen.SCRIPTWRITER_STEMS + PreScreen.EDITOR_STEMS + ['шеф', 'вакансия', 'ищем', 'требуется']
+    COMPANY_STEMS = ['компани', 'студи', 'продакшн', 'production', 'агентств', 'ооо', 'холдинг', '«']
+
+    def __init__(self, footer_min_repeats=None):
+        """
+        Args:
+            footer_min_repeats: Сколько постов канала должны заканчиваться
+                одной и той же строкой, чтобы она считалась футером
+        """
+        self.footer_min_repeats = (
+            settings.FOOTER_MIN_REPEATS if footer_min_repeats is None else footer_min_repeats
+        )
+        # {channel_id: set(нормализованные строки футера)} — копится между запусками
+        self.footers = defaultdict(set)
+        self.stats = {}
+
+    def _lines(self, text):
+        return [line.strip() for line in (text or '').split('\n')]
+
+    def _has_role_signal(self, line_lower):
+        return any(stem in line_lower for stem in self.ROLE_STEMS)
+
+    def learn_footers(self, vacancies):
+        """
+        Находит футеры каналов: строки, которыми заканчиваются несколько
+        постов одного канала
+
+        Args:
+            vacancies: List[dict] - посты с полями channel_id, full_text
+
+        Returns:
+            int: Количество новых строк футеров
+        """
+        counts = defaultdict(lambda: defaultdict(int))
+        seen_texts = set()
+
+        for vacancy in vacancies:
+            channel_id = vacancy.get('channel_id')
+            text = vacancy.get('full_text') or ''
+            # Повторные публикации одного поста не должны превращать его текст в футер
+            if channel_id is None or (channel_id, text) in seen_texts:
+                continue
+            seen_texts.add((channel_id, text))
+
+            tail = [line for line in self._lines(text) if line]
+            tail_keys = {normalize_text(line) for line in tail[-self.FOOTER_MAX_LINES:]}
+            for key in tail_keys:
+                # Строки с названием роли футером не считаются никогда
+                if key.strip() and not self._has_role_signal(key):
+                    counts[channel_id][key] += 1
+
+        learned = 0
+        for channel_id, line_counts in counts.items():
+            for key, count in line_counts.items():
+                if count >= self.footer_min_repeats and key not in self.footers[channel_id]:
+                    self.footers[channel_id].add(key)
+                    learned += 1
+
+        if learned:
+            logger.info(f"Learned {learned} channel footer lines")
+        return learned
+
+    def compact(self, vacancy_data):
+        """
+        Сжатый текст поста
+
+        Args:
+            vacancy_data: dict с полями channel_id, full_text
+
+        Returns:
+            Tuple[str, int]: Текст и количество удаленных строк футера
+        """
+        lines = self._lines(vacancy_data.get('full_text'))
+        footer = self.footers.get(vacancy_data.get('channel_id'), set())
+
+        # Футер срезаем только с конца поста
+        removed_footer = 0
+        while lines and (not lines[-1] or normalize_text(lines[-1]) in footer):
+            if lines[-1]:
+                removed_footer += 1
+            lines.pop()
+
+        signal_lines = []
+        other_lines = []
+        for line in lines:
+            line = _SPACES_RE.sub(' ', _EMOJI_RE.sub(' ', line)).strip()
+            if not line or _HASHTAG_LINE_RE.match(line) or _CONTACT_LINE_RE.match(line):
+                continue
+
+            line_lower = line.lower()
+            if self._has_role_signal(line_lower) or any(stem in line_lower for stem in self.COMPANY_STEMS):
+                signal_lines.append(line)
+            else:
+                other_lines.append(line)
+
+        return '\n'.join(signal_lines + other_lines), removed_footer
+
+    def compact_vacancies(self, vacancies):
+        """
+        Сохраняет сжатый текст каждого поста под COMPACT_TEXT_KEY
+        и считает экономию токенов
+
+        Args:
+            vacancies: List[dict] - посты, отправляемые в GPT
+
+        Returns:
+            dict: Статистика сжатия
+        """
+        max_chars = settings.GPT_POST_MAX_CHARS
+        tokens_before = 0
+        tokens_after = 0
+        footer_lines = 0
+
+        for vacancy in vacancies:
+            text, removed_footer = self.compact(vacancy)
+            vacancy[COMPACT_TEXT_KEY] = text
+
+            tokens_before += estimate_tokens((vacancy.get('full_text') or '')[:max_chars])
+            tokens_after += estimate_tokens(text[:max_chars])
+            footer_lines += removed_footer
+
+        saved = tokens_before - tokens_after
+        self.stats = {
+            'compacted_posts': len(vacancies),
+            'footer_lines_removed': footer_lines,
+            'tokens_before_compaction': tokens_before,
+            'tokens_after_compaction': tokens_after,
+        }
+
+        if tokens_before:
+            logger.info(
+                f"Post compaction: ~{tokens_before} -> ~{tokens_after} input tokens "
+                f"(saved ~{saved}, {saved / tokens_before:.0%}; "
+                f"{footer_lines} footer lines removed)"
+            )
+
+        return self.stats
+
+
+# Глобальный экземпляр
+post_compactor = PostCompactor()
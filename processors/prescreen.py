@@ -0,0 +1,115 @@
+from processors.vacancy_filter import vacancy_filter
+from processors.context_analyzer import context_analyzer
+from utils.normalized_view import get_view
+from config.settings import settings
+from config.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class PreScreen:
+    """
+    Локальный пре-скрининг постов перед GPT.
+
+    Настроен на полноту: отсекает только заведомо нерелевантные посты
+    (нет ни одного упоминания целевых ролей, слишком короткий текст),
+    всё сомнительное отправляется в GPT.
+    """
+
+    # Корни названий ролей: ловят формы, которых нет в keywords VacancyFilter
+    # ("ищем редактора", "нужен сценарист-фрилансер", "монтажёр на проект")
+    SCRIPTWRITER_STEMS = ['сценари', 'scriptwrit', 'script writer', 'screenwrit']
+    EDITOR_STEMS = ['редактор', 'монтаж', 'editor', 'колорист', 'colorist']
+
+    def __init__(self, min_text_length=None, require_video_context=None):
+        """
+        Args:
+            min_text_length: Минимальная длина текста поста (символов)
+            require_video_context: Требовать видео-контекст для редакторских ролей
+        """
+        self.min_text_length = (
+            settings.PRESCREEN_MIN_TEXT_LENGTH if min_text_length is None else min_text_length
+        )
+        self.require_video_context = (
+            settings.PRESCREEN_REQUIRE_VIDEO_CONTEXT
+            if require_video_context is None else require_video_context
+        )
+        self.stats = {}
+
+    def screen(self, vacancy_data):
+        """
+        Проверяет, стоит ли отправлять пост в GPT
+
+        Args:
+            vacancy_data: dict с полями title, full_text
+
+        Returns:
+            str or None: Причина отсева или None, если пост проходит
+        """
+        view = get_view(vacancy_data)
+
+        if len(view.full_text) < self.min_text_length:
+            return 'too_short'
+
+        positions = vacancy_filter.find_keyword_positions(vacancy_data)
+
+        # Сценаристы не требуют видео-контекста
+        if 'сценарист' in positions:
+            return None
+
+        text = view.combined_lower
+        if any(stem in text for stem in self.SCRIPTWRITER_STEMS):
+            return None
+
+        if not positions and not any(stem in text for stem in self.EDITOR_STEMS):
+            return 'no_role'
+
+        if self.require_video_context and not context_analyzer.check_video_context(
+            view.full_text, text_lower=view.text_lower
+        ):
+            return 'no_video_context'
+
+        return None
+
+    def filter_vacancies(self, vacancies):
+        """
+        Отсеивает заведомо нерелевантные посты
+
+        Args:
+            vacancies: List[dict] - извлеченные посты
+
+        Returns:
+            List[dict]: Посты-кандидаты для GPT
+        """
+        self.stats = {
+            'total': len(vacancies),
+            'passed': 0,
+            'too_short': 0,
+            'no_role': 0,
+            'no_video_context': 0,
+        }
+        candidates = []
+
+        for vacancy in vacancies:
+            reason = self.screen(vacancy)
+            if reason:
+                self.stats[reason] += 1
+                continue
+            candidates.append(vacancy)
+
+        self.stats['passed'] = len(candidates)
+        screened_out = len(vacancies) - len(candidates)
+
+        logger.info(
+            f"Pre-screen: {len(candidates)}/{len(vacancies)} candidates, "
+            f"{screened_out} screened out "
+            f"(too_short={self.stats['too_short']}, "
+            f"no_role={self.stats['no_role']}, "
+            f"no_video_context={self.stats['no_video_context']})"
+        )
+
+        return candidates
+
+
+# Глобальный экземпляр
+prescreen = PreScreen()
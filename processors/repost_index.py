@@ -0,0 +1,240 @@
+import struct
+from collections import defaultdict
+from database.models import Vacancy, VacancyLSHBucket
+from database.connection import get_session, close_session
+from utils.normalized_view import get_view
+from utils.similarity import MinHasher, shingles, jaccard, lsh_band_keys
+from config.settings import settings
+from config.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class RepostIndex:
+    """
+    LSH-индекс по шинглам нормализованного full_text вакансий в БД.
+
+    Ловит репосты, у которых каналы переписали заголовок, но оставили
+    текст: MinHash-сигнатура хранится в Vacancy.minhash, LSH-корзины —
+    в таблице vacancy_lsh_buckets. Кандидаты ищутся по совпадению корзин
+    (индексированные равенства, без перебора истории), точный коэффициент
+    Жаккара считается только для них.
+    """
+
+    NUM_PERM = 64
+    BANDS = 16
+    SHINGLE_SIZE = 3
+
+    # Максимальное количество значений в одном IN (...)
+    LOOKUP_CHUNK_SIZE = 500
+
+    def __init__(self, threshold=None):
+        """
+        Args:
+            threshold: Минимальный коэффициент Жаккара для репоста
+        """
+        self.threshold = settings.REPOST_SIMILARITY_THRESHOLD if threshold is None else threshold
+        self.hasher = MinHasher(num_perm=self.NUM_PERM)
+        self.stats = {}
+
+    def shingle_set(self, vacancy_data):
+        return shingles(get_view(vacancy_data).tokens, self.SHINGLE_SIZE)
+
+    def signature(self, vacancy_data):
+        """MinHash-сигнатура поста (None для пустого текста)"""
+        shingle_set = self.shingle_set(vacancy_data)
+        if not shingle_set:
+            return None
+        return self.hasher.signature(shingle_set)
+
+    @staticmethod
+    def pack(signature):
+        return struct.pack(f'<{len(signature)}I', *signature)
+
+    @staticmethod
+    def unpack(data):
+        return list(struct.unpack(f'<{len(data) // 4}I', data))
+
+    def band_keys(self, signature):
+        return lsh_band_keys(signature, self.BANDS)
+
+    def bucket_rows(self, vacancy_id, signature):
+        """
+        Строки vacancy_lsh_buckets для пачечной вставки
+
+        Returns:
+            List[dict]: {vacancy_id, band, bucket} по каждой полосе
+        """
+        return [
+            {'vacancy_id': vacancy_id, 'band': band, 'bucket': key}
+            for band, key in enumerate(self.band_keys(signature))
+        ]
+
+    def attach(self, vacancy, vacancy_data, signature=None):
+        """
+        Заполняет minhash и LSH-корзины Vacancy (ORM-объекта)
+
+        Args:
+            vacancy: Vacancy (ORM-объект)
+            vacancy_data: dict с полем full_text
+            signature: Готовая сигнатура (иначе считается по тексту)
+        """
+        signature = signature or self.signature(vacancy_data)
+        if signature is None:
+            return
+
+        vacancy.minhash = self.pack(signature)
+        vacancy.lsh_buckets = [
+            VacancyLSHBucket(band=band, bucket=key)
+            for band, key in enumerate(self.band_keys(signature))
+        ]
+
+    def _load_collisions(self, session, band_keys, cutoff_date):
+        """
+        Вакансии за временное окно, совпавшие хотя бы в одной LSH-полосе
+
+        Returns:
+            Dict[Tuple[int, int], Set[int]]: {(полоса, корзина): id вакансий}
+        """
+        wanted = {(band, key) for keys in band_keys for band, key in enumerate(keys)}
+        buckets = list({key for _, key in wanted})
+        collisions = defaultdict(set)
+
+        for i in range(0, len(buckets), self.LOOKUP_CHUNK_SIZE):
+            chunk = buckets[i:i + self.LOOKUP_CHUNK_SIZE]
+            rows = session.query(
+                VacancyLSHBucket.band, VacancyLSHBucket.bucket, VacancyLSHBucket.vacancy_id
+            ).join(Vacancy).filter(
+                VacancyLSHBucket.bucket.in_(chunk),
+                Vacancy.found_at >= cutoff_date
+            ).all()
+
+            for band, bucket, vacancy_id in rows:
+                if (band, bucket) in wanted:
+                    collisions[(band, bucket)].add(vacancy_id)
+
+        return collisions
+
+    def _load_shingles(self, session, vacancy_ids):
+        """Множества шинглов сохраненных вакансий (только для кандидатов)"""
+        ids = list(vacancy_ids)
+        result = {}
+
+        for i in range(0, len(ids), self.LOOKUP_CHUNK_SIZE):
+            chunk = ids[i:i + self.LOOKUP_CHUNK_SIZE]
+            rows = session.query(Vacancy.id, Vacancy.full_text).filter(Vacancy.id.in_(chunk)).all()
+            for vacancy_id, full_text in rows:
+                result[vacancy_id] = self.shingle_set({'full_text': full_text})
+
+        return result
+
+    def find_reposts(self, vacancies, session, cutoff_date):
+        """
+        Находит репосты среди вакансий: похожие на сохраненные за временное
+        окно или на предыдущие вакансии того же списка
+
+        Args:
+            vacancies: List[dict] - вакансии
+            session: SQLAlchemy session
+            cutoff_date: Начало временного окна
+
+        Returns:
+            Set[int]: Индексы вакансий-репостов
+        """
+        shingle_sets = [self.shingle_set(vacancy) for vacancy in vacancies]
+        band_keys = [
+            self.band_keys(self.hasher.signature(shingle_set)) if shingle_set else []
+            for shingle_set in shingle_sets
+        ]
+
+        collisions = self._load_collisions(session, band_keys, cutoff_date)
+        candidate_ids = set().union(*collisions.values()) if collisions else set()
+        stored_shingles = self._load_shingles(session, candidate_ids)
+
+        reposts = set()
+        batch_buckets = defaultdict(list)  # {(полоса, корзина): индексы принятых вакансий}
+        comparisons = 0
+
+        for i, keys in enumerate(band_keys):
+            if not keys:
+                continue
+
+            stored = set()
+            earlier = set()
+            for band, key in enumerate(keys):
+                stored |= collisions.get((band, key), set())
+                earlier.update(batch_buckets.get((band, key), ()))
+
+            comparisons += len(stored) + len(earlier)
+            is_repost = any(
+                jaccard(shingle_sets[i], stored_shingles[vacancy_id]) >= self.threshold
+                for vacancy_id in stored if vacancy_id in stored_shingles
+            ) or any(
+                jaccard(shingle_sets[i], shingle_sets[j]) >= self.threshold
+                for j in earlier
+            )
+
+            if is_repost:
+                logger.debug(f"Repost found by text similarity: {(vacancies[i].get('title') or '')[:50]}")
+                reposts.add(i)
+                continue
+
+            for band, key in enumerate(keys):
+                batch_buckets[(band, key)].append(i)
+
+        self.stats = {'candidates': len(candidate_ids), 'comparisons': comparisons, 'reposts': len(reposts)}
+        return reposts
+
+    def rebuild(self, recompute=False, chunk_size=500):
+        """
+        Перестраивает LSH-корзины для всех сохраненных вакансий
+
+        Удаление и повторное заполнение идут одной транзакцией: пока
+        перестройка не закоммичена, параллельные запуски видят старый индекс,
+        а при ошибке он остается нетронутым.
+
+        Args:
+            recompute: Пересчитать сигнатуры по тексту, а не брать из Vacancy.minhash
+            chunk_size: Вакансий, загружаемых в память за раз
+
+        Returns:
+            int: Количество проиндексированных вакансий
+        """
+        session = get_session()
+        indexed = 0
+        try:
+            session.query(VacancyLSHBucket).delete()
+
+            last_id = 0
+            while True:
+                vacancies = session.query(Vacancy).filter(
+                    Vacancy.id > last_id
+                ).order_by(Vacancy.id).limit(chunk_size).all()
+                if not vacancies:
+                    break
+
+                for vacancy in vacancies:
+                    stored = None
+                    if vacancy.minhash and not recompute:
+                        stored = self.unpack(vacancy.minhash)
+                    self.attach(vacancy, {'full_text': vacancy.full_text}, signature=stored)
+                    indexed += 1
+
+                last_id = vacancies[-1].id
+                session.flush()
+                session.expunge_all()
+                logger.info(f"Repost index: {indexed} vacancies indexed")
+
+            session.commit()
+            return indexed
+
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error rebuilding repost index: {e}")
+            raise
+        finally:
+            close_session(session)
+
+
+# Глобальный экземпляр
+repost_index = RepostIndex()
@@ -0,0 +1,214 @@
+from collections import defaultdict
+from sqlalchemy import or_
+from database.models import Vacancy
+from database.connection import get_session, close_session
+from utils.normalized_view import get_view
+from utils.similarity import simhash64, hamming_distance, simhash_bands
+from config.settings import settings
+from config.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+_SIGN_BIT = 1 << 63
+
+
+def to_signed(value):
+    """Беззнаковый 64-битный отпечаток -> значение для BIGINT"""
+    return value - (1 << 64) if value & _SIGN_BIT else value
+
+
+def to_unsigned(value):
+    """BIGINT из БД -> беззнаковый 64-битный отпечаток"""
+    return value + (1 << 64) if value < 0 else value
+
+
+class SimHashIndex:
+    """
+    Поиск почти-дубликатов по 64-битному SimHash, хранящемуся в Vacancy.
+
+    Отпечаток делится на 4 полосы по 16 бит в отдельных индексированных
+    колонках: вакансии в пределах 3 бит совпадают хотя бы в одной полосе,
+    поэтому кандидаты для всей пачки находятся одним запросом по индексам
+    полос независимо от размера истории, а точное расстояние Хэмминга
+    считается в памяти только для них.
+    """
+
+    BANDS = 4
+    BAND_COLUMNS = ('simhash_b0', 'simhash_b1', 'simhash_b2', 'simhash_b3')
+    LOOKUP_CHUNK_SIZE = 500
+
+    def __init__(self, max_distance=None):
+        """
+        Args:
+            max_distance: Максимальное расстояние Хэмминга для дубликата (не больше 3)
+        """
+        self.max_distance = settings.SIMHASH_MAX_DISTANCE if max_distance is None else max_distance
+        if self.max_distance >= self.BANDS:
+            raise ValueError(f"SimHash max distance must be below {self.BANDS} bands")
+        self.stats = {}
+
+    def fingerprint(self, vacancy_data):
+        """SimHash нормализованного текста поста"""
+        return simhash64(get_view(vacancy_data).tokens)
+
+    def columns(self, vacancy_data):
+        """
+        Значения колонок simhash и полос для вставки вакансии
+
+        Args:
+            vacancy_data: dict с полем full_text
+
+        Returns:
+            dict: {имя колонки: значение}
+        """
+        value = self.fingerprint(vacancy_data)
+        values = {'simhash': to_signed(value)}
+        values.update(zip(self.BAND_COLUMNS, simhash_bands(value, self.BANDS)))
+        return values
+
+    def attach(self, vacancy, vacancy_data):
+        """
+        Заполняет simhash и полосы Vacancy (ORM-объекта)
+
+        Args:
+            vacancy: Vacancy (ORM-объект)
+            vacancy_data: dict с полем full_text
+        """
+        for column, value in self.columns(vacancy_data).items():
+            setattr(vacancy, column, value)
+
+    def _load_candidates(self, session, values, cutoff_date):
+        """
+        Вакансии за временное окно, совпавшие с отпечатками хотя бы в одной
+        полосе: один запрос на пачку (IN по каждой колонке полосы) вместо
+        запроса на каждую вакансию
+
+        Args:
+            session: SQLAlchemy session
+            values: List[int] - беззнаковые отпечатки
+            cutoff_date: Начало временного окна
+
+        Returns:
+            Dict[Tuple[int, int], List[Tuple[int, int]]]:
+            {(полоса, значение): [(id вакансии, беззнаковый отпечаток)]}
+        """
+        wanted = [set() for _ in self.BAND_COLUMNS]
+        for value in values:
+            for band, band_value in enumerate(simhash_bands(value, self.BANDS)):
+                wanted[band].add(band_value)
+        wanted = [list(band_values) for band_values in wanted]
+
+        rows = {}
+        longest = max((len(band_values) for band_values in wanted), default=0)
+        for i in range(0, longest, self.LOOKUP_CHUNK_SIZE):
+            conditions = [
+                getattr(Vacancy, column).in_(band_values[i:i + self.LOOKUP_CHUNK_SIZE])
+                for column, band_values in zip(self.BAND_COLUMNS, wanted)
+                if band_values[i:i + self.LOOKUP_CHUNK_SIZE]
+            ]
+            for vacancy_id, stored in session.query(Vacancy.id, Vacancy.simhash).filter(
+                or_(*conditions),
+                Vacancy.found_at >= cutoff_date
+            ):
+                if stored is not None:
+                    rows[vacancy_id] = to_unsigned(stored)
+
+        candidates = defaultdict(list)
+        for vacancy_id, stored in rows.items():
+            for band, band_value in enumerate(simhash_bands(stored, self.BANDS)):
+                candidates[(band, band_value)].append((vacancy_id, stored))
+        return candidates
+
+    def find_reposts(self, vacancies, session, cutoff_date):
+        """
+        Находит почти-дубликаты среди вакансий: близкие к сохраненным
+        за временное окно или к предыдущим вакансиям того же списка
+
+        Args:
+            vacancies: List[dict] - вакансии
+            session: SQLAlchemy session
+            cutoff_date: Начало временного окна
+
+        Returns:
+            Set[int]: Индексы вакансий-дубликатов
+        """
+        values = [
+            self.fingerprint(vacancy) if get_view(vacancy).tokens else None
+            for vacancy in vacancies
+        ]
+        probes = [value for value in values if value is not None]
+        candidates = self._load_candidates(session, probes, cutoff_date)
+
+        reposts = set()
+        accepted = []
+
+        for i, value in enumerate(values):
+            if value is None:
+                continue
+
+            stored = {
+                candidate
+                for band, band_value in enumerate(simhash_bands(value, self.BANDS))
+                for candidate in candidates.get((band, band_value), ())
+            }
+            if any(
+                hamming_distance(value, other) <= self.max_distance
+                for other in [fingerprint for _, fingerprint in stored] + accepted
+            ):
+                logger.debug(f"Near-duplicate found by SimHash: {(vacancies[i].get('title') or '')[:50]}")
+                reposts.add(i)
+                continue
+
+            accepted.append(value)
+
+        self.stats = {
+            'probes': len(probes),
+            'candidates': len({vacancy_id for rows in candidates.values() for vacancy_id, _ in rows}),
+            'reposts': len(reposts),
+        }
+        return reposts
+
+    def backfill(self, recompute=False, chunk_size=500):
+        """
+        Заполняет simhash для сохраненных вакансий
+
+        Args:
+            recompute: Пересчитать для всех вакансий, а не только для пустых
+            chunk_size: Вакансий на одну транзакцию
+
+        Returns:
+            int: Количество обновленных вакансий
+        """
+        session = get_session()
+        updated = 0
+        try:
+            last_id = 0
+            while True:
+                query = session.query(Vacancy).filter(Vacancy.id > last_id)
+                if not recompute:
+                    query = query.filter(Vacancy.simhash.is_(None))
+                vacancies = query.order_by(Vacancy.id).limit(chunk_size).all()
+                if not vacancies:
+                    break
+
+                for vacancy in vacancies:
+                    self.attach(vacancy, {'full_text': vacancy.full_text})
+                    updated += 1
+
+                last_id = vacancies[-1].id
+                session.commit()
+                session.expunge_all()
+                logger.info(f"SimHash backfill: {updated} vacancies updated")
+
+            return updated
+
+        except Exception as e:
+            session.rollback()
+            logger.error(f"Error backfilling SimHash: {e}")
+            raise
+        finally:
+            close_session(session)
+
+
+# Глобальный экземпляр
+simhash_index = SimHashIndex()
@@ -0,0 +1,112 @@
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from rapidfuzz import fuzz, process
+from database.models import Vacancy
+from config.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class TitleIndex:
+    """
+    Индекс названий недавних вакансий в памяти, по типу позиции.
+
+    Загружается из БД один раз (и периодически перечитывается), дальше
+    пополняется сохраненными вакансиями и сам выбрасывает записи старше
+    временного окна. Поиск похожих названий идет векторизованно через
+    rapidfuzz (cdist / extractOne со score_cutoff) без запросов к БД.
+    """
+
+    def __init__(self, time_window_days=7, refresh_hours=24):
+        """
+        Args:
+            time_window_days: Временное окно для поиска дубликатов (в днях)
+            refresh_hours: Через сколько часов перечитывать индекс из БД
+        """
+        self.time_window_days = time_window_days
+        self.refresh_seconds = refresh_hours * 3600
+        # {position_type: ([title_lower, ...], [found_at, ...])}
+        self.entries = defaultdict(lambda: ([], []))
+        self.loaded_at = None
+
+    def _cutoff_date(self):
+        return datetime.now() - timedelta(days=self.time_window_days)
+
+    def load(self, session):
+        """Загружает названия вакансий за временное окно из БД"""
+        rows = session.query(Vacancy.position_type, Vacancy.title, Vacancy.found_at).filter(
+            Vacancy.found_at >= self._cutoff_date()
+        ).order_by(Vacancy.found_at).all()
+
+        self.entries.clear()
+        for position_type, title, found_at in rows:
+            self._append(position_type, title, found_at)
+
+        self.loaded_at = time.monotonic()
+        logger.info(f"Title index loaded: {len(rows)} recent vacancies")
+
+    def ensure_loaded(self, session):
+        """Загружает индекс при первом обращении и перечитывает устаревший"""
+        if self.loaded_at is None or time.monotonic() - self.loaded_at > self.refresh_seconds:
+            self.load(session)
+        else:
+            self.expire()
+
+    def _append(self, position_type, title, found_at):
+        # Даты сообщений Telegram с таймзоной, из БД и datetime.now() — без
+        if found_at.tzinfo is not None:
+            found_at = found_at.astimezone().replace(tzinfo=None)
+
+        titles, dates = self.entries[position_type]
+        titles.append((title or '').lower())
+        dates.append(found_at)
+
+    def add(self, position_type, title, found_at=None):
+        """Добавляет сохраненную вакансию в индекс"""
+        if self.loaded_at is None:
+            return  # Индекс еще не загружен — вакансия придет из БД при загрузке
+        self._append(position_type, title, found_at or datetime.now())
+
+    def expire(self):
+        """Удаляет записи старше временного окна"""
+        cutoff_date = self._cutoff_date()
+        for position_type, (titles, dates) in list(self.entries.items()):
+            if all(date >= cutoff_date for date in dates):
+                continue
+            kept = [(t, d) for t, d in zip(titles, dates) if d >= cutoff_date]
+            self.entries[position_type] = ([t for t, _ in kept], [d for _, d in kept])
+
+    def find_similar(self, position_type, title_lower, score_cutoff):
+        """
+        Самое похожее название той же позиции
+
+        Returns:
+            Tuple[str, float] or None: (название, similarity) или None
+        """
+        titles, _ = self.entries.get(position_type, ([], []))
+        if not titles:
+            return None
+
+        match = process.extractOne(title_lower, titles, scorer=fuzz.ratio, score_cutoff=score_cutoff)
+        return (match[0], match[1]) if match else None
+
+    def find_similar_many(self, position_type, titles_lower, score_cutoff):
+        """
+        Лучшее совпадение для каждого названия из списка (одна матрица cdist
+        на все названия, расчет на всех ядрах)
+
+        Returns:
+            List[float]: Максимальная similarity для каждого названия (0 — нет совпадений)
+        """
+        titles, _ = self.entries.get(position_type, ([], []))
+        if not titles or not titles_lower:
+            return [0.0] * len(titles_lower)
+
+        scores = process.cdist(
+            titles_lower, titles, scorer=fuzz.ratio, score_cutoff=score_cutoff, workers=-1
+        )
+        return scores.max(axis=1).tolist()
+
+    def __len__(self):
+        return sum(len(titles) for titles, _ in self.entries.values())
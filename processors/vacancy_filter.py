@@ -1,4 +1,5 @@
 from processors.context_analyzer import context_analyzer
+from utils.normalized_view import get_view
 from config.logging_config import get_logger
 
 logger = get_logger(__name__)
@@ -63,11 +64,10 @@ class VacancyFilter:
         Returns:
             str or None: Название позиции ('сценарист', 'редактор', 'шеф-редактор') или None
         """
-        title = vacancy_data.get('title', '').lower()
-        full_text = vacancy_data.get('full_text', '').lower()
+        view = get_view(vacancy_data)
 
         # Объединяем заголовок и текст для анализа
-        combined_text = f"{title} {full_text}"
+        combined_text = view.combined_lower
 
         for position_name, config in self.TARGET_POSITIONS.items():
             # Проверка keywords
@@ -91,7 +91,9 @@ class VacancyFilter:
 
             # Проверка видео-контекста (если требуется)
             if config['requires_video_context']:
-                has_video_context = context_analyzer.check_video_context(full_text)
+                has_video_context = context_analyzer.check_video_context(
+                    view.full_text, text_lower=view.text_lower
+                )
                 if not has_video_context:
                     logger.debug(f"Position {position_name} rejected: no video context")
                     continue
@@ -101,6 +103,25 @@ class VacancyFilter:
 
         return None
 
+    def find_keyword_positions(self, vacancy_data):
+        """
+        Возвращает позиции, keywords которых встречаются в вакансии,
+        без проверки исключений и видео-контекста (для пре-скрининга)
+
+        Args:
+            vacancy_data: dict с полями title, company, full_text
+
+        Returns:
+            List[str]: Названия позиций
+        """
+        combined_text = get_view(vacancy_data).combined_lower
+
+        return [
+            position_name
+            for position_name, config in self.TARGET_POSITIONS.items()
+            if any(keyword in combined_text for keyword in config['keywords'])
+        ]
+
     def filter_vacancies(self, vacancies):
         """
         Фильтрует список вакансий
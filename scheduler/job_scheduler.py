@@ -1,22 +1,34 @@
 import asyncio
 from datetime import datetime
+from sqlalchemy import insert
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 from pytz import timezone
 from collectors.channel_reader import channel_reader
 from processors.vacancy_extractor import vacancy_extractor
+from processors.prescreen import prescreen
 from processors.gpt_filter import gpt_filter
+from processors.repost_index import repost_index
+from processors.simhash_index import simhash_index
 from processors.deduplicator import deduplicator
 from notifiers.telegram_bot import telegram_notifier
-from database.models import JobRun, Vacancy, Channel
-from database.connection import get_session, close_session, init_database
+from database.models import JobRun, Vacancy, VacancyLSHBucket
+from database.connection import get_async_session, close_async_session
+from database.bulk import insert_ignore_conflicts
 from utils.csv_loader import get_enabled_channels
-from utils.hash_generator import generate_vacancy_hash
+from utils.normalized_view import get_view
+from utils.hash_generator import generate_url_key
 from config.settings import settings
 from config.logging_config import get_logger
 
 logger = get_logger(__name__)
 
+# Счетчики JobRun, которые джоб накапливает в памяти до финального commit
+JOB_RUN_COUNTERS = (
+    'vacancies_found', 'vacancies_sent',
+    'gpt_requests', 'gpt_prompt_tokens', 'gpt_cached_tokens', 'gpt_completion_tokens',
+)
+
 
 class JobScheduler:
     """Планировщик задач для сбора вакансий"""
@@ -80,12 +92,13 @@ async def run_vacancy_collection():
     logger.info("Starting vacancy collection job")
     logger.info("=" * 80)
 
-    session = get_session()
+    # Async-сессия: запросы джоба не блокируют event loop бота
+    session = get_async_session()
     job_run = JobRun(status='running')
 
     try:
         session.add(job_run)
-        session.commit()
+        await session.commit()
 
         # 1. Инициализация клиентов
         logger.info("Step 1: Initializing clients...")
@@ -94,14 +107,15 @@ async def run_vacancy_collection():
 
         # 2. Загрузка каналов из БД
         logger.info("Step 2: Loading channels from database...")
-        channels = get_enabled_channels()  # Загружаем все активные каналы
+        # Все активные каналы одним запросом: {username: {'id', 'name'}}
+        channels = await asyncio.to_thread(get_enabled_channels)
         logger.info(f"Loaded {len(channels)} enabled channels")
 
         if not channels:
             logger.warning("No enabled channels found!")
             job_run.status = 'completed'
             job_run.completed_at = datetime.now()
-            session.commit()
+            await session.commit()
             return
 
         # 3. Чтение сообщений из каналов
@@ -115,80 +129,62 @@ async def run_vacancy_collection():
         logger.info("Step 4: Extracting vacancy data from messages...")
         all_vacancies = []
 
-        for channel_username, messages in all_messages.items():
+        # id каналов приходят из результатов чтения, без запросов к БД
+        for channel_id, messages in all_messages.items():
             if not messages:
                 continue
 
-            # Находим channel в БД
-            channel = session.query(Channel).filter_by(username=channel_username).first()
-            if not channel:
-                logger.warning(f"Channel not found in DB: {channel_username}")
-                continue
-
             # Извлекаем данные
             vacancies = vacancy_extractor.batch_extract(messages)
 
             # Добавляем channel_id
             for vacancy in vacancies:
-                vacancy['channel_id'] = channel.id
+                vacancy['channel_id'] = channel_id
 
             all_vacancies.extend(vacancies)
 
         logger.info(f"Extracted {len(all_vacancies)} potential vacancies")
         job_run.vacancies_found = len(all_vacancies)
 
-        # 5. Фильтрация через GPT
+        # 5. Локальный пре-скрининг и фильтрация через GPT
+        candidates = all_vacancies
+        if settings.PRESCREEN_ENABLED:
+            logger.info("Step 5a: Pre-screening posts locally...")
+            # Итог пре-скрининга логирует сам prescreen.filter_vacancies
+            candidates = prescreen.filter_vacancies(all_vacancies)
+
         logger.info("Step 5: Filtering vacancies with GPT AI...")
-        filtered_vacancies = await gpt_filter.filter_vacancies(all_vacancies)
+        filtered_vacancies = await gpt_filter.filter_vacancies(candidates)
         logger.info(f"GPT filtered: {len(filtered_vacancies)} relevant vacancies")
+        job_run.gpt_requests = gpt_filter.stats.get('requests', 0)
+        job_run.gpt_prompt_tokens = gpt_filter.stats.get('prompt_tokens', 0)
+        job_run.gpt_cached_tokens = gpt_filter.stats.get('cached_tokens', 0)
+        job_run.gpt_completion_tokens = gpt_filter.stats.get('completion_tokens', 0)
 
         # 6. Дедупликация
         logger.info("Step 6: Removing duplicates...")
-        unique_vacancies = deduplicator.filter_duplicates(filtered_vacancies)
+        # Дедупликация работает с синхронной сессией и грузит CPU — в отдельном потоке
+        unique_vacancies = await asyncio.to_thread(deduplicator.filter_duplicates, filtered_vacancies)
         logger.info(f"After deduplication: {len(unique_vacancies)} unique vacancies")
 
         # 7. Сохранение в БД
         logger.info("Step 7: Saving vacancies to database...")
-        saved_vacancies = []
-        skipped_duplicates = 0
-
-        for vacancy_data in unique_vacancies:
-            vacancy_hash = generate_vacancy_hash(
-                title=vacancy_data.get('title', ''),
-                company=vacancy_data.get('company', ''),
-                url=vacancy_data.get('url', '')
-            )
-
-            # Проверяем, существует ли уже вакансия с таким хешем
-            existing = session.query(Vacancy).filter_by(hash=vacancy_hash).first()
-            if existing:
-                logger.debug(f"Vacancy already exists in DB, skipping: {vacancy_hash[:16]}...")
-                skipped_duplicates += 1
-                continue
-
-            vacancy = Vacancy(
-                channel_id=vacancy_data.get('channel_id'),
-                message_id=vacancy_data.get('message_id'),
-                title=vacancy_data.get('title'),
-                company=vacancy_data.get('company'),
-                url=vacancy_data.get('url'),
-                position_type=vacancy_data.get('position_type'),
-                full_text=vacancy_data.get('full_text'),
-                hash=vacancy_hash,
-                found_at=vacancy_data.get('date', datetime.now())
-            )
-
-            session.add(vacancy)
-            vacancy_data['hash'] = vacancy_hash  # Для последующей отправки
-            saved_vacancies.append(vacancy_data)
-
         try:
-            session.commit()
-            logger.info(f"Saved {len(saved_vacancies)} new vacancies to database (skipped {skipped_duplicates} duplicates)")
+            # SimHash и MinHash считаются в отдельном потоке, в run_sync — только запись
+            rows, signatures = await asyncio.to_thread(_build_vacancy_rows, unique_vacancies)
+            saved_vacancies = await session.run_sync(_save_vacancies, unique_vacancies, rows, signatures)
+            await session.commit()
+            logger.info(
+                f"Saved {len(saved_vacancies)} new vacancies to database "
+                f"(skipped {len(unique_vacancies) - len(saved_vacancies)} already stored)"
+            )
+            # Индекс названий дедупликатора пополняется без перечитывания БД
+            deduplicator.remember(saved_vacancies)
         except Exception as e:
-            logger.warning(f"Error saving to DB (probably duplicates), rolling back: {e}")
-            session.rollback()
-            # Все равно продолжаем с найденными вакансиями
+            logger.error(f"Error saving vacancies to DB, rolling back: {e}")
+            await _rollback_keeping_counters(session, job_run)
+            # Вакансии все равно отправляем, но без id история отправок не пишется
+            saved_vacancies = unique_vacancies
 
         # 8. Отправка уведомлений
         logger.info("Step 8: Sending notifications...")
@@ -207,7 +203,7 @@ async def run_vacancy_collection():
         # 9. Завершение
         job_run.status = 'completed'
         job_run.completed_at = datetime.now()
-        session.commit()
+        await session.commit()
 
         logger.info("=" * 80)
         logger.info(f"Vacancy collection completed successfully")
@@ -217,10 +213,11 @@ async def run_vacancy_collection():
 
     except Exception as e:
         logger.error(f"Error during vacancy collection: {e}", exc_info=True)
+        await _rollback_keeping_counters(session, job_run)
         job_run.status = 'failed'
         job_run.error_message = str(e)
         job_run.completed_at = datetime.now()
-        session.commit()
+        await session.commit()
 
     finally:
         # Закрываем клиенты
@@ -229,7 +226,114 @@ async def run_vacancy_collection():
         except:
             pass
 
-        close_session(session)
+        await close_async_session(session)
+
+
+async def _rollback_keeping_counters(session, job_run):
+    """
+    Откатывает транзакцию, сохраняя незакоммиченные счетчики запуска
+
+    После rollback атрибуты job_run истекают, а ленивая загрузка в async-сессии
+    невозможна, поэтому job_run перечитывается из БД. Перечитанные значения —
+    последние закоммиченные, и счетчики текущего запуска (найдено вакансий,
+    расход GPT) возвращаются поверх них.
+
+    Args:
+        session: AsyncSession
+        job_run: JobRun текущего запуска
+    """
+    counters = {name: getattr(job_run, name) for name in JOB_RUN_COUNTERS}
+    await session.rollback()
+    await session.refresh(job_run)
+    for name, value in counters.items():
+        setattr(job_run, name, value)
+
+
+def _build_vacancy_rows(vacancies):
+    """
+    Готовит строки для вставки вакансий: отпечаток, ключ URL, SimHash
+    и сигнатуру MinHash (CPU-часть, выполняется вне event loop)
+
+    Args:
+        vacancies: List[dict] - уникальные вакансии
+
+    Returns:
+        Tuple[List[dict], Dict[bytes, list]]: строки для INSERT
+        и {hash вакансии: сигнатура MinHash} для LSH-корзин
+    """
+    use_lsh = settings.REPOST_DETECTION_ENABLED and settings.REPOST_DETECTION_METHOD == 'minhash'
+    rows = []
+    signatures = {}
+
+    for vacancy_data in vacancies:
+        # Отпечаток уже посчитан при дедупликации и едет с вакансией
+        vacancy_hash = vacancy_data.get('hash') or get_view(vacancy_data).fingerprint
+        vacancy_data['hash'] = vacancy_hash
+
+        row = {
+            'channel_id': vacancy_data.get('channel_id'),
+            'message_id': vacancy_data.get('message_id'),
+            'title': vacancy_data.get('title'),
+            'company': vacancy_data.get('company'),
+            'url': vacancy_data.get('url'),
+            'url_hash': generate_url_key(vacancy_data.get('url')),
+            'position_type': vacancy_data.get('position_type'),
+            'full_text': vacancy_data.get('full_text'),
+            'hash': vacancy_hash,
+            'found_at': vacancy_data.get('date', datetime.now()),
+            # Ключи у всех строк одинаковые: multi-VALUES INSERT строится по первой строке
+            'minhash': None,
+        }
+        # SimHash пишется всегда (дешево, пригодится для анализа), LSH-корзины — только для minhash
+        row.update(simhash_index.columns(vacancy_data))
+        if use_lsh:
+            signature = repost_index.signature(vacancy_data)
+            if signature is not None:
+                row['minhash'] = repost_index.pack(signature)
+                signatures[vacancy_hash] = signature
+        rows.append(row)
+
+    return rows, signatures
+
+
+def _save_vacancies(session, vacancies, rows, signatures):
+    """
+    Сохраняет вакансии одним INSERT ... ON CONFLICT DO NOTHING RETURNING на чанк
+    (синхронная часть, выполняется через AsyncSession.run_sync)
+
+    Уже сохраненные (по hash) пропускаются без отката остальных. Вставленным
+    вакансиям проставляется vacancy_data['id'] для истории отправок.
+
+    Args:
+        session: SQLAlchemy session (коммит на вызывающем)
+        vacancies: List[dict] - уникальные вакансии
+        rows: Строки для INSERT из _build_vacancy_rows
+        signatures: Сигнатуры MinHash из _build_vacancy_rows
+
+    Returns:
+        List[dict]: Реально вставленные вакансии
+    """
+    inserted = insert_ignore_conflicts(session, Vacancy, rows, ['hash'], [Vacancy.id, Vacancy.hash])
+    ids = {bytes(vacancy_hash): vacancy_id for vacancy_id, vacancy_hash in inserted}
+
+    bucket_rows = [
+        bucket_row
+        for vacancy_hash, signature in signatures.items() if vacancy_hash in ids
+        for bucket_row in repost_index.bucket_rows(ids[vacancy_hash], signature)
+    ]
+    if bucket_rows:
+        session.execute(insert(VacancyLSHBucket), bucket_rows)
+
+    saved_vacancies = []
+    for vacancy_data in vacancies:
+        vacancy_id = ids.get(vacancy_data['hash'])
+        if vacancy_id is None:
+            logger.debug(f"Vacancy already exists in DB, skipping: {vacancy_data['hash'].hex()[:16]}...")
+            continue
+        vacancy_data['id'] = vacancy_id
+        saved_vacancies.append(vacancy_data)
+
+    return saved_vacancies
 
 
 # Глобальный экземпляр
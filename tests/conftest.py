@@ -0,0 +1,60 @@
+"""Общие фикстуры тестов"""
+
+import asyncio
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+
+@pytest.fixture
+def fake_openai():
+    """
+    Запускает fake_openai_server.py на свободном порту.
+
+    Возвращает фабрику: fake_openai(**атрибуты обработчика) -> base_url,
+    например fake_openai(drop_every=2) или fake_openai(delay=5).
+    Каждый вызов поднимает отдельный сервер со своими настройками.
+    """
+    import fake_openai_server
+
+    servers = []
+
+    def start(**options):
+        options.setdefault('batch_delay', 0.0)
+        options['log_message'] = lambda self, format, *args: None
+        handler = type('FakeHandler', (fake_openai_server.FakeOpenAIHandler,), options)
+
+        server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_port}/v1"
+
+    yield start
+
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def sqlite_database(tmp_path, monkeypatch):
+    """
+    Временная SQLite-база по моделям: DATABASE_URL указывает на нее,
+    таблицы созданы, sync и async подключения инициализируются заново
+    """
+    from config.settings import settings
+    from database import connection
+    from database.models import Base
+
+    monkeypatch.setattr(settings, 'DATABASE_URL', f"sqlite:///{tmp_path / 'test.db'}")
+    for name in ('engine', 'SessionLocal', 'async_engine', 'AsyncSessionLocal'):
+        monkeypatch.setattr(connection, name, None)
+
+    engine = connection.init_database()
+    Base.metadata.create_all(bind=engine)
+
+    yield engine
+
+    connection.close_database()
+    asyncio.run(connection.close_async_database())
@@ -0,0 +1,208 @@
+"""
+Бэкенды классификации против fake_openai_server.py: Chat Completions
+(InteractiveBackend) и Batch API (BatchJobBackend), включая неполные ответы.
+"""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip('openai')
+pytest.importorskip('sqlalchemy')
+
+from openai import APIConnectionError, AsyncOpenAI  # noqa: E402
+
+from config.settings import settings  # noqa: E402
+from database.connection import get_session, close_session  # noqa: E402
+from database.models import QuarantinedPost  # noqa: E402
+from processors.gpt_backends import BatchJobBackend, InteractiveBackend  # noqa: E402
+
+POSTS = [
+    'Ищем видеоредактора на монтаж рекламных роликов',
+    'Продам диван, самовывоз',
+    'Нужен сценарист для YouTube-шоу',
+    'Открыта вакансия: главный редактор медиа',
+    'Курс по фотографии со скидкой',
+    'Video editor (remote), Premiere Pro',
+]
+EXPECTED = ['редактор', None, 'сценарист', 'шеф-редактор', None, 'редактор']
+
+
+@pytest.fixture(autouse=True)
+def gpt_settings(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, 'GPT_RESPONSE_MODE', 'full')
+    monkeypatch.setattr(settings, 'GPT_BATCH_DIR', str(tmp_path))
+    monkeypatch.setattr(settings, 'GPT_BATCH_POLL_INTERVAL', 0.01)
+    monkeypatch.setattr(settings, 'GPT_BACKOFF_BASE', 0.01)
+    monkeypatch.setattr(settings, 'GPT_HEDGE_ENABLED', False)
+
+
+def make_client(base_url):
+    return AsyncOpenAI(api_key='fake', base_url=base_url, max_retries=0)
+
+
+def make_batches(size=3):
+    posts = [{'full_text': text, 'message_id': i} for i, text in enumerate(POSTS)]
+    return [posts[i:i + size] for i in range(0, len(posts), size)]
+
+
+def position_types(batches, results):
+    """Тип позиции по каждому посту в исходном порядке (KeyError — пост без вердикта)"""
+    return [
+        verdicts[idx]['position_type']
+        for batch, verdicts in zip(batches, results)
+        for idx in range(len(batch))
+    ]
+
+
+def test_interactive_backend(fake_openai):
+    backend = InteractiveBackend(make_client(fake_openai()), 'gpt-test')
+    batches = make_batches()
+
+    results = asyncio.run(backend.classify_batches(batches))
+
+    assert position_types(batches, results) == EXPECTED
+    assert backend.stats['requests'] == len(batches)
+    assert backend.stats['prompt_tokens'] > 0
+
+
+def test_interactive_backend_requests_missing_posts(fake_openai):
+    backend = InteractiveBackend(make_client(fake_openai(drop_every=2)), 'gpt-test')
+    batches = make_batches()
+
+    results = asyncio.run(backend.classify_batches(batches))
+
+    assert position_types(batches, results) == EXPECTED
+    assert backend.stats['requests'] > len(batches)
+    assert backend.stats['quarantined'] == 0
+
+
+def test_interactive_backend_retries_server_errors(fake_openai):
+    backend = InteractiveBackend(make_client(fake_openai(error_rate=0.3)), 'gpt-test')
+    batches = make_batches(size=1)
+
+    results = asyncio.run(backend.classify_batches(batches))
+
+    assert position_types(batches, results) == EXPECTED
+    assert backend.stats['quarantined'] == 0
+
+
+def test_batch_backend(fake_openai):
+    client = make_client(fake_openai())
+    backend = BatchJobBackend(client, 'gpt-test', fallback=InteractiveBackend(client, 'gpt-test'))
+    batches = make_batches()
+
+    results = asyncio.run(backend.classify_batches(batches))
+
+    assert position_types(batches, results) == EXPECTED
+    assert backend.stats['batch_jobs'] == 1
+    assert backend.stats['missing_posts'] == 0
+    assert 'fallback_requests' not in backend.stats
+
+
+def test_batch_backend_partial_result_goes_to_fallback(fake_openai):
+    # Batch API пропускает каждый второй пост, fallback отвечает полностью
+    fallback = InteractiveBackend(make_client(fake_openai()), 'gpt-test')
+    backend = BatchJobBackend(make_client(fake_openai(drop_every=2)), 'gpt-test', fallback=fallback)
+    batches = make_batches()
+
+    results = asyncio.run(backend.classify_batches(batches))
+
+    assert position_types(batches, results) == EXPECTED
+    assert backend.stats['failed_requests'] == 0
+    assert backend.stats['missing_posts'] == 2
+    assert backend.stats['fallback_requests'] == len(batches)
+
+
+def test_batch_backend_timeout_goes_to_fallback(fake_openai, monkeypatch):
+    monkeypatch.setattr(settings, 'GPT_BATCH_TIMEOUT', 0)
+    fallback = InteractiveBackend(make_client(fake_openai()), 'gpt-test')
+    backend = BatchJobBackend(make_client(fake_openai(batch_delay=5)), 'gpt-test', fallback=fallback)
+    batches = make_batches()
+
+    results = asyncio.run(backend.classify_batches(batches))
+
+    assert position_types(batches, results) == EXPECTED
+    assert backend.stats['failed_requests'] == len(batches)
+
+
+def test_hedged_verdicts_carry_answering_model(fake_openai, monkeypatch):
+    # Основной эндпоинт отвечает за 2 с, хедж уходит на быстрый запасной через 0.2 с
+    monkeypatch.setattr(settings, 'GPT_HEDGE_ENABLED', True)
+    monkeypatch.setattr(settings, 'GPT_HEDGE_INITIAL_DELAY', 0.2)
+    secondary = (make_client(fake_openai()), 'gpt-fallback')
+    backend = InteractiveBackend(make_client(fake_openai(delay=2)), 'gpt-test', secondary=secondary)
+    batches = make_batches()
+
+    results = asyncio.run(backend.classify_batches(batches))
+
+    assert position_types(batches, results) == EXPECTED
+    assert {verdict['model'] for verdicts in results for verdict in verdicts.values()} == {'gpt-fallback'}
+    assert backend.stats['hedge_wins'] == len(batches)
+    # Отмененные основные запросы учтены в окне p95 нижней оценкой задержки
+    assert len(backend.latencies) == len(batches)
+    assert min(backend.latencies) >= 0.2
+
+
+def test_failover_verdicts_carry_answering_model(fake_openai, monkeypatch):
+    monkeypatch.setattr(settings, 'GPT_MAX_RETRIES', 0)
+    secondary = (make_client(fake_openai()), 'gpt-fallback')
+    backend = InteractiveBackend(make_client(fake_openai(error_rate=1.0)), 'gpt-test', secondary=secondary)
+    batches = make_batches()
+
+    results = asyncio.run(backend.classify_batches(batches))
+
+    assert position_types(batches, results) == EXPECTED
+    assert {verdict['model'] for verdicts in results for verdict in verdicts.values()} == {'gpt-fallback'}
+    assert backend.stats['failovers'] == len(batches)
+
+
+def test_batch_verdicts_carry_batch_model(fake_openai):
+    backend = BatchJobBackend(make_client(fake_openai()), 'gpt-test')
+    results = asyncio.run(backend.classify_batches(make_batches()))
+
+    assert {verdict['model'] for verdicts in results for verdict in verdicts.values()} == {'gpt-test'}
+
+
+def quarantined_posts():
+    session = get_session()
+    try:
+        return [(post.message_id, post.model) for post in session.query(QuarantinedPost)]
+    finally:
+        close_session(session)
+
+
+def test_poison_post_is_quarantined(sqlite_database, monkeypatch):
+    pytest.importorskip('aiosqlite')
+    backend = InteractiveBackend(None, 'gpt-test')
+
+    async def process_batch(batch):
+        if any(post['message_id'] == 2 for post in batch):
+            raise ValueError("invalid GPT response")
+        return {idx: {'position_type': None, 'model': 'gpt-test'} for idx in range(len(batch))}
+
+    monkeypatch.setattr(backend, '_process_batch', process_batch)
+    results = asyncio.run(backend.classify_batches(make_batches(size=len(POSTS))))
+
+    assert sorted(results[0]) == [0, 1, 3, 4, 5]
+    assert backend.stats['quarantined'] == 1
+    assert quarantined_posts() == [(2, 'gpt-test')]
+
+
+def test_transient_errors_leave_batch_unclassified(sqlite_database, monkeypatch):
+    pytest.importorskip('aiosqlite')
+    monkeypatch.setattr(settings, 'GPT_BATCH_RETRIES', 0)
+    backend = InteractiveBackend(None, 'gpt-test')
+    calls = []
+
+    async def process_batch(batch):
+        calls.append(len(batch))
+        raise APIConnectionError(request=None)
+
+    monkeypatch.setattr(backend, '_process_batch', process_batch)
+    results = asyncio.run(backend.classify_batches(make_batches(size=len(POSTS))))
+
+    # GPT_BATCH_RETRIES=0 все равно дает одну попытку, бисекции и карантина нет
+    assert results == [{}]
+    assert calls == [len(POSTS)]
+    assert quarantined_posts() == []
@@ -0,0 +1,112 @@
+"""
+Счетчики JobRun при ошибках джоба: rollback после неудачной записи вакансий
+(или любой другой ошибки) не должен терять найденные вакансии и расход GPT.
+"""
+
+import asyncio
+import os
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip('sqlalchemy')
+pytest.importorskip('aiosqlite')
+pytest.importorskip('apscheduler')
+pytest.importorskip('telethon')
+pytest.importorskip('telegram')
+
+# Глобальный gpt_filter требует ключ при импорте; запросов к OpenAI тест не делает
+os.environ.setdefault('OPENAI_API_KEY', 'test')
+
+from config.settings import settings  # noqa: E402
+from database.connection import get_session, close_session  # noqa: E402
+from database.models import JobRun  # noqa: E402
+from scheduler import job_scheduler  # noqa: E402
+
+VACANCIES = [
+    {'title': f"Ищем монтажера #{i}", 'company': 'Студия', 'url': f"https://t.me/jobs/{i}",
+     'full_text': f"Ищем монтажера #{i} на рекламные ролики", 'position_type': 'редактор',
+     'date': datetime.now()}
+    for i in range(3)
+]
+GPT_STATS = {'requests': 2, 'prompt_tokens': 900, 'cached_tokens': 300, 'completion_tokens': 120}
+
+
+@pytest.fixture
+def job(sqlite_database, monkeypatch):
+    """run_vacancy_collection без Telegram и GPT: три вакансии проходят все фильтры"""
+    sent = []
+
+    async def noop(*args, **kwargs):
+        return None
+
+    async def read_multiple_channels(channels, hours=24):
+        return {1: ['message'] * len(VACANCIES)}
+
+    async def filter_vacancies(vacancies):
+        return vacancies
+
+    async def send_vacancies(vacancies):
+        sent.append(vacancies)
+        return True
+
+    monkeypatch.setattr(settings, 'PRESCREEN_ENABLED', False)
+    monkeypatch.setattr(job_scheduler, 'get_enabled_channels', lambda: {'jobs': {'id': 1, 'name': 'Jobs'}})
+    monkeypatch.setattr(job_scheduler.channel_reader, 'initialize', noop)
+    monkeypatch.setattr(job_scheduler.channel_reader, 'close', noop)
+    monkeypatch.setattr(job_scheduler.channel_reader, 'read_multiple_channels', read_multiple_channels)
+    monkeypatch.setattr(job_scheduler.telegram_notifier, 'initialize', noop)
+    monkeypatch.setattr(job_scheduler.telegram_notifier, 'send_vacancies', send_vacancies)
+    monkeypatch.setattr(job_scheduler.vacancy_extractor, 'batch_extract', lambda messages: [dict(v) for v in VACANCIES])
+    monkeypatch.setattr(job_scheduler.gpt_filter, 'filter_vacancies', filter_vacancies)
+    monkeypatch.setattr(job_scheduler.gpt_filter, 'stats', dict(GPT_STATS))
+    monkeypatch.setattr(job_scheduler.deduplicator, 'filter_duplicates', lambda vacancies: vacancies)
+    monkeypatch.setattr(job_scheduler.deduplicator, 'remember', lambda vacancies: None)
+    return sent
+
+
+def last_job_run():
+    session = get_session()
+    try:
+        return session.query(JobRun).order_by(JobRun.id.desc()).first()
+    finally:
+        close_session(session)
+
+
+def assert_counters_kept(job_run):
+    assert job_run.vacancies_found == len(VACANCIES)
+    assert job_run.gpt_requests == GPT_STATS['requests']
+    assert job_run.gpt_prompt_tokens == GPT_STATS['prompt_tokens']
+    assert job_run.gpt_cached_tokens == GPT_STATS['cached_tokens']
+    assert job_run.gpt_completion_tokens == GPT_STATS['completion_tokens']
+
+
+def test_failed_save_keeps_counters(job, monkeypatch):
+    def save_vacancies(*args):
+        raise RuntimeError("database is locked")
+
+    monkeypatch.setattr(job_scheduler, '_save_vacancies', save_vacancies)
+
+    asyncio.run(job_scheduler.run_vacancy_collection())
+
+    job_run = last_job_run()
+    assert job_run.status == 'completed'
+    assert job_run.vacancies_sent == len(VACANCIES)
+    assert_counters_kept(job_run)
+    assert len(job[0]) == len(VACANCIES)
+
+
+def test_failed_job_keeps_counters(job, monkeypatch):
+    # Ошибка до записи вакансий: счетчики еще не закоммичены
+    def filter_duplicates(vacancies):
+        raise RuntimeError("deduplication failed")
+
+    monkeypatch.setattr(job_scheduler.deduplicator, 'filter_duplicates', filter_duplicates)
+
+    asyncio.run(job_scheduler.run_vacancy_collection())
+
+    job_run = last_job_run()
+    assert job_run.status == 'failed'
+    assert job_run.error_message == "deduplication failed"
+    assert_counters_kept(job_run)
+    assert job == []
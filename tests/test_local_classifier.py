@@ -0,0 +1,39 @@
+"""Хранение обучающих примеров локального классификатора"""
+
+import pytest
+
+pytest.importorskip('sqlalchemy')
+
+from config.settings import settings  # noqa: E402
+from database.connection import get_session, close_session  # noqa: E402
+from database.models import ClassificationSample  # noqa: E402
+from processors.local_classifier import save_samples  # noqa: E402
+
+
+def stored_texts():
+    session = get_session()
+    try:
+        return [text for (text,) in session.query(ClassificationSample.text).order_by(ClassificationSample.id)]
+    finally:
+        close_session(session)
+
+
+def make_samples(start, count):
+    return [({'full_text': f"пост {i}"}, {'is_relevant': False}) for i in range(start, start + count)]
+
+
+def test_save_samples_keeps_latest(sqlite_database, monkeypatch):
+    monkeypatch.setattr(settings, 'LOCAL_CLASSIFIER_MAX_SAMPLES', 5)
+
+    assert save_samples(make_samples(0, 3), 'gpt-test', 'v1') == 3
+    assert save_samples(make_samples(3, 4), 'gpt-test', 'v1') == 4
+
+    assert stored_texts() == [f"пост {i}" for i in range(2, 7)]
+
+
+def test_save_samples_without_limit(sqlite_database, monkeypatch):
+    monkeypatch.setattr(settings, 'LOCAL_CLASSIFIER_MAX_SAMPLES', 0)
+
+    save_samples(make_samples(0, 7), 'gpt-test', 'v1')
+
+    assert len(stored_texts()) == 7
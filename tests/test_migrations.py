@@ -0,0 +1,107 @@
+"""Схема БД на старте: миграции Alembic и создание пустой базы"""
+
+import hashlib
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip('sqlalchemy')
+pytest.importorskip('alembic')
+
+from alembic import command  # noqa: E402
+from alembic.script import ScriptDirectory  # noqa: E402
+from sqlalchemy import inspect, text  # noqa: E402
+
+from database.connection import get_session, close_session  # noqa: E402
+from database.migrate import get_alembic_config, upgrade_database  # noqa: E402
+from database.models import JobRun, Vacancy  # noqa: E402
+from processors.deduplicator import Deduplicator  # noqa: E402
+from utils.hash_generator import generate_normalized_hash  # noqa: E402
+from utils.normalized_view import get_view  # noqa: E402
+from utils.text_utils import normalize_text  # noqa: E402
+
+
+def current_revision(engine):
+    with engine.connect() as conn:
+        return conn.execute(text('SELECT version_num FROM alembic_version')).scalar()
+
+
+def head_revision():
+    return ScriptDirectory.from_config(get_alembic_config()).get_current_head()
+
+
+def columns(engine, table):
+    return {column['name'] for column in inspect(engine).get_columns(table)}
+
+
+@pytest.fixture
+def empty_database(sqlite_database):
+    """sqlite_database без таблиц: upgrade_database стартует с пустой базы"""
+    from database.models import Base
+    Base.metadata.drop_all(bind=sqlite_database)
+    return sqlite_database
+
+
+def test_empty_database_is_created_and_stamped(empty_database):
+    upgrade_database(empty_database)
+
+    assert inspect(empty_database).has_table('vacancies')
+    assert current_revision(empty_database) == head_revision()
+
+
+def test_existing_database_is_upgraded(empty_database):
+    upgrade_database(empty_database)
+    command.downgrade(get_alembic_config(), 'base')
+    assert 'gpt_requests' not in columns(empty_database, 'job_runs')
+    assert not inspect(empty_database).has_table('classification_cache')
+
+    upgrade_database(empty_database)
+
+    assert current_revision(empty_database) == head_revision()
+    assert {'gpt_requests', 'gpt_prompt_tokens'} <= columns(empty_database, 'job_runs')
+    assert {'url_hash', 'minhash', 'simhash', 'simhash_b0'} <= columns(empty_database, 'vacancies')
+    assert inspect(empty_database).has_table('classification_cache')
+
+    session = get_session()
+    try:
+        session.add(JobRun(status='running'))
+        session.commit()
+    finally:
+        close_session(session)
+
+    # Повторный запуск на актуальной схеме ничего не меняет
+    upgrade_database(empty_database)
+    assert current_revision(empty_database) == head_revision()
+
+
+def test_legacy_hash_round_trips(empty_database):
+    # База до 0004: hash — hex SHA-256 от старой схемы хеширования
+    upgrade_database(empty_database)
+    command.downgrade(get_alembic_config(), '0003')
+
+    title, company, url = '  Ищем МОНТАЖЕРА!!! 🎬 (Remote) ', 'Студия «Кадр»', ' https://t.me/channel/42 '
+    legacy_hash = hashlib.sha256(f"{title}|{company}|{url}".encode('utf-8')).hexdigest()
+    with empty_database.begin() as conn:
+        conn.execute(text("INSERT INTO channels (name, username, enabled) VALUES ('Legacy', 'legacy', 1)"))
+        conn.execute(
+            text(
+                'INSERT INTO vacancies (channel_id, title, company, url, hash, found_at) '
+                'VALUES (1, :title, :company, :url, :hash, :found_at)'
+            ),
+            {'title': title, 'company': company, 'url': url, 'hash': legacy_hash, 'found_at': datetime.now()}
+        )
+
+    upgrade_database(empty_database)
+
+    expected = generate_normalized_hash(normalize_text(title), normalize_text(company), url.strip())
+    vacancy_data = {'title': title, 'company': company, 'url': url, 'full_text': title}
+    assert get_view(vacancy_data).fingerprint == expected
+
+    session = get_session()
+    try:
+        assert session.query(Vacancy.hash).scalar() == expected
+        # Новый пост с теми же полями находится индексным поиском по hash
+        cutoff_date = datetime.now() - timedelta(days=7)
+        assert Deduplicator()._load_existing(session, Vacancy.hash, [expected], cutoff_date)
+    finally:
+        close_session(session)
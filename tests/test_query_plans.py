@@ -0,0 +1,185 @@
+"""
+Планы запросов дедупликации и истории отправок.
+
+Временная SQLite-база по моделям заполняется вакансиями, затем прогоняются
+настоящие пути кода (дедупликация, поиск репостов MinHash и SimHash, запись
+истории отправок). Для каждого выполненного SELECT проверяется EXPLAIN QUERY
+PLAN: полный просмотр vacancies, sent_vacancies или vacancy_lsh_buckets
+считается регрессией.
+"""
+
+import asyncio
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip('sqlalchemy')
+pytest.importorskip('aiosqlite')
+pytest.importorskip('telegram')
+
+from sqlalchemy import event  # noqa: E402
+
+from config.settings import settings  # noqa: E402
+from database import connection  # noqa: E402
+from database.connection import get_session, close_session  # noqa: E402
+from database.models import Base, Channel, Vacancy  # noqa: E402
+from processors.deduplicator import Deduplicator  # noqa: E402
+from processors.repost_index import repost_index  # noqa: E402
+from processors.simhash_index import simhash_index  # noqa: E402
+from utils.hash_generator import generate_vacancy_hash, generate_url_key  # noqa: E402
+
+SEED_ROWS = 2000
+PROBES = 50
+
+# Таблицы, которые нельзя читать полным просмотром
+CHECKED_TABLES = ('vacancies', 'sent_vacancies', 'vacancy_lsh_buckets')
+
+ROLES = ['монтажер', 'видеоредактор', 'сценарист', 'шеф-редактор', 'редактор']
+STUDIOS = ['Студия Кадр', 'Продакшн Север', 'Агентство Ролик', 'Холдинг Медиа']
+WORDS = (
+    'проект сериал реклама ролик клип блог подкаст документальный игровой монтаж цветокоррекция '
+    'звук графика анимация сценарий синопсис питч офис удаленно москва полный частичный график '
+    'опыт портфолио оплата ставка гонорар сдельно договор срочно команда продюсер режиссер оператор '
+    'формат вертикальный youtube reels tiktok канал выпуск эпизод сезон тестовое задание резюме'
+).split()
+
+
+def make_vacancy(i):
+    rng = random.Random(i)
+    role = ROLES[i % len(ROLES)]
+    studio = STUDIOS[i % len(STUDIOS)]
+    return {
+        'channel_id': 1,
+        'title': f"Ищем {role} #{i}",
+        'company': studio,
+        'url': f"https://t.me/channel/{i}",
+        'position_type': 'сценарист' if role == 'сценарист' else 'редактор',
+        # Разный текст у каждой вакансии, иначе LSH делает кандидатами всю таблицу
+        'full_text': f"Ищем {role} в {studio}. " + ' '.join(rng.choice(WORDS) for _ in range(40)),
+        'date': datetime.now() - timedelta(hours=i % 240),
+    }
+
+
+def seed(rows):
+    session = get_session()
+    try:
+        session.add(Channel(name='Plan check', username='plan_check'))
+        session.flush()
+
+        for i in range(rows):
+            data = make_vacancy(i)
+            vacancy = Vacancy(
+                channel_id=1,
+                title=data['title'],
+                company=data['company'],
+                url=data['url'],
+                url_hash=generate_url_key(data['url']),
+                position_type=data['position_type'],
+                full_text=data['full_text'],
+                hash=generate_vacancy_hash(data['title'], data['company'], data['url']),
+                found_at=data['date'],
+            )
+            simhash_index.attach(vacancy, data)
+            repost_index.attach(vacancy, data)
+            session.add(vacancy)
+
+        session.commit()
+        # Статистика для планировщика SQLite
+        session.connection().exec_driver_sql('ANALYZE')
+        session.commit()
+    finally:
+        close_session(session)
+
+
+def run_workload(probes):
+    """Настоящие пути кода, планы запросов которых проверяются"""
+    from notifiers.telegram_bot import TelegramNotifier
+
+    deduplicator = Deduplicator()
+    deduplicator.filter_duplicates([dict(vacancy) for vacancy in probes])
+
+    session = get_session()
+    try:
+        cutoff_date = datetime.now() - timedelta(days=7)
+        repost_index.find_reposts([dict(vacancy) for vacancy in probes], session, cutoff_date)
+        simhash_index.find_reposts([dict(vacancy) for vacancy in probes], session, cutoff_date)
+    finally:
+        close_session(session)
+
+    sent = [{'id': i + 1} for i in range(len(probes))] + [
+        {'hash': generate_vacancy_hash(v['title'], v['company'], v['url'])} for v in probes
+    ]
+    asyncio.run(TelegramNotifier()._save_sent_vacancies(sent, ['plan_check', 'second_user']))
+
+
+@pytest.fixture(scope='module')
+def query_plans(tmp_path_factory):
+    """
+    Returns:
+        List[Tuple[str, List[str]]]: (SELECT, строки EXPLAIN QUERY PLAN) по каждому
+        различному запросу рабочей нагрузки
+    """
+    database_url = f"sqlite:///{tmp_path_factory.mktemp('plans') / 'plans.db'}"
+
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(settings, 'DATABASE_URL', database_url)
+        for name in ('engine', 'SessionLocal', 'async_engine', 'AsyncSessionLocal'):
+            monkeypatch.setattr(connection, name, None)
+
+        engine = connection.init_database()
+        Base.metadata.create_all(bind=engine)
+        seed(SEED_ROWS)
+
+        statements = []
+        # История отправок пишется через async engine — слушаем оба
+        engines = [engine, connection.init_async_database().sync_engine]
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith('SELECT') and not executemany:
+                statements.append((statement, parameters))
+
+        for captured_engine in engines:
+            event.listen(captured_engine, 'before_cursor_execute', capture)
+
+        # Половина — уже сохраненные вакансии, половина — новые
+        probes = [make_vacancy(i) for i in range(PROBES // 2)]
+        probes += [make_vacancy(SEED_ROWS + i) for i in range(PROBES - len(probes))]
+        try:
+            run_workload(probes)
+        finally:
+            for captured_engine in engines:
+                event.remove(captured_engine, 'before_cursor_execute', capture)
+
+        plans = []
+        seen = set()
+        with engine.connect() as conn:
+            for statement, parameters in statements:
+                if statement in seen:
+                    continue
+                seen.add(statement)
+                plan = [row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+                plans.append((statement, plan))
+
+        connection.close_database()
+        asyncio.run(connection.close_async_database())
+
+    return plans
+
+
+def test_workload_reads_checked_tables(query_plans):
+    # Без запросов к проверяемым таблицам проверка планов ничего не доказывает
+    read_tables = {
+        table for statement, _ in query_plans for table in CHECKED_TABLES
+        if f"FROM {table}" in statement or f"JOIN {table}" in statement
+    }
+    assert read_tables == set(CHECKED_TABLES)
+
+
+def test_no_full_table_scans(query_plans):
+    regressions = [
+        ' '.join(statement.split())[:200] + ''.join(f"\n    {line}" for line in plan)
+        for statement, plan in query_plans
+        if any(line.startswith('SCAN ') and line.split()[1] in CHECKED_TABLES for line in plan)
+    ]
+    assert not regressions, f"{len(regressions)} full table scans:\n" + '\n'.join(regressions)
@@ -0,0 +1,105 @@
+"""
+Поиск почти-дубликатов SimHash: пачка вакансий проверяется одним запросом
+по полосам, результат совпадает с полным перебором расстояний Хэмминга.
+"""
+
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+pytest.importorskip('sqlalchemy')
+
+from sqlalchemy import event  # noqa: E402
+
+from database.connection import get_session, close_session  # noqa: E402
+from database.models import Channel, Vacancy  # noqa: E402
+from processors.simhash_index import SimHashIndex  # noqa: E402
+from utils.similarity import hamming_distance  # noqa: E402
+
+WORDS = (
+    'монтаж сериал реклама ролик клип блог подкаст сценарий графика анимация звук '
+    'офис удаленно график оплата ставка гонорар проект команда продюсер режиссер'
+).split()
+
+
+def make_post(i):
+    rng = random.Random(i)
+    return {'title': f"Вакансия #{i}", 'full_text': ' '.join(rng.choice(WORDS) for _ in range(30))}
+
+
+def seed(index, posts, found_at):
+    session = get_session()
+    try:
+        session.add(Channel(name='SimHash', username='simhash'))
+        session.flush()
+        for i, post in enumerate(posts):
+            vacancy = Vacancy(
+                channel_id=1, title=post['title'], url=f"https://t.me/simhash/{i}",
+                full_text=post['full_text'], hash=bytes([i]) * 16, found_at=found_at,
+            )
+            index.attach(vacancy, post)
+            session.add(vacancy)
+        session.commit()
+    finally:
+        close_session(session)
+
+
+def brute_force(index, stored, probes):
+    """Ожидаемый результат: сравнение каждой вакансии со всеми сохраненными и предыдущими"""
+    stored_values = [index.fingerprint(post) for post in stored]
+    reposts, accepted = set(), []
+    for i, post in enumerate(probes):
+        value = index.fingerprint(post)
+        if any(hamming_distance(value, other) <= index.max_distance for other in stored_values + accepted):
+            reposts.add(i)
+            continue
+        accepted.append(value)
+    return reposts
+
+
+def test_find_reposts_is_batched(sqlite_database):
+    index = SimHashIndex(max_distance=3)
+    now = datetime.now()
+    stored = [make_post(i) for i in range(40)]
+    seed(index, stored, now)
+
+    # Сохраненные посты, их копии с мелкой правкой, новые посты и повтор внутри пачки
+    probes = [dict(post) for post in stored[:10]]
+    probes += [dict(post, full_text=post['full_text'] + ' срочно') for post in stored[10:20]]
+    probes += [make_post(1000 + i) for i in range(10)]
+    probes.append(dict(probes[-1]))
+
+    selects = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            selects.append(statement)
+
+    event.listen(sqlite_database, 'before_cursor_execute', capture)
+    session = get_session()
+    try:
+        reposts = index.find_reposts(probes, session, now - timedelta(days=1))
+    finally:
+        close_session(session)
+        event.remove(sqlite_database, 'before_cursor_execute', capture)
+
+    assert reposts == brute_force(index, stored, probes)
+    assert set(range(10)) <= reposts
+    assert len(probes) - 1 in reposts
+    assert len(selects) == 1
+
+
+def test_find_reposts_respects_time_window(sqlite_database):
+    index = SimHashIndex(max_distance=3)
+    now = datetime.now()
+    stored = [make_post(i) for i in range(5)]
+    seed(index, stored, now - timedelta(days=30))
+
+    session = get_session()
+    try:
+        reposts = index.find_reposts([dict(post) for post in stored], session, now - timedelta(days=7))
+    finally:
+        close_session(session)
+
+    assert reposts == set()
@@ -0,0 +1,91 @@
+"""
+Дифференциальная проверка быстрых normalize_text / clean_text:
+на синтетическом корпусе постов результат должен совпадать
+с исходными regex-реализациями. Скорость (постов/сек) сравнивает
+benchmark_text_utils.py.
+"""
+
+import random
+import re
+
+import pytest
+
+from utils.text_utils import normalize_text, clean_text
+
+
+def normalize_text_reference(text):
+    """Исходная (эталонная) реализация normalize_text"""
+    if not text:
+        return ''
+
+    # Lowercase
+    text = text.lower().strip()
+
+    # Удаление специальных символов, но сохраняем важные: +, -, /, #, @
+    text = re.sub(r'[^\w\s\+\-\/#@]', '', text)
+
+    # Удаление множественных пробелов
+    text = re.sub(r'\s+', ' ', text)
+
+    return text
+
+
+def clean_text_reference(text):
+    """Исходная (эталонная) реализация clean_text"""
+    if not text:
+        return ''
+
+    # Удаление множественных переносов строк
+    text = re.sub(r'\n{3,}', '\n\n', text)
+
+    # Удаление лишних пробелов
+    text = re.sub(r' {2,}', ' ', text)
+
+    # Удаление пробелов в начале и конце строк
+    lines = [line.strip() for line in text.split('\n')]
+    text = '\n'.join(lines)
+
+    return text.strip()
+
+
+def build_corpus(size=2000, seed=42):
+    """Синтетический корпус постов: кириллица, эмодзи, Unicode-цифры, пустые строки"""
+    rng = random.Random(seed)
+    phrases = [
+        'Ищем видеоредактора в продакшн-студию!', 'Требования: опыт монтажа от 2 лет',
+        'Premiere/After Effects, DaVinci', 'З/п 80-120к ₽', 'Пишите @hr_manager',
+        '🔥🔥🔥', '#вакансия #монтаж #удалёнка', 'https://t.me/jobs/123',
+        'C++ / Python-разработчик', '«Студия Пилот»', 'Σ İ ½ ²', '​ \t',
+        'Senior Video Editor (remote)', '—', '', ' ',
+    ]
+    noise = 'аб cd 1_+-/#@.,!?()«»—\t  \x1c🎬'
+
+    corpus = ['', ' ', '!', ' ! ', '\n\n\n', ' \n \n \n a  b  \n\n\n\n c ']
+    for _ in range(size):
+        lines = []
+        for _ in range(rng.randint(1, 12)):
+            words = [rng.choice(phrases) for _ in range(rng.randint(0, 8))]
+            if rng.random() < 0.3:
+                words.append(''.join(rng.choice(noise) for _ in range(rng.randint(1, 10))))
+            pad = ' ' * rng.randint(0, 3)
+            lines.append(pad + ' '.join(words) + pad)
+        corpus.append('\n'.join(lines) if rng.random() < 0.5
+                      else ('\n' * rng.randint(1, 4)).join(lines))
+    return corpus
+
+
+CORPUS = build_corpus()
+
+
+@pytest.mark.parametrize('fast, reference', [
+    (normalize_text, normalize_text_reference),
+    (clean_text, clean_text_reference),
+], ids=['normalize_text', 'clean_text'])
+def test_matches_reference(fast, reference):
+    mismatches = [text for text in CORPUS if fast(text) != reference(text)]
+    assert not mismatches, f"{len(mismatches)} mismatches, first: {mismatches[0][:80]!r}"
+
+
+@pytest.mark.parametrize('text', [None, '', ' ', '!', ' ! ', 'C++  Python-Dev', '  Σ İ ½  '])
+def test_normalize_text_edge_cases(text):
+    assert normalize_text(text) == normalize_text_reference(text)
@@ -84,14 +84,29 @@ def load_channels_from_csv(csv_path=None):
 
 
 def get_enabled_channels(limit=None):
-    """Получить список активных каналов из БД"""
+    """
+    Получить активные каналы из БД одним запросом
+
+    Возвращаются простые значения, а не ORM-объекты: словарь переживает
+    закрытие сессии и переиспользуется всем пайплайном без запросов по username.
+
+    Args:
+        limit: Максимальное количество каналов (опционально)
+
+    Returns:
+        Dict[str, dict]: {username: {'id': ..., 'name': ...}}
+    """
     session = get_session()
     try:
-        query = session.query(Channel).filter_by(enabled=True)
+        query = session.query(Channel.id, Channel.username, Channel.name).filter_by(
+            enabled=True
+        ).order_by(Channel.id)
         if limit:
             query = query.limit(limit)
-        channels = query.all()
-        return channels
+        return {
+            username: {'id': channel_id, 'name': name}
+            for channel_id, username, name in query.all()
+        }
     finally:
         close_session(session)
 
@@ -1,10 +1,13 @@
 import hashlib
 from utils.text_utils import normalize_text
 
+# Размер отпечатка вакансии в байтах (колонка Vacancy.hash)
+FINGERPRINT_SIZE = 16
+
 
 def generate_vacancy_hash(title, company='', url=''):
     """
-    Генерирует уникальный SHA-256 хеш для вакансии на основе:
+    Генерирует уникальный отпечаток вакансии (BLAKE2b, 16 байт) на основе:
     - Нормализованного названия
     - Названия компании
     - URL
@@ -15,19 +18,46 @@ def generate_vacancy_hash(title, company='', url=''):
         url: URL вакансии (опционально)
 
     Returns:
-        str: SHA-256 хеш (64 символа)
+        bytes: Отпечаток (FINGERPRINT_SIZE байт)
     """
     # Нормализация компонентов
     normalized_title = normalize_text(title) if title else ''
     normalized_company = normalize_text(company) if company else ''
     normalized_url = url.strip() if url else ''
 
+    return generate_normalized_hash(normalized_title, normalized_company, normalized_url)
+
+
+def generate_normalized_hash(normalized_title, normalized_company, normalized_url):
+    """
+    Генерирует хеш из уже нормализованных компонентов
+    (без повторного прогона через normalize_text)
+
+    Returns:
+        bytes: Отпечаток (FINGERPRINT_SIZE байт)
+    """
     # Создание строки для хеширования
     hash_string = f"{normalized_title}|{normalized_company}|{normalized_url}"
 
-    # Генерация SHA-256 хеша
-    hash_object = hashlib.sha256(hash_string.encode('utf-8'))
-    return hash_object.hexdigest()
+    # 128 бит BLAKE2b хватает для уникальности, а индекс вдвое меньше hex SHA-256
+    hash_object = hashlib.blake2b(hash_string.encode('utf-8'), digest_size=FINGERPRINT_SIZE)
+    return hash_object.digest()
+
+
+def generate_url_key(url):
+    """
+    Короткий ключ URL для индекса (url — неограниченный Text, индексировать
+    его целиком дорого): 8 байт BLAKE2b как знаковое 64-битное число (BIGINT)
+
+    Returns:
+        int or None: Ключ или None для пустого URL
+    """
+    normalized_url = url.strip() if url else ''
+    if not normalized_url:
+        return None
+
+    digest = hashlib.blake2b(normalized_url.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big', signed=True)
 
 
 def is_same_vacancy(hash1, hash2):
@@ -49,6 +79,6 @@ if __name__ == '__main__':
         url='https://t.me/channel/123'
     )
 
-    print(f"Hash 1: {hash1}")
-    print(f"Hash 2: {hash2}")
+    print(f"Hash 1: {hash1.hex()}")
+    print(f"Hash 2: {hash2.hex()}")
     print(f"Are same: {is_same_vacancy(hash1, hash2)}")
@@ -0,0 +1,121 @@
+from functools import cached_property
+from utils.text_utils import normalize_text
+from utils.hash_generator import generate_normalized_hash
+
+# Ключ, под которым представление хранится в dict вакансии
+VIEW_KEY = '_view'
+
+
+class NormalizedView:
+    """
+    Лениво вычисляемое нормализованное представление поста.
+
+    Каждое поле считается один раз при первом обращении и дальше
+    переиспользуется всеми процессорами (фильтры, дедупликация, хеш).
+    """
+
+    def __init__(self, title='', full_text='', company='', url=''):
+        self.title = title or ''
+        self.full_text = full_text or ''
+        self.company = company or ''
+        self.url = url or ''
+
+    def matches(self, vacancy_data):
+        """Проверяет, что представление построено по текущим полям вакансии"""
+        return (
+            self.full_text == (vacancy_data.get('full_text') or '')
+            and self.title == (vacancy_data.get('title') or '')
+            and self.company == (vacancy_data.get('company') or '')
+            and self.url == (vacancy_data.get('url') or '')
+        )
+
+    @cached_property
+    def text_lower(self):
+        """Текст поста в lowercase"""
+        return self.full_text.lower()
+
+    @cached_property
+    def title_lower(self):
+        """Заголовок в lowercase"""
+        return self.title.lower()
+
+    @cached_property
+    def combined_lower(self):
+        """Заголовок и текст поста одной строкой в lowercase"""
+        return f"{self.title_lower} {self.text_lower}"
+
+    @cached_property
+    def normalized_text(self):
+        """Текст поста после normalize_text"""
+        return normalize_text(self.full_text)
+
+    @cached_property
+    def tokens(self):
+        """Список токенов нормализованного текста"""
+        return self.normalized_text.split()
+
+    @cached_property
+    def normalized_title(self):
+        """Заголовок после normalize_text"""
+        return normalize_text(self.title)
+
+    @cached_property
+    def normalized_company(self):
+        """Компания после normalize_text"""
+        return normalize_text(self.company)
+
+    @cached_property
+    def fingerprint(self):
+        """Бинарный отпечаток вакансии (совпадает с generate_vacancy_hash)"""
+        return generate_normalized_hash(
+            self.normalized_title,
+            self.normalized_company,
+            self.url.strip()
+        )
+
+    def derive(self, vacancy_data):
+        """
+        Создает представление для вакансии с тем же текстом, но другими
+        title/company/url (например, после GPT). Производные от текста поля
+        переносятся без пересчета.
+        """
+        view = NormalizedView(
+            title=vacancy_data.get('title'),
+            full_text=self.full_text,
+            company=vacancy_data.get('company'),
+            url=vacancy_data.get('url')
+        )
+        for name in ('text_lower', 'normalized_text', 'tokens'):
+            if name in self.__dict__:
+                view.__dict__[name] = self.__dict__[name]
+        return view
+
+
+def get_view(vacancy_data):
+    """
+    Возвращает нормализованное представление вакансии, создавая его при
+    первом обращении и пересоздавая, если поля вакансии изменились
+
+    Args:
+        vacancy_data: dict с полями title, company, url, full_text
+
+    Returns:
+        NormalizedView
+    """
+    view = vacancy_data.get(VIEW_KEY)
+
+    if view is not None and view.matches(vacancy_data):
+        return view
+
+    if view is not None and view.full_text == (vacancy_data.get('full_text') or ''):
+        view = view.derive(vacancy_data)
+    else:
+        view = NormalizedView(
+            title=vacancy_data.get('title'),
+            full_text=vacancy_data.get('full_text'),
+            company=vacancy_data.get('company'),
+            url=vacancy_data.get('url')
+        )
+
+    vacancy_data[VIEW_KEY] = view
+    return view
@@ -0,0 +1,140 @@
+import hashlib
+import random
+import zlib
+from collections import Counter
+
+# Простое число Мерсенна 2^61 - 1 для универсального хеширования MinHash
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def shingles(tokens, size=3):
+    """
+    Множество хешированных шинглов (n-грамм слов) из списка токенов
+
+    Args:
+        tokens: List[str] - токены нормализованного текста
+        size: Длина шингла в словах
+
+    Returns:
+        Set[int]: crc32 шинглов (стабильны между запусками)
+    """
+    if not tokens:
+        return set()
+
+    if len(tokens) < size:
+        return {zlib.crc32(' '.join(tokens).encode('utf-8'))}
+
+    return {
+        zlib.crc32(' '.join(tokens[i:i + size]).encode('utf-8'))
+        for i in range(len(tokens) - size + 1)
+    }
+
+
+def jaccard(a, b):
+    """Коэффициент Жаккара двух множеств"""
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class MinHasher:
+    """MinHash-сигнатуры множеств шинглов с фиксированными перестановками"""
+
+    def __init__(self, num_perm=64, seed=1):
+        rng = random.Random(seed)
+        self.num_perm = num_perm
+        self.permutations = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+
+    def signature(self, shingle_set):
+        """
+        Args:
+            shingle_set: Set[int] - хеши шинглов
+
+        Returns:
+            List[int]: MinHash-сигнатура (num_perm значений по 32 бита)
+        """
+        if not shingle_set:
+            return [_MAX_HASH] * self.num_perm
+
+        return [
+            min(((a * x + b) % _MERSENNE_PRIME) & _MAX_HASH for x in shingle_set)
+            for a, b in self.permutations
+        ]
+
+
+def lsh_band_keys(signature, bands):
+    """
+    Разбивает сигнатуру на полосы для LSH: посты с совпадающей
+    хотя бы одной полосой становятся кандидатами в дубликаты
+
+    Args:
+        signature: List[int] - MinHash-сигнатура
+        bands: Количество полос (len(signature) должно делиться на bands)
+
+    Returns:
+        List[int]: Хеш каждой полосы (crc32, влезает в 32 бита)
+    """
+    rows = len(signature) // bands
+    return [
+        zlib.crc32(','.join(map(str, signature[band * rows:(band + 1) * rows])).encode('ascii'))
+        for band in range(bands)
+    ]
+
+
+def estimate_jaccard(signature_a, signature_b):
+    """Оценка коэффициента Жаккара по двум MinHash-сигнатурам"""
+    if not signature_a:
+        return 0.0
+    return sum(1 for a, b in zip(signature_a, signature_b) if a == b) / len(signature_a)
+
+
+def _token_hash64(token):
+    """Стабильный 64-битный хеш токена"""
+    return int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def simhash64(tokens):
+    """
+    64-битный SimHash (Charikar) по токенам с весом = частота токена.
+    Похожие тексты дают отпечатки с малым расстоянием Хэмминга.
+
+    Args:
+        tokens: List[str] - токены нормализованного текста
+
+    Returns:
+        int: Беззнаковый 64-битный отпечаток (0 для пустого текста)
+    """
+    if not tokens:
+        return 0
+
+    weights = [0] * 64
+    for token, count in Counter(tokens).items():
+        h = _token_hash64(token)
+        for bit in range(64):
+            weights[bit] += count if (h >> bit) & 1 else -count
+
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+
+def hamming_distance(a, b):
+    """Количество различающихся битов двух 64-битных отпечатков"""
+    return bin((a ^ b) & 0xFFFFFFFFFFFFFFFF).count('1')
+
+
+def simhash_bands(value, bands=4):
+    """
+    Делит 64-битный отпечаток на равные полосы. Если расстояние Хэмминга
+    меньше количества полос, хотя бы одна полоса совпадает целиком
+    (принцип Дирихле), поэтому поиск «в пределах k бит» сводится
+    к k + 1 точным сравнениям.
+
+    Returns:
+        List[int]: Значения полос (по 64 / bands бит)
+    """
+    width = 64 // bands
+    mask = (1 << width) - 1
+    return [(value >> (band * width)) & mask for band in range(bands)]
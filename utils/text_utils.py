@@ -1,5 +1,23 @@
 import re
 
+# Символы, которые normalize_text сохраняет помимо букв, цифр и пробелов.
+# Важно для: C++, Python-разработчик, SMM/контент и т.д.
+_KEPT_SYMBOLS = '_+-/#@'
+
+# Удаление специальных символов (общий случай, любой Unicode)
+_SPECIAL_CHARS_RE = re.compile(r'[^\w\s\+\-\/#@]+')
+
+# Быстрый путь для ASCII-строк: таблица удаления спецсимволов для str.translate
+_ASCII_SPECIAL_TABLE = str.maketrans('', '', ''.join(
+    char for char in map(chr, range(128))
+    if not (char.isalnum() or char.isspace() or char in _KEPT_SYMBOLS)
+))
+
+_MULTI_SPACE_RE = re.compile(r' {2,}')
+
+_URL_RE = re.compile(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+')
+_TME_RE = re.compile(r't\.me/[a-zA-Z0-9_/]+')
+
 
 def normalize_text(text):
     """
@@ -8,21 +26,33 @@ def normalize_text(text):
     - сохранение важных символов (+, -, /)
     - удаление лишних специальных символов
     - удаление лишних пробелов
+
+    Однопроходная версия: спецсимволы удаляются через str.translate (ASCII)
+    или один скомпилированный regex, пробелы схлопываются через split/join.
+    Совпадение с исходной regex-реализацией проверяет tests/test_text_utils.py.
     """
     if not text:
         return ''
 
-    # Lowercase
     text = text.lower().strip()
 
-    # Удаление специальных символов, но сохраняем важные: +, -, /, #, @
-    # Это важно для: C++, Python-разработчик, SMM/контент и т.д.
-    text = re.sub(r'[^\w\s\+\-\/#@]', '', text)
+    if text.isascii():
+        text = text.translate(_ASCII_SPECIAL_TABLE)
+    else:
+        text = _SPECIAL_CHARS_RE.sub('', text)
 
-    # Удаление множественных пробелов
-    text = re.sub(r'\s+', ' ', text)
+    # Схлопывание пробелов. В отличие от re.sub(r'\s+', ' ') split() убирает
+    # пробелы по краям, поэтому восстанавливаем их (они появляются, если
+    # строка начиналась/заканчивалась удаленными спецсимволами)
+    collapsed = ' '.join(text.split())
+    if not collapsed:
+        return ' ' if text else ''
+    if text[0].isspace():
+        collapsed = ' ' + collapsed
+    if text[-1].isspace():
+        collapsed += ' '
 
-    return text
+    return collapsed
 
 
 def extract_url_from_text(text):
@@ -31,15 +61,13 @@ def extract_url_from_text(text):
         return None
 
     # Поиск URLs
-    url_pattern = r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+'
-    urls = re.findall(url_pattern, text)
+    urls = _URL_RE.findall(text)
 
     if urls:
         return urls[0]
 
     # Поиск t.me ссылок без http
-    tme_pattern = r't\.me/[a-zA-Z0-9_/]+'
-    tme_links = re.findall(tme_pattern, text)
+    tme_links = _TME_RE.findall(text)
 
     if tme_links:
         return f"https://{tme_links[0]}"
@@ -48,21 +76,34 @@ def extract_url_from_text(text):
 
 
 def clean_text(text):
-    """Очистка текста от лишних символов и форматирования"""
+    """
+    Очистка текста от лишних символов и форматирования
+
+    Однопроходная версия: строки обрабатываются за один проход по split('\n'),
+    regex для пробелов вызывается только для строк, где они есть.
+    Совпадение с исходной regex-реализацией проверяет tests/test_text_utils.py.
+    """
     if not text:
         return ''
 
-    # Удаление множественных переносов строк
-    text = re.sub(r'\n{3,}', '\n\n', text)
+    lines = []
+    empty_run = 0
 
-    # Удаление лишних пробелов
-    text = re.sub(r' {2,}', ' ', text)
+    for line in text.split('\n'):
+        if not line:
+            # Три и более переноса подряд схлопываются в два,
+            # т.е. между строками остается не больше одной пустой
+            empty_run += 1
+            if empty_run < 2 or not lines:
+                lines.append(line)
+            continue
 
-    # Удаление пробелов в начале и конце строк
-    lines = [line.strip() for line in text.split('\n')]
-    text = '\n'.join(lines)
+        empty_run = 0
+        if '  ' in line:
+            line = _MULTI_SPACE_RE.sub(' ', line)
+        lines.append(line.strip())
 
-    return text.strip()
+    return '\n'.join(lines).strip()
 
 
 def truncate_text(text, max_length=100):
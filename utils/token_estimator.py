@@ -0,0 +1,51 @@
+import math
+import re
+
+# Грубая локальная оценка числа токенов без токенизатора модели.
+# Коэффициенты подобраны с запасом под o200k (gpt-4o / gpt-4o-mini):
+# кириллица дробится мельче латиницы, эмодзи и пунктуация — почти
+# всегда отдельные токены.
+CYRILLIC_CHARS_PER_TOKEN = 3.0
+LATIN_CHARS_PER_TOKEN = 4.0
+
+_CYRILLIC_RE = re.compile(r'[А-Яа-яЁё]+')
+_LATIN_RE = re.compile(r'[A-Za-z0-9]+')
+_SYMBOL_RE = re.compile(r'[^\sА-Яа-яЁёA-Za-z0-9]')
+
+
+def estimate_tokens(text):
+    """
+    Оценивает количество токенов в тексте (с запасом в большую сторону)
+
+    Args:
+        text: Текст
+
+    Returns:
+        int: Оценка числа токенов
+    """
+    if not text:
+        return 0
+
+    cyrillic = sum(map(len, _CYRILLIC_RE.findall(text)))
+    latin = sum(map(len, _LATIN_RE.findall(text)))
+    symbols = len(_SYMBOL_RE.findall(text))
+
+    return math.ceil(
+        cyrillic / CYRILLIC_CHARS_PER_TOKEN
+        + latin / LATIN_CHARS_PER_TOKEN
+        + symbols
+    )
+
+
+def estimate_messages_tokens(messages):
+    """
+    Оценивает количество входных токенов для списка сообщений Chat API
+    (с учетом служебных токенов на каждое сообщение)
+
+    Args:
+        messages: List[dict] - сообщения с полем content
+
+    Returns:
+        int: Оценка числа токенов
+    """
+    return sum(estimate_tokens(message.get('content', '')) + 4 for message in messages) + 3